@@ -68,6 +68,19 @@ EMAIL_HOST_PASSWORD = 'ongk fjez tkuf qkdr'         # App password
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 ######################################
 
+# Auth logs (login/logout) are buffered in-process and written with bulk_create.
+# Set AUTHLOG_BUFFERED = False to write each entry synchronously instead.
+AUTHLOG_BUFFERED = True
+AUTHLOG_BATCH_SIZE = 50         # flush as soon as this many entries are queued
+AUTHLOG_FLUSH_INTERVAL = 5      # ...or after this many seconds
+
+# Rendered total-report PDFs are cached here (LRU-evicted above the size cap).
+REPORT_CACHE_DIR = BASE_DIR / 'report_cache'
+REPORT_CACHE_MAX_BYTES = 200 * 1024 * 1024
+REPORT_RENDER_WORKERS = 2                   # PDFs laid out concurrently per web process
+REPORT_SPOOL_MAX_BYTES = 1024 * 1024        # uncached PDFs spill from memory to disk above this
+REPORT_BUNDLE_WORKERS = None                # roster ZIP render processes (None = one per CPU)
+
 
 ROOT_URLCONF = 'backend.urls'
 
@@ -2,9 +2,30 @@
 from django.db import models
 from django.core.exceptions import ValidationError
 from myapp.models import StaffUser, AuthorizedUser, Course
-from myapp.exams.classrooms import ClassroomEnum
 from myapp.exams.courses_nondept import NonDeptCourseEnum
 
+
+class Classroom(models.Model):
+    """An exam room. Exams keep room codes in their `classrooms` lists; seating uses `capacity`."""
+    code = models.CharField(max_length=20, primary_key=True)
+    building = models.CharField(max_length=50, blank=True)
+    capacity = models.PositiveIntegerField(null=True, blank=True,
+                                           help_text="Exam seats (not lecture seats); rooms without one can't be seated")
+
+    class Meta:
+        db_table = 'classrooms'
+        ordering = ['code']
+
+    def __str__(self):
+        return f"{self.code} ({self.capacity} seats)" if self.capacity is not None else f"{self.code} (capacity not set)"
+
+    @classmethod
+    def invalid_codes(cls, rooms):
+        """The codes in `rooms` that aren't a known classroom (one query)."""
+        known = set(cls.objects.filter(code__in=list(rooms)).values_list("code", flat=True))
+        return [room for room in rooms if room not in known]
+
+
 class Exam(models.Model): 
     instructor = models.ForeignKey(
         StaffUser,
@@ -26,15 +47,15 @@ class Exam(models.Model):
 
     classrooms = models.JSONField(
         default=list,
-        help_text="List of room codes from ClassroomEnum"
+        help_text="List of Classroom codes"
     )
+    is_draft = models.BooleanField(default=False, help_text="Proposed by the timetabling solver, not published yet")
 
     def clean(self):
-        # Ensure all classrooms are valid enum values
-        valid = {v for v, _ in ClassroomEnum.choices()}
-        for room in self.classrooms:
-            if room not in valid:
-                raise ValidationError(f"Invalid classroom: {room}")
+        # Ensure all classrooms exist
+        invalid = Classroom.invalid_codes(self.classrooms)
+        if invalid:
+            raise ValidationError(f"Invalid classroom: {invalid[0]}")
 
     def __str__(self):
         rooms = ", ".join(self.classrooms)
@@ -61,8 +82,9 @@ class DeanExam(models.Model):
 
     classrooms = models.JSONField(
         default=list,
-        help_text="List of room codes from ClassroomEnum"
+        help_text="List of Classroom codes"
     )
+    is_draft = models.BooleanField(default=False, help_text="Proposed by the timetabling solver, not published yet")
 
     def clean(self):
         # 1) Build allowed set from DB + enum
@@ -80,12 +102,48 @@ class DeanExam(models.Model):
                 raise ValidationError(f"Invalid course code: {code}")
 
         # 4) Classroom validation
-        valid_rooms = {v for v, _ in ClassroomEnum.choices()}
-        for room in self.classrooms:
-            if room not in valid_rooms:
-                raise ValidationError(f"Invalid classroom code: {room}")
+        invalid = Classroom.invalid_codes(self.classrooms)
+        if invalid:
+            raise ValidationError(f"Invalid classroom code: {invalid[0]}")
 
     def __str__(self):
         courses = ", ".join(self.course_codes)
         rooms   = ", ".join(self.classrooms)
-        return f"{courses} exam on {self.date} in {rooms}"
\ No newline at end of file
+        return f"{courses} exam on {self.date} in {rooms}"
+
+
+class SeatingPlan(models.Model):
+    """
+    Reproducible split of an exam's students across its rooms (see exams/seating.py).
+    `seed` is kept for the exam's lifetime; `signature` fingerprints the roster and the
+    rooms' capacities so the stored plan is reused until either changes.
+    """
+    exam = models.OneToOneField(Exam, null=True, blank=True, on_delete=models.CASCADE, related_name="seating_plan")
+    dean_exam = models.OneToOneField(DeanExam, null=True, blank=True, on_delete=models.CASCADE, related_name="seating_plan")
+    seed = models.PositiveIntegerField()
+    signature = models.CharField(max_length=40)
+    rooms = models.JSONField(default=list, help_text='[{"room": code, "capacity": n, "students": [student pks in seat order]}]')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'seating_plans'
+
+    def __str__(self):
+        return f"Seating plan for {self.exam or self.dean_exam}"
+
+
+class CourseRoster(models.Model):
+    """
+    Students of one course code (departmental or non-departmental), kept sorted by
+    surname, name, student id so exam rosters are merges of these lists instead of
+    joins over the enrolment tables. Rebuilt by import_students (see exams/rosters.py).
+    """
+    code = models.CharField(max_length=20, primary_key=True)
+    students = models.JSONField(default=list, help_text="[[student pk, student_id, surname, name], ...] in roster order")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'course_rosters'
+
+    def __str__(self):
+        return f"{self.code} roster ({len(self.students)} students)"
@@ -0,0 +1,92 @@
+# myapp/exams/rosters.py
+"""
+Course rosters: the students of every course code, precomputed and sorted.
+
+Enrolments live in two M2M tables (StudentList.courses for departmental courses and
+StudentList.nondept_courses for other departments' codes). build_rosters reads them
+and CourseRoster stores one list per code, sorted by surname, name, student id (with
+the case- and accent-insensitive name_sort_key, as the database collation would). An
+exam's roster (a DeanExam may span several codes) is then a merge of those lists,
+with no join or DISTINCT over the enrolment tables.
+
+import_students calls refresh_course_rosters after every import; a code without a
+stored roster is built on first use.
+"""
+import heapq
+
+from myapp.models import StudentList
+from myapp.exams.models import CourseRoster
+from myapp.utils import name_sort_key
+
+
+def _roster_key(student):
+    _, student_id, surname, name = student
+    return (name_sort_key(surname), name_sort_key(name), student_id)
+
+
+def _unique(students):
+    """Drop repeats of the same student (they are adjacent in roster order)."""
+    last = None
+    for student in students:
+        if student[0] != last:
+            yield tuple(student)
+            last = student[0]
+
+
+def build_rosters(codes=None):
+    """
+    {code: [[pk, student_id, surname, name], ...] in roster order} from the enrolment
+    tables, for `codes` or every enrolled code when None.
+    """
+    rosters = {}
+    sources = (
+        (StudentList.courses.through, "course__code"),
+        (StudentList.nondept_courses.through, "nondeptcourse_id"),
+    )
+    for through, code_field in sources:
+        links = through.objects.all()
+        if codes is not None:
+            links = links.filter(**{f"{code_field}__in": list(codes)})
+        rows = links.values_list(
+            code_field, "studentlist_id", "studentlist__student_id", "studentlist__surname", "studentlist__name"
+        )
+        for code, *student in rows.iterator(chunk_size=5000):
+            rosters.setdefault(code, []).append(student)
+    return {code: [list(s) for s in _unique(sorted(students, key=_roster_key))] for code, students in rosters.items()}
+
+
+def refresh_course_rosters(engine):
+    """Rebuild every stored roster through the import engine (unchanged rosters aren't written)."""
+    rosters = build_rosters()
+    engine.upsert(
+        CourseRoster, "code", {code: {"students": students} for code, students in rosters.items()},
+        update_fields=["students"], touch="updated_at",
+    )
+    deleted, _ = CourseRoster.objects.exclude(code__in=list(rosters)).delete()
+    engine.count("CourseRoster", "delete", deleted)
+    return len(rosters)
+
+
+def rosters_for_codes(codes):
+    """{code: sorted roster} for `codes` in one query; missing rosters are built and stored."""
+    codes = set(codes)
+    rosters = dict(CourseRoster.objects.filter(code__in=codes).values_list("code", "students"))
+    missing = codes - rosters.keys()
+    if missing:
+        built = build_rosters(missing)
+        CourseRoster.objects.bulk_create(
+            [CourseRoster(code=code, students=built.get(code, [])) for code in missing], ignore_conflicts=True
+        )
+        rosters.update({code: built.get(code, []) for code in missing})
+    return rosters
+
+
+def merge_rosters(rosters, codes):
+    """(pk, student_id, surname, name) of everyone under `codes`, in roster order, each student once."""
+    lists = [rosters.get(code, []) for code in dict.fromkeys(codes)]
+    return list(_unique(heapq.merge(*lists, key=_roster_key)))
+
+
+def exam_roster(codes):
+    """Merged roster of an exam's course codes (one query when the rosters are stored)."""
+    return merge_rosters(rosters_for_codes(codes), codes)
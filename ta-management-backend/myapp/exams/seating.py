@@ -0,0 +1,159 @@
+# myapp/exams/seating.py
+"""
+Seating plans: split an exam's roster across its rooms in proportion to capacity.
+
+The roster (student pks, sorted) is shuffled with a seed stored on the exam's
+SeatingPlan, so the same roster and rooms always give the same plan. Each room gets
+a share proportional to its capacity (largest remainder, never above capacity while
+seats remain) and seat numbers follow the shuffled order.
+
+Reading never writes: plan_seating returns the stored plan while the roster and the
+rooms' capacities are unchanged, and otherwise recomputes it in memory with the stored
+seed (or one derived from the exam), so repeated downloads agree. save_seating_plan,
+behind a POST, stores the plan (optionally with a fresh seed) so a large common exam is
+not re-planned on every download. Rooms without a known capacity can't be planned.
+"""
+import hashlib
+import json
+import random
+import secrets
+
+from django.core.exceptions import ValidationError
+
+from myapp.exams.models import Classroom, Exam, SeatingPlan
+from myapp.exams.rosters import exam_roster
+from myapp.utils import name_sort_key
+
+
+def allocate_seats(capacities, n):
+    """How many of `n` students go to each room, proportional to `capacities` (a list of ints)."""
+    total = sum(capacities)
+    if not capacities:
+        return []
+    if total == 0:
+        capacities, total = [1] * len(capacities), len(capacities)
+
+    quotas = [n * c / total for c in capacities]
+    counts = [int(q) for q in quotas]
+    # hand out the remainder by largest fractional part, skipping full rooms while any has space
+    by_fraction = sorted(range(len(quotas)), key=lambda i: quotas[i] - counts[i], reverse=True)
+    left = n - sum(counts)
+    while left > 0:
+        open_rooms = [i for i in by_fraction if counts[i] < capacities[i]] or by_fraction
+        for i in open_rooms[:left]:
+            counts[i] += 1
+        left = n - sum(counts)
+    return counts
+
+
+def _signature(rooms, student_pks):
+    payload = json.dumps([rooms, sorted(student_pks)], separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def room_capacities(codes):
+    """{classroom code: capacity} for `codes` (one query); unknown rooms are left out, unset capacities are None."""
+    return dict(Classroom.objects.filter(code__in=list(codes)).values_list("code", "capacity"))
+
+
+def _owner(exam):
+    return {"exam": exam} if isinstance(exam, Exam) else {"dean_exam": exam}
+
+
+def _default_seed(exam):
+    """Seed for an exam without a stored plan, stable across requests."""
+    key = f"{'exam' if isinstance(exam, Exam) else 'dean_exam'}_{exam.pk}"
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest(), 16) % (2 ** 31)
+
+
+def plan_seating(exam, student_pks, capacities=None, seed=None):
+    """
+    The SeatingPlan for `exam` (an Exam or DeanExam) and its roster `student_pks`: the
+    stored one while it is current, else an unsaved plan computed with the stored seed
+    (or `seed`). Raises ValidationError for rooms that are unknown or have no capacity.
+    Pass `capacities` (see room_capacities) and select_related("seating_plan") to plan
+    many exams without per-exam lookups.
+    """
+    if capacities is None:
+        capacities = room_capacities(exam.classrooms)
+    unset = [code for code in exam.classrooms if not capacities.get(code)]
+    if unset:
+        raise ValidationError(f"Room {unset[0]} has no exam capacity set")
+    rooms = [[code, capacities[code]] for code in exam.classrooms]
+    signature = _signature(rooms, student_pks)
+
+    plan = getattr(exam, "seating_plan", None)
+    if plan and plan.signature == signature and seed is None:
+        return plan
+
+    if seed is None:
+        seed = plan.seed if plan else _default_seed(exam)
+    order = sorted(student_pks)
+    random.Random(seed).shuffle(order)
+
+    counts = allocate_seats([cap for _, cap in rooms], len(order))
+    assigned, start = [], 0
+    for (code, cap), count in zip(rooms, counts):
+        assigned.append({"room": code, "capacity": cap, "students": order[start:start + count]})
+        start += count
+    return SeatingPlan(**_owner(exam), seed=seed, signature=signature, rooms=assigned)
+
+
+def save_seating_plan(exam, student_pks, reseed=False):
+    """Compute (with a fresh seed when `reseed`) and store the exam's SeatingPlan; returns it."""
+    plan = plan_seating(exam, student_pks, seed=secrets.randbelow(2 ** 31) if reseed else None)
+    plan, _ = SeatingPlan.objects.update_or_create(
+        **_owner(exam), defaults={"seed": plan.seed, "signature": plan.signature, "rooms": plan.rooms}
+    )
+    exam.seating_plan = plan
+    return plan
+
+
+def seating_sections(plan, students, proctors=None):
+    """
+    Per-room rosters for rendering: [(room, capacity, [(seat, student_id, surname, name)], [proctor names])],
+    rows in alphabetical order. `students` maps pk -> (student_id, surname, name);
+    `proctors` maps room -> proctor names (see room_proctors).
+    """
+    proctors = proctors or {}
+    sections = []
+    for room in plan.rooms:
+        rows = [(seat, *students[pk]) for seat, pk in enumerate(room["students"], 1) if pk in students]
+        rows.sort(key=lambda r: (name_sort_key(r[2]), name_sort_key(r[3]), r[1]))
+        # proctors confirmed before rooms were tracked cover the whole exam
+        sections.append((room["room"], room["capacity"], rows, proctors.get(room["room"], []) + proctors.get("", [])))
+    return sections
+
+
+def room_proctors(assignments):
+    """{owner key: {room: ["Name Surname", ...]}} from ProctoringAssignments, keyed "exam_<id>" / "dean_exam_<id>"."""
+    proctors = {}
+    rows = assignments.order_by("ta__surname", "ta__name").values_list(
+        "exam_id", "dean_exam_id", "room", "ta__name", "ta__surname"
+    )
+    for exam_id, dean_exam_id, room, name, surname in rows:
+        key = f"exam_{exam_id}" if exam_id else f"dean_exam_{dean_exam_id}"
+        proctors.setdefault(key, {}).setdefault(room, []).append(f"{name} {surname}")
+    return proctors
+
+
+def proctor_quotas(exam, num_proctors=None):
+    """
+    {room: proctors} for `exam`, proportional to the students its seating plan puts
+    in each room (to capacity while nobody is enrolled yet). Empty for room-less exams.
+    """
+    if not exam.classrooms:
+        return {}
+    codes = [exam.course.code] if isinstance(exam, Exam) else exam.course_codes
+    plan = plan_seating(exam, [student[0] for student in exam_roster(codes)])
+    weights = [len(room["students"]) for room in plan.rooms]
+    if not any(weights):
+        weights = [room["capacity"] for room in plan.rooms]
+    counts = allocate_seats(weights, exam.num_proctors if num_proctors is None else num_proctors)
+    return {room["room"]: count for room, count in zip(plan.rooms, counts)}
+
+
+def distribute_rooms(emails, quotas):
+    """Rooms for TAs picked by hand: fill `quotas` in order; {} without quotas."""
+    slots = [room for room, count in quotas.items() for _ in range(count)]
+    return {email: slots[i] if i < len(slots) else "" for i, email in enumerate(emails)} if slots else {}
@@ -18,4 +18,7 @@ urlpatterns = [
     path("create-dean-exam/", create_dean_exam, name="create_dean_exam"),
     path("list-dean-exams/", list_dean_exams, name="list_dean_exams"),
     path("delete-dean-exam/", delete_dean_exam, name="delete_dean_exam"),
+    path("exam-clashes/", exam_clashes, name="exam_clashes"),
+    path("generate-timetable/", generate_timetable, name="generate_timetable"),
+    path("publish-timetable/", publish_timetable, name="publish_timetable"),
 ]
@@ -5,13 +5,19 @@ from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views.decorators.http import require_POST, require_GET
 from django.db import transaction
+from django.db.models import Prefetch
+from django.core.exceptions import ValidationError
 
 from myapp.userauth.helpers import find_user_by_email
 from myapp.models import Course, Section
-from myapp.exams.models import Exam, DeanExam
-from myapp.exams.classrooms import ClassroomEnum
+from myapp.exams.models import Exam, DeanExam, Classroom
 from myapp.exams.courses_nondept import NonDeptCourseEnum
+from myapp.exams.clashes import clash_report
+from myapp.proctoring.timetabling import (
+    ExamTimetableSolver, parse_timetable_request, write_drafts, MAX_TIME_LIMIT,
+)
 from myapp.proctoring.models import ProctoringAssignment  
+from myapp.reports.cache import bump_report_version
 from myapp.swap.models import SwapRequest 
 
 REAL_COURSE_CODES = set(Course.objects.values_list("code", flat=True))
@@ -42,14 +48,13 @@ def create_exam(request):
             "status":"error",
             "message":"`classrooms` must be a non-empty list."
         }, status=400)
-    # validate enum
-    valid = {v for v, _ in ClassroomEnum.choices()}
-    for room in classrooms:
-        if room not in valid:
-            return JsonResponse({
-                "status":"error",
-                "message":f"Invalid classroom: {room}"
-            }, status=400)
+    # validate against the classrooms table
+    invalid = Classroom.invalid_codes(classrooms)
+    if invalid:
+        return JsonResponse({
+            "status":"error",
+            "message":f"Invalid classroom: {invalid[0]}"
+        }, status=400)
 
     course_id = data.get("course_id")
     date_str = data.get("date")
@@ -121,11 +126,18 @@ def list_staff_courses(request):
     if not user or user_type == "TA":
         return JsonResponse({"status": "error", "message": "You are not staff."}, status=403)
 
-    # Fetch all courses that have 'user' in their instructors many-to-many
-    courses = Course.objects.filter(instructors__email=user.email)
+    # Fetch all courses that have 'user' in their instructors many-to-many,
+    # with the user's own sections of each in one extra query
+    courses = Course.objects.filter(instructors__email=user.email).prefetch_related(
+        Prefetch(
+            "sections",
+            queryset=Section.objects.filter(instructor_id=user.email).only("course_id", "number").order_by("number"),
+            to_attr="own_sections",
+        )
+    )
     data = []
     for course in courses:
-        sections = list(Section.objects.filter(course=course, instructor=user).order_by("number").values_list("number", flat=True))
+        sections = [sec.number for sec in course.own_sections]
         data.append({"id": course.id, "code": course.code, "name": course.name, "sections": sections,})
 
     return JsonResponse({"status": "success", "courses": data})
@@ -146,6 +158,9 @@ def list_staff_exams(request):
 
     # Get all exams where the user is the instructor
     exams = Exam.objects.filter(instructor=user).select_related('course').order_by('-date', '-start_time')
+    # Drafts from the timetabling solver only with ?drafts=1, for review before publishing
+    if not request.GET.get("drafts"):
+        exams = exams.filter(is_draft=False)
     exams_data = []
     for exam in exams:
         # Get confirmed TA assignments from the ProctoringAssignment relation.
@@ -156,6 +171,7 @@ def list_staff_exams(request):
                 "email": t.email,
                 "first_name": t.name,
                 "last_name": t.surname,
+                "room": pa.room,
             })
         # assigned_tas = list(exam.proctoring_assignments.values_list('ta__email', flat=True))
         exams_data.append({
@@ -168,6 +184,7 @@ def list_staff_exams(request):
             "classrooms": exam.classrooms,
             "num_proctors": exam.num_proctors,
             "student_count": exam.student_count,
+            "is_draft": exam.is_draft,
             "assigned_tas": assigned_tas,
         })
 
@@ -218,6 +235,7 @@ def list_ta_exams(request):
             "start_time"  : src.start_time.strftime("%H:%M"),
             "end_time"    : src.end_time.strftime("%H:%M"),
             "classrooms"  : src.classrooms,
+            "room"        : pa.room,
             "num_proctors": src.num_proctors,
             "student_count": src.student_count,
             "has_pending_swap": pending,
@@ -281,7 +299,7 @@ def delete_exam(request):
 # CHECK CLASSROOM AVAILABILITY
 # -----------------------------
 def is_classroom_available(room, date_obj, start_time, end_time, exclude_exam_id=None):
-    qs = Exam.objects.filter(date=date_obj, classrooms__contains=[room])
+    qs = Exam.objects.filter(date=date_obj, classrooms__contains=[room], is_draft=False)
     if exclude_exam_id:
         qs = qs.exclude(id=exclude_exam_id)
 
@@ -292,8 +310,8 @@ def is_classroom_available(room, date_obj, start_time, end_time, exclude_exam_id
 
 @require_GET
 def list_classrooms(request):
-    classrooms = [value for value, _ in ClassroomEnum.choices()]
-    return JsonResponse({"status": "success", "classrooms": classrooms})
+    rooms = list(Classroom.objects.values("code", "building", "capacity"))
+    return JsonResponse({"status": "success", "classrooms": [r["code"] for r in rooms], "details": rooms})
 
 
 # -----------------------------
@@ -357,11 +375,10 @@ def create_dean_exam(request):
         if c not in allowed:
             return JsonResponse({"status":"error","message":f"Invalid course code {c}"}, status=400)
 
-    # classroom enum check unchanged
-    valid_rooms = {v for v,_ in ClassroomEnum.choices()}
-    for room in rooms:
-        if room not in valid_rooms:
-            return JsonResponse({"status":"error","message":f"Invalid classroom {room}"}, status=400)
+    # classroom check against the classrooms table
+    invalid = Classroom.invalid_codes(rooms)
+    if invalid:
+        return JsonResponse({"status":"error","message":f"Invalid classroom {invalid[0]}"}, status=400)
 
     # parse date/time
     try:
@@ -401,7 +418,10 @@ def list_dean_exams(request):
     if not user or not getattr(user, "isAuth", False):
         return JsonResponse({"status":"error","message":"Not authorized"}, status=403)
 
+    # Drafts from the timetabling solver only with ?drafts=1, for review before publishing
     qs = DeanExam.objects.order_by("-date", "-start_time")
+    if not request.GET.get("drafts"):
+        qs = qs.filter(is_draft=False)
     exams = []
     for ex in qs:
         assigned_tas = []
@@ -411,6 +431,7 @@ def list_dean_exams(request):
                 "email": t.email,
                 "first_name": t.name,
                 "last_name": t.surname,
+                "room": pa.room,
             })
         exam_data = {       
             "id" : ex.id,
@@ -421,6 +442,7 @@ def list_dean_exams(request):
             "classrooms": ex.classrooms,
             "num_proctors": ex.num_proctors,
             "student_count": ex.student_count,
+            "is_draft": ex.is_draft,
             "assigned_tas": assigned_tas,
             "paid_proctoring": False,
         }
@@ -512,13 +534,12 @@ def update_exam(request):
             "message": "`classrooms` must be a non-empty list."
         }, status=400)
     
-    valid = {v for v, _ in ClassroomEnum.choices()}
-    for room in classrooms:
-        if room not in valid:
-            return JsonResponse({
-                "status": "error",
-                "message": f"Invalid classroom: {room}"
-            }, status=400)
+    invalid = Classroom.invalid_codes(classrooms)
+    if invalid:
+        return JsonResponse({
+            "status": "error",
+            "message": f"Invalid classroom: {invalid[0]}"
+        }, status=400)
     
     try:
         course = Course.objects.get(id=course_id)
@@ -597,11 +618,10 @@ def update_dean_exam(request):
         if c not in allowed:
             return JsonResponse({"status":"error","message":f"Invalid course code {c}"}, status=400)
 
-    # classroom enum check unchanged
-    valid_rooms = {v for v,_ in ClassroomEnum.choices()}
-    for room in rooms:
-        if room not in valid_rooms:
-            return JsonResponse({"status":"error","message":f"Invalid classroom {room}"}, status=400)
+    # classroom check against the classrooms table
+    invalid = Classroom.invalid_codes(rooms)
+    if invalid:
+        return JsonResponse({"status":"error","message":f"Invalid classroom {invalid[0]}"}, status=400)
 
     # parse date/time
     try:
@@ -634,3 +654,106 @@ def update_dean_exam(request):
         "message": "Dean exam updated successfully!",
         "exam_id": dean_exam.id
     })
+
+
+# -----------------------------
+# EXAM CLASH ANALYSIS:
+# -----------------------------
+@require_GET
+def exam_clashes(request):
+    """
+    Overlapping Exams/DeanExams that share students, for the period given by
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD (either may be omitted); ?min_students=N hides
+    smaller clashes.
+    """
+    email = request.session.get("user_email")
+    if not email:
+        return JsonResponse({"status":"error","message":"Not authenticated"}, status=401)
+    user, user_type = find_user_by_email(email)
+    if not user or not getattr(user, "isAuth", False):
+        return JsonResponse({"status":"error","message":"Not authorized"}, status=403)
+
+    try:
+        date_from = datetime.strptime(request.GET["from"], "%Y-%m-%d").date() if request.GET.get("from") else None
+        date_to = datetime.strptime(request.GET["to"], "%Y-%m-%d").date() if request.GET.get("to") else None
+        min_students = max(1, int(request.GET.get("min_students", 1)))
+    except ValueError:
+        return JsonResponse({"status":"error","message":"Invalid date or min_students"}, status=400)
+
+    return JsonResponse({"status":"success", **clash_report(date_from, date_to, min_students)})
+
+
+# -----------------------------
+# EXAM TIMETABLING:
+# -----------------------------
+@require_POST
+def generate_timetable(request):
+    """
+    Solve a timetable for the exams in the body (format in proctoring/timetabling.py)
+    and store it as draft Exams/DeanExams; ?dry_run=1 only returns the proposal.
+    The period may span MAX_PERIOD_DAYS and time_limit at most MAX_TIME_LIMIT seconds.
+    """
+    email = request.session.get("user_email")
+    if not email:
+        return JsonResponse({"status":"error","message":"Not authenticated"}, status=401)
+    user, user_type = find_user_by_email(email)
+    if not user or not getattr(user, "isAuth", False):
+        return JsonResponse({"status":"error","message":"Not authorized"}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        dates, slots, rooms, specs = parse_timetable_request(data)
+        time_limit = int(data.get("time_limit", 30))
+        if not 1 <= time_limit <= MAX_TIME_LIMIT:
+            raise ValidationError(f"time_limit must be between 1 and {MAX_TIME_LIMIT} seconds.")
+    except ValidationError as e:
+        return JsonResponse({"status":"error","message": e.messages[0]}, status=400)
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({"status":"error","message":"Invalid request body"}, status=400)
+
+    solver = ExamTimetableSolver(dates, slots, rooms, specs, time_limit=time_limit)
+    timetable, unplaced = solver.solve()
+    written = {} if request.GET.get("dry_run") else write_drafts(timetable, creator=user)
+
+    return JsonResponse({
+        "status": "success",
+        "optimal": solver.optimal,
+        "timetable": [{
+            "course_codes": entry["codes"],
+            "date": entry["date"].strftime("%Y-%m-%d"),
+            "start_time": entry["start_time"].strftime("%H:%M"),
+            "end_time": entry["end_time"].strftime("%H:%M"),
+            "classrooms": entry["rooms"],
+            "student_count": entry["student_count"],
+            "clash_students": entry["clash_students"],
+            "draft": written.get(entry["index"]),
+        } for entry in timetable],
+        "unplaced": [{"course_codes": specs[i]["codes"], "reason": reason} for i, reason in sorted(unplaced.items())],
+    })
+
+
+@require_POST
+@transaction.atomic
+def publish_timetable(request):
+    """Publish draft exams: body {"exam_ids": [...], "dean_exam_ids": [...]}."""
+    email = request.session.get("user_email")
+    if not email:
+        return JsonResponse({"status":"error","message":"Not authenticated"}, status=401)
+    user, user_type = find_user_by_email(email)
+    if not user or not getattr(user, "isAuth", False):
+        return JsonResponse({"status":"error","message":"Not authorized"}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        exam_ids = [int(i) for i in data.get("exam_ids", [])]
+        dean_exam_ids = [int(i) for i in data.get("dean_exam_ids", [])]
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({"status":"error","message":"Invalid request body"}, status=400)
+    exams = Exam.objects.filter(is_draft=True, id__in=exam_ids)
+    dean_exams = DeanExam.objects.filter(is_draft=True, id__in=dean_exam_ids)
+    published = exams.update(is_draft=False) + dean_exams.update(is_draft=False)
+    if published:
+        # update() skips post_save, so invalidate the cached reports here
+        bump_report_version("exams")
+
+    return JsonResponse({"status":"success","published": published})
@@ -0,0 +1,42 @@
+"""
+    Solves the TA allocation of a department and stores it as a draft scenario:
+        python manage.py allocate_tas --department CS [--name "Fall draft"] [--creator secretary@bilkent.edu.tr] [--time-limit 60] [--allow-multiple-roles] [--dry-run]
+    Live TAAllocation rows are not changed; see myapp/taassignment/solver.py.
+"""
+from django.core.management.base import BaseCommand
+
+from myapp.taassignment.solver import TAAllocationSolver, save_scenario
+
+
+class Command(BaseCommand):
+    help = "Allocate TAs and graders to a department's courses (CP-SAT) as a draft AllocationScenario."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--department", default="", help="Course code prefix, e.g. CS (all courses if omitted).")
+        parser.add_argument("--name", default="", help="Scenario name.")
+        parser.add_argument("--creator", default="", help="Email recorded as the scenario's creator.")
+        parser.add_argument("--time-limit", type=int, default=30, help="Solver time limit in seconds.")
+        parser.add_argument("--allow-multiple-roles", action="store_true",
+                            help="Let a TA hold roles in several courses (default: one role per TA).")
+        parser.add_argument("--dry-run", action="store_true", help="Print the allocation without storing it.")
+
+    def handle(self, *args, **options):
+        department = options["department"].strip().upper()
+        solver = TAAllocationSolver(department, time_limit=options["time_limit"],
+                                    one_role_per_ta=not options["allow_multiple_roles"])
+        results = solver.solve()
+
+        for r in results:
+            self.stdout.write(
+                f"{r['course'].code:<10} {r['staff'].email:<35} load {r['total_load']:>2}  "
+                f"TAs: {', '.join(r['assigned_tas']) or '-'}  graders: {', '.join(r['assigned_graders']) or '-'}"
+            )
+            for issue in r["issues"]:
+                self.stderr.write(self.style.WARNING(f"    {r['course'].code}: {issue}"))
+
+        met = sum(1 for r in results if not r["issues"])
+        summary = f"{met} of {len(results)} courses fully staffed ({'optimal' if solver.optimal else 'not proven optimal'})"
+        if not options["dry_run"]:
+            scenario = save_scenario(results, options["creator"], department=department, name=options["name"])
+            summary += f"; saved as scenario {scenario.id}"
+        self.stdout.write(self.style.SUCCESS(summary) if met == len(results) else self.style.WARNING(summary))
@@ -3,42 +3,55 @@
     - This file generates random PASSWORDS for a new user in Database.
     - Sends that password to the user's mail address.
     - User can log in the system via their email and this password.
+
+    Hashing runs in a process pool (one worker per CPU core by default), the hashes
+    are written back with bulk_update, and the emails go out in batches over one
+    SMTP connection:
+        python manage.py assign_passwords [--workers N] [--batch-size N]
 """""
 
-import random, string
+import os
 from django.core.management.base import BaseCommand
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
 
 from myapp.models import TAUser, StaffUser # Users
+from myapp.userauth.passwords import provision_passwords
 
 class Command(BaseCommand):
     help = "Generate random passwords for Users missing one, hash them, and send them via email."
 
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Number of hashing processes (default: CPU count).")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Rows per bulk_update / emails per SMTP batch.")
+
     def handle(self, *args, **options):
-        ta_users = TAUser.objects.filter(Q(password__isnull=True) | Q(password=''))
-        staff_users = StaffUser.objects.filter(Q(password__isnull=True) | Q(password=''))
-        all_users = list(ta_users) + list(staff_users)
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+
+        ta_users = list(TAUser.objects.filter(Q(password__isnull=True) | Q(password='')))
+        staff_users = list(StaffUser.objects.filter(Q(password__isnull=True) | Q(password='')))
+        all_users = ta_users + staff_users
 
         if not all_users:
-            self.stdout.write("Users with NULL/empty passwords found.")
+            self.stdout.write("No users with NULL/empty passwords found.")
             return
 
-        for user in all_users:
-            random_passw = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
-            user.set_password(random_passw) # Hash the password
-            user.save()
-
-            # Send email the password
-            subject = "Your TA Management System Password"
-            message = (
-                f"Hello {user.name},\n\n"
-                f"Your login email is: {user.email}\n"
-                f"Your password is: {random_passw}\n\n"
-            )
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email], fail_silently=False)
-
-            self.stdout.write(f"Assigned password to {user.email}")
-        
+        with transaction.atomic():
+            stats = provision_passwords(all_users, workers=workers, batch_size=batch_size)
+
+        n = stats["users"]
+        self.stdout.write(
+            f"Hashed {n} passwords in {stats['hash_secs']:.2f}s "
+            f"({n / max(stats['hash_secs'], 1e-9):.1f}/s, {workers} worker(s))"
+        )
+        self.stdout.write(f"Saved {n} passwords in {stats['save_secs']:.2f}s")
+        self.stdout.write(f"Sent {stats['sent']} emails in {stats['mail_secs']:.2f}s")
+        if stats["failed"]:
+            self.stdout.write(self.style.WARNING(
+                f"{stats['failed']} emails could not be sent; their passwords were cleared, "
+                f"run the command again to retry them."
+            ))
         self.stdout.write("Done assigning random passwords to all users with no password.")
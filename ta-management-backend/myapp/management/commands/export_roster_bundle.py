@@ -0,0 +1,65 @@
+"""
+    Writes the alphabetical and randomized student rosters of many exams into one ZIP,
+    e.g. every exam of the finals period:
+        python manage.py export_roster_bundle --from 2025-05-26 --to 2025-06-08 [--workers N] [--output rosters.zip]
+    or selected ones:
+        python manage.py export_roster_bundle --exam-ids 3,7 --dean-exam-ids 2
+"""
+import os
+import time
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.reports.bundle import select_exams, roster_jobs, iter_roster_zip
+
+
+def _id_list(raw):
+    try:
+        return [int(x) for x in raw.split(",") if x.strip()]
+    except ValueError:
+        raise CommandError(f"Invalid id list: {raw}")
+
+
+def _date(raw):
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise CommandError(f"Invalid date (expected YYYY-MM-DD): {raw}")
+
+
+class Command(BaseCommand):
+    help = "Render the alpha + random rosters of a set of exams in parallel into a ZIP file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", type=_date, help="First exam date (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="date_to", type=_date, help="Last exam date (YYYY-MM-DD).")
+        parser.add_argument("--exam-ids", type=_id_list, default=[], help="Comma-separated Exam ids.")
+        parser.add_argument("--dean-exam-ids", type=_id_list, default=[], help="Comma-separated DeanExam ids.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="Number of rendering processes, 1 for the in-process render pool (default: CPU count).")
+        parser.add_argument("--output", default="exam_rosters.zip", help="Path of the ZIP to write.")
+
+    def handle(self, *args, **options):
+        if not (options["date_from"] or options["date_to"] or options["exam_ids"] or options["dean_exam_ids"]):
+            raise CommandError("Select exams with --from/--to and/or --exam-ids/--dean-exam-ids.")
+
+        started = time.perf_counter()
+        specs = select_exams(options["date_from"], options["date_to"],
+                             options["exam_ids"], options["dean_exam_ids"])
+        if not specs:
+            raise CommandError("No exams match the selection.")
+        try:
+            jobs = roster_jobs(specs)
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+        self.stdout.write(f"Loaded {len(specs)} exam(s) in {time.perf_counter() - started:.2f}s")
+
+        with open(options["output"], "wb") as out:
+            for chunk in iter_roster_zip(jobs, processes=max(1, options["workers"])):
+                out.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(jobs)} rosters to {options['output']} in {time.perf_counter() - started:.2f}s"
+        ))
@@ -1,44 +1,42 @@
-import os
 import pandas as pd
-from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import BaseCommand
 from django.db import transaction
-from myapp.taassignment.models import TAAssignment
+from django.utils import timezone
+from myapp.taassignment.models import TAAssignment, TAAllocation, invalidate_evaluations
 from myapp.models import StaffUser, Course, TAUser
+from myapp.management.bulkimport import ImportEngine, NameIndex, default_source, read_records, add_import_arguments
+
+# CSV column -> TAAssignment M2M field
+TA_LIST_FIELDS = {
+    "must_have_ta": "must_have_ta",
+    "preferred_tas": "preferred_tas",
+    "preferred_graders": "preferred_graders",
+    "avoided_tas": "avoided_tas",
+}
 
 class Command(BaseCommand):
-    help = "Import TA assignment configurations from a CSV file using pandas."
+    help = "Import TA assignment configurations from a CSV or XLSX file using pandas."
+
+    def add_arguments(self, parser):
+        add_import_arguments(parser)
 
     @transaction.atomic
     def handle(self, *args, **options):
+        engine = ImportEngine.from_options(self, options)
         # Set the CSV file path (relative to manage.py)
-        csv_file_path = 'excels/ta_preferrences.csv'
-        self.stdout.write(self.style.WARNING(f"Reading CSV file from: {csv_file_path} using pandas"))
-
-        if not os.path.exists(csv_file_path):
-            raise CommandError(f"File not found: {csv_file_path}")
-
-        try:
-            # Use an encoding that properly interprets Turkish characters
-            df = pd.read_csv(csv_file_path, delimiter=';', encoding='utf-8-sig')
-            expected_columns = [
-                'instructor_name', 'course_code', 'course_name', 'min_load', 'max_load',
-                'num_graders', 'must_have_ta', 'preferred_tas', 'preferred_graders', 'avoided_tas'
-            ]
-            for col in expected_columns:
-                if col not in df.columns:
-                    raise CommandError(f"Missing required column: {col}")
-        except Exception as e:
-            raise CommandError(f"Error reading CSV file: {e}")
-
-        # Helper to look up a TAUser record by full name.
-        def get_ta_by_fullname(fullname):
-            if not fullname:
-                return None
-            try:
-                first, surname = fullname.strip().split(" ", 1)
-                return TAUser.objects.get(name=first, surname=surname)
-            except Exception:
-                return None
+        csv_file_path = options["file"] or default_source('excels/ta_preferrences')
+        self.stdout.write(self.style.WARNING(f"Reading file from: {csv_file_path} using pandas"))
+
+        expected_columns = [
+            'instructor_name', 'course_code', 'course_name', 'min_load', 'max_load',
+            'num_graders', 'must_have_ta', 'preferred_tas', 'preferred_graders', 'avoided_tas'
+        ]
+        # Prefetch every lookup table once: full name -> email, code -> course
+        with engine.phase("prefetch lookups") as stats:
+            staff_index = NameIndex(StaffUser, "Staff user")
+            ta_index = NameIndex(TAUser, "TA")
+            course_by_code = {c.code: c for c in Course.objects.only("id", "code")}
+            stats["rows"] = len(staff_index) + len(ta_index) + len(course_by_code)
 
         # Helper: Convert comma-separated string into a list of trimmed items.
         def get_ta_list(field_value):
@@ -46,111 +44,110 @@ class Command(BaseCommand):
                 return []
             return [item.strip() for item in str(field_value).split(",") if item.strip()]
 
-        for index, row in df.iterrows():
-            # Process instructor name (e.g., "Eray Tüzün")
-            instructor_name = str(row.get("instructor_name", "")).strip()
-            if not instructor_name:
-                self.stdout.write(self.style.ERROR(f"Row {index}: instructor_name is empty."))
-                continue
-            try:
-                first_name, surname = instructor_name.split(" ", 1)
-            except ValueError:
-                self.stdout.write(self.style.ERROR(
-                    f"Row {index}: Cannot split instructor_name '{instructor_name}' into first and last name."
-                ))
-                continue
-
-            try:
-                staff = StaffUser.objects.get(name=first_name, surname=surname)
-            except StaffUser.DoesNotExist:
-                self.stdout.write(self.style.ERROR(f"Row {index}: Staff user '{instructor_name}' not found."))
-                continue
-
-            # Get Course using course_code
-            course_code = str(row.get("course_code", "")).strip()
-            if not course_code:
-                self.stdout.write(self.style.ERROR(f"Row {index}: course_code is empty."))
-                continue
-            try:
-                course = Course.objects.get(code=course_code)
-            except Course.DoesNotExist:
-                self.stdout.write(self.style.ERROR(f"Row {index}: Course with code '{course_code}' not found."))
-                continue
-
-            # Parse numeric values
-            try:
-                min_load = int(row.get("min_load", 0))
-                max_load = int(row.get("max_load", 0))
-                num_graders = int(row.get("num_graders", 1))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Row {index}: Error converting numeric values: {e}"))
-                continue
-
-            # Create or update the TAAssignment record
-            assignment, created = TAAssignment.objects.get_or_create(
-                staff=staff,
-                course=course,
-                defaults={
-                    'min_load': min_load,
-                    'max_load': max_load,
-                    'num_graders': num_graders,
-                }
+        # 1) Parse + resolve every row in memory
+        rows = {}      # (staff_email, course_id) -> numeric fields
+        ta_lists = {}  # (staff_email, course_id) -> {m2m field: [ta emails]}
+        with engine.phase("parse rows") as stats:
+            for index, row in enumerate(read_records(csv_file_path, expected_columns)):
+                # Process instructor name (e.g., "Eray Tüzün")
+                instructor_name = str(row.get("instructor_name", "")).strip()
+                if not instructor_name:
+                    self.stdout.write(self.style.ERROR(f"Row {index}: instructor_name is empty."))
+                    continue
+                staff_email = staff_index.resolve(instructor_name, f"row {index}")
+                if staff_email is None:
+                    continue  # reported with the other unresolved names at the end
+
+                # Get Course using course_code
+                course_code = str(row.get("course_code", "")).strip()
+                if not course_code:
+                    self.stdout.write(self.style.ERROR(f"Row {index}: course_code is empty."))
+                    continue
+                course = course_by_code.get(course_code)
+                if course is None:
+                    self.stdout.write(self.style.ERROR(f"Row {index}: Course with code '{course_code}' not found."))
+                    continue
+
+                # Parse numeric values
+                try:
+                    min_load = int(row.get("min_load", 0))
+                    max_load = int(row.get("max_load", 0))
+                    num_graders = int(row.get("num_graders", 1))
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"Row {index}: Error converting numeric values: {e}"))
+                    continue
+
+                key = (staff_email, course.id)
+                rows[key] = {'min_load': min_load, 'max_load': max_load, 'num_graders': num_graders}
+
+                # Process each TA list using the name index
+                ta_lists[key] = {}
+                for column, field in TA_LIST_FIELDS.items():
+                    emails = []
+                    for ta_fullname in get_ta_list(row.get(column, "")):
+                        ta_email = ta_index.resolve(ta_fullname, f"row {index} {column}")
+                        if ta_email:
+                            emails.append(ta_email)
+                    ta_lists[key][field] = emails
+            stats["rows"] = len(rows)
+
+        # 2) Create or update (only changed) TAAssignment records in bulk
+        with engine.phase("bulk write assignments") as stats:
+            existing = {
+                (a.staff_id, a.course_id): a
+                for a in TAAssignment.objects.filter(
+                    staff_id__in={s for s, _ in rows}, course_id__in={c for _, c in rows}
+                )
+            }
+            to_create, to_update = engine.upsert(
+                TAAssignment, ("staff_id", "course_id"), rows,
+                update_fields=['min_load', 'max_load', 'num_graders'],
+                existing=existing, touch="updated_at",
             )
-            if not created:
-                assignment.min_load = min_load
-                assignment.max_load = max_load
-                assignment.num_graders = num_graders
-                assignment.save()
-
-            # Get lists from CSV fields
-            must_have_list = get_ta_list(row.get("must_have_ta", ""))
-            preferred_list = get_ta_list(row.get("preferred_tas", ""))
-            preferred_graders_list = get_ta_list(row.get("preferred_graders", ""))
-            avoided_list = get_ta_list(row.get("avoided_tas", ""))
-
-            # Clear existing many-to-many relationships
-            assignment.must_have_ta.clear()
-            assignment.preferred_tas.clear()
-            assignment.preferred_graders.clear()
-            assignment.avoided_tas.clear()
-
-            # Process each TA list using name-based lookup
-            for ta_fullname in must_have_list:
-                ta = get_ta_by_fullname(ta_fullname)
-                if ta:
-                    assignment.must_have_ta.add(ta)
-                else:
-                    self.stdout.write(self.style.WARNING(
-                        f"Row {index}: TA '{ta_fullname}' for must_have_ta not found."
-                    ))
-
-            for ta_fullname in preferred_list:
-                ta = get_ta_by_fullname(ta_fullname)
-                if ta:
-                    assignment.preferred_tas.add(ta)
-                else:
-                    self.stdout.write(self.style.WARNING(
-                        f"Row {index}: TA '{ta_fullname}' for preferred_tas not found."
-                    ))
-
-            for ta_fullname in preferred_graders_list:
-                ta = get_ta_by_fullname(ta_fullname)
-                if ta:
-                    assignment.preferred_graders.add(ta)
-                else:
-                    self.stdout.write(self.style.WARNING(
-                        f"Row {index}: TA '{ta_fullname}' for preferred_graders not found."
-                    ))
-
-            for ta_fullname in avoided_list:
-                ta = get_ta_by_fullname(ta_fullname)
-                if ta:
-                    assignment.avoided_tas.add(ta)
-                else:
-                    self.stdout.write(self.style.WARNING(
-                        f"Row {index}: TA '{ta_fullname}' for avoided_tas not found."
-                    ))
-
-            self.stdout.write(self.style.SUCCESS(f"Row {index} processed successfully."))
+            stats["rows"] = len(to_create) + len(to_update)
+
+            # Re-read ids (MySQL doesn't return them from bulk_create)
+            assignment_ids = {
+                (a.staff_id, a.course_id): a.id
+                for a in TAAssignment.objects.filter(
+                    staff_id__in={s for s, _ in rows}, course_id__in={c for _, c in rows}
+                ).only("id", "staff_id", "course_id")
+            }
+
+        # 3) Sync the four TA lists: only links that changed are inserted/deleted
+        with engine.phase("bulk write TA lists") as stats:
+            changed, changed_ids = 0, set()
+            for field in TA_LIST_FIELDS.values():
+                added, removed = engine.sync_m2m(
+                    getattr(TAAssignment, field),
+                    {assignment_ids[key]: lists[field] for key, lists in ta_lists.items()},
+                    changed=changed_ids,
+                )
+                changed += added + removed
+            stats["rows"] = changed
+            # link changes don't bump updated_at, which the listings' ETags rely on
+            if changed_ids:
+                TAAssignment.objects.filter(id__in=changed_ids).update(updated_at=timezone.now())
+
+            # bulk writes skip the signals that drop the cached evaluation of the matching allocations
+            touched = {(a.staff_id, a.course_id) for a in (*to_create, *to_update)}
+            touched |= {key for key, pk in assignment_ids.items() if pk in changed_ids}
+            if touched:
+                invalidate_evaluations(TAAllocation.objects.filter(
+                    staff_id__in={s for s, _ in touched}, course_id__in={c for _, c in touched},
+                ))
 
+        # 4) --prune: assignments whose (instructor, course) row is gone from the file
+        with engine.phase("delete missing assignments") as stats:
+            removed = engine.delete_missing(TAAssignment.objects.all(), ("staff_id", "course_id"), rows.keys())
+            stats["rows"] = len(removed)
+
+        unresolved = staff_index.report(self) + ta_index.report(self)
+        if unresolved:
+            self.stdout.write(self.style.WARNING(f"{unresolved} name(s) could not be resolved."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(to_create)} assignments, updated {len(to_update)} assignments, "
+            f"deleted {len(removed)} assignments."
+        ))
+        engine.finish()
         self.stdout.write(self.style.SUCCESS("CSV import completed successfully."))
@@ -1,32 +1,24 @@
 # myapp/management/commands/import_instructor.py
-import os
 import pandas as pd
-from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import BaseCommand
 from django.db import transaction
 from myapp.models import StaffUser, Course, Section
+from myapp.management.bulkimport import ImportEngine, default_source, read_records, add_import_arguments
 
 class Command(BaseCommand):
-    help = "Import staff users and their courses and sections from a CSV file."
+    help = "Import staff users and their courses and sections from a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        add_import_arguments(parser)
 
     @transaction.atomic
     def handle(self, *args, **options):
-        csv_file_path = 'excels/instructor_users.csv'
-        self.stdout.write(self.style.WARNING(f"Reading CSV file from: {csv_file_path}"))
-
-        if not os.path.exists(csv_file_path):
-            raise CommandError(f"File not found: {csv_file_path}")
-
-        try:
-            # UTF-8 with BOM stripping to properly handle Turkish characters
-            df = pd.read_csv(csv_file_path, delimiter=';', encoding='utf-8-sig')
-        except Exception as e:
-            raise CommandError(f"Error reading CSV: {e}")
+        engine = ImportEngine.from_options(self, options)
+        verbose = options["verbosity"] > 1
+        csv_file_path = options["file"] or default_source('excels/instructor_users')
+        self.stdout.write(self.style.WARNING(f"Reading file from: {csv_file_path}"))
 
         expected_columns = ['name', 'surname', 'email', 'department', 'courses', 'sections']
-        for col in expected_columns:
-            if col not in df.columns:
-                raise CommandError(f"Missing required column: {col}")
-
         # Helper: parse the sections string "CS101:1,CS101:2,CS102:1" into a map
         def parse_section_map(sections_str):
             section_map = {}
@@ -47,42 +39,37 @@ class Command(BaseCommand):
                 section_map.setdefault(code, []).append(sec_num)
             return section_map
 
-        for index, row in df.iterrows():
-            # Read and trim basic fields
-            name = str(row['name']).strip()
-            surname = str(row['surname']).strip()
-            email = str(row['email']).strip()
-            department = str(row['department']).strip()
-            courses_str = str(row['courses']).strip()
-            sections_str = str(row['sections']).strip()
-
-            # Validate required fields
-            if not email:
-                self.stdout.write(self.style.ERROR(f"Row {index}: email is empty. Skipping."))
-                continue
-            if not name or not surname:
-                self.stdout.write(self.style.ERROR(f"Row {index}: name/surname missing. Skipping '{email}'."))
-                continue
-
-            # Parse section map up front
-            section_map = parse_section_map(sections_str)
-
-            # Create or update the StaffUser
-            staff, created = StaffUser.objects.get_or_create(
-                email=email,
-                defaults={'name': name, 'surname': surname, 'department': department}
-            )
-            if created:
-                self.stdout.write(self.style.SUCCESS(f"Row {index}: Created staff '{name} {surname}'"))
-            else:
-                # staff.name = name
-                # staff.surname = surname
-                # staff.department = department
-                # staff.save()
-                self.stdout.write(self.style.WARNING(f"Row {index}: Staff '{email}' already exists"))
-
-            # Process each course in the comma-separated list
-            if courses_str and courses_str.lower() != 'nan':
+        # 1) Parse every row into plain maps
+        staff_rows = {}        # email -> StaffUser fields (first row wins, existing staff are kept)
+        course_names = {}      # code -> name (first occurrence wins, existing courses are kept)
+        teaches = set()        # (course_code, staff_email)
+        sections = {}          # (course_code, number) -> staff_email (last row wins)
+        with engine.phase("parse rows") as stats:
+            for index, row in enumerate(read_records(csv_file_path, expected_columns)):
+                # Read and trim basic fields
+                name = str(row['name']).strip()
+                surname = str(row['surname']).strip()
+                email = str(row['email']).strip()
+                department = str(row['department']).strip()
+                courses_str = str(row['courses']).strip()
+                sections_str = str(row['sections']).strip()
+
+                # Validate required fields
+                if not email:
+                    self.stdout.write(self.style.ERROR(f"Row {index}: email is empty. Skipping."))
+                    continue
+                if not name or not surname:
+                    self.stdout.write(self.style.ERROR(f"Row {index}: name/surname missing. Skipping '{email}'."))
+                    continue
+
+                # Parse section map up front
+                section_map = parse_section_map(sections_str)
+                staff_rows.setdefault(email, {'name': name, 'surname': surname, 'department': department})
+
+                # Process each course in the comma-separated list
+                if not courses_str or courses_str.lower() == 'nan':
+                    self.stdout.write(self.style.WARNING(f"Row {index}: No courses listed for '{email}'"))
+                    continue
                 for course_item in courses_str.split(','):
                     course_item = course_item.strip()
                     if not course_item:
@@ -91,32 +78,89 @@ class Command(BaseCommand):
                     course_code = parts[0]
                     course_name = parts[1] if len(parts) > 1 else parts[0]
 
-                    # Get or create Course
-                    course, _ = Course.objects.get_or_create(
-                        code=course_code,
-                        defaults={'name': course_name}
-                    )
-                    staff.courses_taught.add(course)
-                    self.stdout.write(self.style.SUCCESS(
-                        f"Row {index}: Assigned course '{course_code}' to '{email}'"
-                    ))
-
-                    # Create/update Sections for this course
+                    course_names.setdefault(course_code, course_name)
+                    teaches.add((course_code, email))
                     for sec_num in section_map.get(course_code, []):
-                        sec_obj, sec_created = Section.objects.update_or_create(
-                            course=course,
-                            number=sec_num,
-                            defaults={'instructor': staff}
-                        )
-                        if sec_created:
-                            self.stdout.write(self.style.SUCCESS(
-                                f"Row {index}: Created Section {course_code}:{sec_num}"
-                            ))
-                        else:
-                            self.stdout.write(self.style.WARNING(
-                                f"Row {index}: Updated Section {course_code}:{sec_num}"
-                            ))
+                        sections[(course_code, sec_num)] = email
+            stats["rows"] = len(staff_rows)
+
+        # 2) Staff: create the missing ones only (existing staff are left untouched)
+        with engine.phase("bulk write staff") as stats:
+            created_staff, _ = engine.upsert(StaffUser, "email", staff_rows, update_fields=[])
+            stats["rows"] = len(created_staff)
+        engine.register_new_users(created_staff)
+        existing_staff = sorted(staff_rows.keys() - {s.email for s in created_staff})
+
+        # 3) Courses: create the missing ones, then map code -> id
+        with engine.phase("bulk write courses") as stats:
+            course_map = engine.existing_map(Course, "code", course_names.keys())
+            new_courses = [Course(code=c, name=n) for c, n in course_names.items() if c not in course_map]
+            Course.objects.bulk_create(new_courses, batch_size=engine.batch_size)
+            if new_courses:
+                # MySQL doesn't return ids from bulk_create, so re-read them
+                course_map = engine.existing_map(Course, "code", course_names.keys())
+            engine.count("Course", "insert", len(new_courses))
+            engine.count("Course", "unchanged", len(course_names) - len(new_courses))
+            stats["rows"] = len(new_courses)
+
+        # 4) Course <-> instructor links: add the missing through rows; with --prune the
+        #    instructor lists of the listed courses are synced to the file exactly
+        with engine.phase("bulk write instructors") as stats:
+            if engine.prune:
+                instructors = {}
+                for code, email in teaches:
+                    instructors.setdefault(course_map[code].id, set()).add(email)
+                added, _ = engine.sync_m2m(Course.instructors, instructors)
             else:
-                self.stdout.write(self.style.WARNING(f"Row {index}: No courses listed for '{email}'"))
+                added = engine.add_m2m(
+                    Course.instructors,
+                    ((course_map[code].id, email) for code, email in teaches),
+                )
+            stats["rows"] = added
+
+        # 5) Sections: create new ones, reassign the instructor of changed ones
+        with engine.phase("bulk write sections") as stats:
+            section_rows = {
+                (course_map[code].id, number): {"instructor_id": email}
+                for (code, number), email in sections.items()
+            }
+            listed_courses = {course_id for course_id, _ in section_rows}
+            existing_sections = {
+                (s.course_id, s.number): s
+                for s in Section.objects.filter(course_id__in=listed_courses)
+            }
+            new_sections, changed_sections = engine.upsert(
+                Section, ("course_id", "number"), section_rows,
+                update_fields=["instructor_id"], existing=existing_sections,
+            )
+            stats["rows"] = len(new_sections) + len(changed_sections)
+
+        # 6) --prune: staff missing from the file, and sections of listed courses that are gone
+        with engine.phase("delete missing") as stats:
+            removed_staff = engine.delete_missing(StaffUser.objects.all(), "email", staff_rows.keys())
+            removed_sections = engine.delete_missing(
+                Section.objects.filter(course_id__in=listed_courses), ("course_id", "number"), section_rows.keys()
+            )
+            stats["rows"] = len(removed_staff) + len(removed_sections)
+
+        if verbose:
+            for staff in created_staff:
+                self.stdout.write(self.style.SUCCESS(f"Created staff '{staff.name} {staff.surname}'"))
+            for email in existing_staff:
+                self.stdout.write(self.style.WARNING(f"Staff '{email}' already exists"))
+            for sec in new_sections:
+                self.stdout.write(self.style.SUCCESS(f"Created Section {sec.course_id}:{sec.number}"))
+            for sec in changed_sections:
+                self.stdout.write(self.style.WARNING(f"Updated Section {sec.course_id}:{sec.number}"))
+            for email in removed_staff:
+                self.stdout.write(self.style.WARNING(f"Deleted staff '{email}'"))
 
+        self.stdout.write(self.style.SUCCESS(
+            f"Staff: {len(created_staff)} created, {len(existing_staff)} already existed, "
+            f"{len(removed_staff)} deleted | "
+            f"Courses: {len(new_courses)} created | "
+            f"Sections: {len(new_sections)} created, {len(changed_sections)} updated, "
+            f"{len(removed_sections)} deleted"
+        ))
+        engine.finish()
         self.stdout.write(self.style.SUCCESS("Staff, courses, and sections import completed successfully."))
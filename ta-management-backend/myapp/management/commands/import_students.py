@@ -1,75 +1,116 @@
 # myapp/management/commands/import_students.py
-import os, pandas as pd
-from django.core.management.base import BaseCommand, CommandError
+import time
+from django.core.management.base import BaseCommand
 from django.db import transaction
-from myapp.models import StudentList, Course
+from myapp.models import StudentList, Course, NonDeptCourse
 from myapp.exams.courses_nondept import NonDeptCourseEnum
+from myapp.exams.rosters import refresh_course_rosters
+from myapp.management.bulkimport import ImportEngine, default_source, read_table_chunks, add_import_arguments, DEFAULT_CHUNK_SIZE
 
 class Command(BaseCommand):
-    help = "Import students from excels/students.csv (semicolon-delimited)"
-    
+    help = "Import students from excels/students.csv (semicolon-delimited) or an .xlsx workbook"
+
+    def add_arguments(self, parser):
+        add_import_arguments(parser)
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                            help="Rows read from the file and written per chunk (bounds memory use).")
+
     @transaction.atomic
     def handle(self, *args, **options):
-        path = 'excels/students.csv'
-        self.stdout.write(self.style.WARNING(f"Reading CSV file from: {path}"))
-        if not os.path.exists(path):
-            raise CommandError(f"File not found: {path}")
-
-        try:
-            df = pd.read_csv(path, delimiter=';', encoding='utf-8-sig')
-        except Exception as e:
-            raise CommandError(f"Error reading CSV file: {e}")
-
-        # column check
-        expected = {'name','surname','id','email','courses'}
-        if not expected.issubset({c.lower() for c in df.columns}):
-            missing = expected - {c.lower() for c in df.columns}
-            raise CommandError(f"Missing columns: {', '.join(missing)}")
-
-        # prepare enum lookup
+        engine = ImportEngine.from_options(self, options)
+        verbose = options["verbosity"] > 1
+        path = options["file"] or default_source('excels/students')
+        self.stdout.write(self.style.WARNING(f"Reading file from: {path}"))
+        started = time.perf_counter()
+
+        # prepare lookups: one query for every course code (case-insensitive) + enum values
+        with engine.phase("prefetch courses") as stats:
+            course_ids = {code.upper(): pk for pk, code in Course.objects.values_list("id", "code")}
+            stats["rows"] = len(course_ids)
         valid_nondept = {v for v,_ in NonDeptCourseEnum.choices()}
+        NonDeptCourse.objects.bulk_create([NonDeptCourse(code=c) for c in valid_nondept], ignore_conflicts=True)
 
-        for idx, row in df.iterrows():
-            name    = str(row['name']).strip()
-            surname = str(row['surname']).strip()
-            sid     = str(row['id']).strip()
-            email   = str(row['email']).strip().lower()
-            raw     = str(row.get('courses',''))
-            codes   = [c.strip().upper() for c in raw.split(',') if c.strip()]
-
-            if not (name and surname and sid and email):
-                self.stderr.write(self.style.ERROR(f"Row {idx}: incomplete student info; skipping."))
-                continue
-
-            stu, created = StudentList.objects.update_or_create(
-                email=email,
-                defaults={'student_id':sid,'name':name,'surname':surname}
-            )
+        # column check happens on the first chunk
+        expected = ['name','surname','id','email','courses']
+        chunks = read_table_chunks(path, expected, options["chunk_size"], lowercase_columns=True)
 
-            # clear old assignments
-            stu.courses.clear()
-            stu.nondept_courses = []
+        total_rows = n_created = n_updated = 0
+        seen = set()  # every email in the file, for --prune after the last chunk
+        for df in engine.timed(chunks, "read file"):
+            created, updated = self._import_chunk(engine, df, total_rows, course_ids, valid_nondept, verbose, seen)
+            total_rows += len(df)
+            n_created += created
+            n_updated += updated
 
-            # assign new
-            for c in codes:
-                # try real Course
-                try:
-                    course = Course.objects.get(code__iexact=c)
-                    stu.courses.add(course)
+        with engine.phase("delete missing students") as stats:
+            removed = engine.delete_missing(StudentList.objects.all(), "email", seen)
+            stats["rows"] = len(removed)
+
+        # exam rosters are merged from these, so rebuild them from the new enrolments
+        with engine.phase("refresh course rosters") as stats:
+            stats["rows"] = refresh_course_rosters(engine)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {n_created} students, updated {n_updated} students, deleted {len(removed)} students."
+        ))
+        engine.finish()
+        self.stdout.write(f"Processed {total_rows} rows in {elapsed:.2f}s ({total_rows / max(elapsed, 1e-9):.0f} rows/s)")
+        self.stdout.write(self.style.SUCCESS("Student import complete."))
+
+    def _import_chunk(self, engine, df, offset, course_ids, valid_nondept, verbose, seen):
+        # 1) Parse rows, resolving course codes in memory
+        rows = {}          # email -> StudentList fields
+        enrolments = {}    # email -> [course ids]
+        nondept_enrolments = {}  # email -> [non-departmental course codes]
+        with engine.phase("parse rows") as stats:
+            for idx, row in enumerate(df.to_dict('records'), start=offset):
+                name    = str(row['name']).strip()
+                surname = str(row['surname']).strip()
+                sid     = str(row['id']).strip()
+                email   = str(row['email']).strip().lower()
+                raw     = str(row.get('courses',''))
+                codes   = [c.strip().upper() for c in raw.split(',') if c.strip()]
+
+                if not (name and surname and sid and email):
+                    self.stderr.write(self.style.ERROR(f"Row {idx}: incomplete student info; skipping."))
                     continue
-                except Course.DoesNotExist:
-                    pass
-                # try non‐dept
-                if c in valid_nondept:
-                    stu.nondept_courses.append(c)
-                else:
-                    self.stderr.write(self.style.WARNING(f"Row {idx}: unknown course '{c}'; skipping."))
 
-            stu.save()
+                dept, nondept = [], []
+                for c in codes:
+                    # try real Course, then non-dept
+                    if c in course_ids:
+                        dept.append(course_ids[c])
+                    elif c in valid_nondept:
+                        nondept.append(c)
+                    else:
+                        self.stderr.write(self.style.WARNING(f"Row {idx}: unknown course '{c}'; skipping."))
 
-            verb = "Created" if created else "Updated"
-            self.stdout.write(self.style.SUCCESS(
-                f"{verb} {surname}, {name} ({email}) → dept={stu.courses.count()} | nondept={stu.nondept_courses}"
-            ))
+                rows[email] = {'student_id': sid, 'name': name, 'surname': surname}
+                enrolments[email] = dept
+                nondept_enrolments[email] = nondept
+            seen.update(rows)
+            stats["rows"] = len(rows)
 
-        self.stdout.write(self.style.SUCCESS("Student import complete."))
+        # 2) Create new students, update only those whose fields changed
+        with engine.phase("bulk write students") as stats:
+            created, updated = engine.upsert(
+                StudentList, "email", rows,
+                update_fields=['student_id', 'name', 'surname'],
+            )
+            stats["rows"] = len(created) + len(updated)
+
+        # 3) Sync enrolments: only dropped/added (student, course) links are written
+        with engine.phase("bulk write enrolments") as stats:
+            added, removed = engine.sync_m2m(StudentList.courses, enrolments)
+            nd_added, nd_removed = engine.sync_m2m(StudentList.nondept_courses, nondept_enrolments)
+            stats["rows"] = added + removed + nd_added + nd_removed
+
+        if verbose:
+            for verb, students in (("Created", created), ("Updated", updated)):
+                for stu in students:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{verb} {stu.surname}, {stu.name} ({stu.email}) → "
+                        f"dept={len(enrolments[stu.email])} | nondept={nondept_enrolments[stu.email]}"
+                    ))
+        return len(created), len(updated)
@@ -1,26 +1,22 @@
 # myapp/management/commands/import_ta.py
-import os
-import pandas as pd
-from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import Q
 from myapp.models import TAUser
+from myapp.taassignment.models import TAAllocation, invalidate_evaluations
+from myapp.management.bulkimport import ImportEngine, default_source, read_records, add_import_arguments
 
 class Command(BaseCommand):
-    help = "Import TA users from a CSV file."
+    help = "Import TA users from a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        add_import_arguments(parser)
 
     @transaction.atomic
     def handle(self, *args, **options):
-        csv_file_path = 'excels/ta_users.csv'
-        self.stdout.write(self.style.WARNING(f"Reading CSV file from: {csv_file_path}"))
-
-        if not os.path.exists(csv_file_path):
-            raise CommandError(f"File not found: {csv_file_path}")
-
-        try:
-            # UTF-8-SIG for Turkish characters
-            df = pd.read_csv(csv_file_path, delimiter=';', encoding='utf-8-sig')
-        except Exception as e:
-            raise CommandError(f"Error reading CSV: {e}")
+        engine = ImportEngine.from_options(self, options)
+        csv_file_path = options["file"] or default_source('excels/ta_users')
+        self.stdout.write(self.style.WARNING(f"Reading file from: {csv_file_path}"))
 
         expected_columns = [
             'name',
@@ -31,32 +27,28 @@ class Command(BaseCommand):
             'advisor',    # e.g. 'Eray Tüzün'
             'ta_type'     # 'FT' or 'PT'
         ]
-        for col in expected_columns:
-            if col not in df.columns:
-                raise CommandError(f"Missing required column: {col}")
+        # 1) Parse + validate every row in memory (last row wins for duplicate emails)
+        rows = {}
+        with engine.phase("parse rows") as stats:
+            for index, row in enumerate(read_records(csv_file_path, expected_columns)):
+                name = str(row['name']).strip()
+                surname = str(row['surname']).strip()
+                email = str(row['email']).strip().lower()
+                student_id = str(row['student_id']).strip()
+                program = str(row['program']).strip() or None
+                advisor = str(row['advisor']).strip() or None
+                raw_type = str(row['ta_type']).strip().upper() # IE department's all TAs are 'FT'
+                ta_type = raw_type if raw_type in ('FT', 'PT') else 'FT'
 
-        for index, row in df.iterrows():
-            name = str(row['name']).strip()
-            surname = str(row['surname']).strip()
-            email = str(row['email']).strip().lower()
-            student_id = str(row['student_id']).strip()
-            program = str(row['program']).strip() or None
-            advisor = str(row['advisor']).strip() or None
-            raw_type = str(row['ta_type']).strip().upper() # IE department's all TAs are 'FT'
-            ta_type = raw_type if raw_type in ('FT', 'PT') else 'FT'
+                # Basic validation
+                if not email:
+                    self.stdout.write(self.style.ERROR(f"Row {index}: email is empty; skipping."))
+                    continue
+                if not name or not surname:
+                    self.stdout.write(self.style.ERROR(f"Row {index}: name/surname missing for '{email}'; skipping."))
+                    continue
 
-            # Basic validation
-            if not email:
-                self.stdout.write(self.style.ERROR(f"Row {index}: email is empty; skipping."))
-                continue
-            if not name or not surname:
-                self.stdout.write(self.style.ERROR(f"Row {index}: name/surname missing for '{email}'; skipping."))
-                continue
-
-            # Create or update TAUser (advisor is a raw string)
-            ta, created = TAUser.objects.update_or_create(
-                email=email,
-                defaults={
+                rows[email] = {
                     'name':       name,
                     'surname':    surname,
                     'student_id': student_id,
@@ -64,11 +56,44 @@ class Command(BaseCommand):
                     'advisor':    advisor,
                     'ta_type':    ta_type,
                 }
+            stats["rows"] = len(rows)
+
+        # 2) Prefetch existing TAs, then create/update in bulk (advisor is a raw string)
+        with engine.phase("prefetch existing") as stats:
+            existing = engine.existing_map(TAUser, "email", rows.keys())
+            stats["rows"] = len(existing)
+
+        with engine.phase("bulk write TAs") as stats:
+            created, updated = engine.upsert(
+                TAUser, "email", rows,
+                update_fields=['name', 'surname', 'student_id', 'program', 'advisor', 'ta_type'],
+                existing=existing,
             )
+            stats["rows"] = len(created) + len(updated)
+            # bulk_update skips the signal that drops the cached evaluation of their allocations (FT/PT load)
+            if updated:
+                invalidate_evaluations(TAAllocation.objects.filter(
+                    Q(assigned_tas__in=updated) | Q(assigned_graders__in=updated)
+                ))
+
+        engine.register_new_users(created)
+
+        # 3) --prune: TAs no longer in the file are removed
+        with engine.phase("delete missing TAs") as stats:
+            removed = engine.delete_missing(TAUser.objects.all(), "email", rows.keys())
+            stats["rows"] = len(removed)
+
+        if options["verbosity"] > 1:
+            for ta in created:
+                self.stdout.write(self.style.SUCCESS(f"Created TA '{ta.email}' (Advisor: '{ta.advisor}')"))
+            for ta in updated:
+                self.stdout.write(self.style.WARNING(f"Updated TA '{ta.email}' (Advisor: '{ta.advisor}')"))
 
-            if created:
-                self.stdout.write(self.style.SUCCESS(f"Row {index}: Created TA '{email}' (Advisor: '{advisor}')"))
-            else:
-                self.stdout.write(self.style.WARNING(f"Row {index}: Updated TA '{email}' (Advisor: '{advisor}')"))
+            for email in removed:
+                self.stdout.write(self.style.WARNING(f"Deleted TA '{email}'"))
 
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(created)} TAs, updated {len(updated)} TAs, deleted {len(removed)} TAs."
+        ))
+        engine.finish()
         self.stdout.write(self.style.SUCCESS("All TA users imported/updated successfully."))
@@ -0,0 +1,54 @@
+"""
+    Solves an exam timetable and stores it as draft Exams/DeanExams:
+        python manage.py timetable_exams --spec finals.json --creator dean@bilkent.edu.tr [--time-limit 60] [--dry-run]
+    The spec format is described in myapp/proctoring/timetabling.py.
+"""
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.models import AuthorizedUser
+from myapp.proctoring.timetabling import ExamTimetableSolver, parse_timetable_request, write_drafts
+
+
+class Command(BaseCommand):
+    help = "Assign dates, slots and rooms to a set of exams (CP-SAT) and write them as drafts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--spec", required=True, help="JSON file with dates, slots, rooms and exams.")
+        parser.add_argument("--creator", help="Email of the authorized user owning the created DeanExams.")
+        parser.add_argument("--time-limit", type=int, default=30, help="Solver time limit in seconds.")
+        parser.add_argument("--dry-run", action="store_true", help="Print the timetable without writing drafts.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["spec"], encoding="utf-8") as fh:
+                dates, slots, rooms, specs = parse_timetable_request(json.load(fh))
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {options['spec']}: {e}")
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        creator = None
+        if options["creator"]:
+            creator = AuthorizedUser.objects.filter(email=options["creator"]).first()
+            if creator is None:
+                raise CommandError(f"No authorized user {options['creator']}")
+
+        solver = ExamTimetableSolver(dates, slots, rooms, specs, time_limit=options["time_limit"])
+        timetable, unplaced = solver.solve()
+        written = {} if options["dry_run"] else write_drafts(timetable, creator)
+
+        for entry in timetable:
+            draft = written.get(entry["index"], "")
+            self.stdout.write(
+                f"{entry['date']} {entry['start_time']:%H:%M}-{entry['end_time']:%H:%M}  "
+                f"{', '.join(entry['codes']):<20} {entry['student_count']:>5} students  "
+                f"rooms: {', '.join(entry['rooms'])}  clashes: {entry['clash_students']}  {draft}"
+            )
+        for i, reason in sorted(unplaced.items()):
+            self.stderr.write(self.style.ERROR(f"Not placed: {', '.join(specs[i]['codes'])}: {reason}"))
+
+        summary = f"Placed {len(timetable)} of {len(specs)} exams ({'optimal' if solver.optimal else 'feasible'})"
+        self.stdout.write(self.style.SUCCESS(summary) if timetable else self.style.WARNING(summary))
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2025-05-11 14:20
+
+from django.db import migrations, models
+
+
+def backfill_identities(apps, schema_editor):
+    UserIdentity = apps.get_model('myapp', 'UserIdentity')
+    identities = {}
+    # Same precedence as find_user_by_email: TA, then Staff, then Authorized.
+    for model_name, user_type in (('TAUser', 'TA'), ('StaffUser', 'Staff'), ('AuthorizedUser', 'Authorized')):
+        model = apps.get_model('myapp', model_name)
+        for email in model.objects.values_list('email', flat=True).iterator():
+            identities.setdefault(email, user_type)
+    UserIdentity.objects.bulk_create(
+        [UserIdentity(email=email, user_type=user_type) for email, user_type in identities.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0033_remove_section_instructors_section_instructor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserIdentity',
+            fields=[
+                ('email', models.EmailField(max_length=254, primary_key=True, serialize=False)),
+                ('user_type', models.CharField(choices=[('TA', 'TA'), ('Staff', 'Staff'), ('Authorized', 'Authorized')], max_length=20)),
+            ],
+            options={
+                'db_table': 'user_identities',
+            },
+        ),
+        migrations.RunPython(backfill_identities, migrations.RunPython.noop),
+    ]
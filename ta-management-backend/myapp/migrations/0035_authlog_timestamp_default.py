@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0034_useridentity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='authlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
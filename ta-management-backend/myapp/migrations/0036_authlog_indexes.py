@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0035_authlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='authlog',
+            index=models.Index(fields=['timestamp', 'id'], name='system_logs_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authlog',
+            index=models.Index(fields=['user_email', 'timestamp'], name='system_logs_email_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='authlog',
+            index=models.Index(fields=['ip_address', 'timestamp'], name='system_logs_ip_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The rooms of the former ClassroomEnum. Their real exam capacities aren't known here,
+# so they start with a placeholder that 0047 unsets again (seating refuses such rooms).
+SEED_ROOMS = ["B-Z01", "B-107", "EE-03", "EE-04", "EE-214", "EE-412", "G-Z06", "G-154", "H-335", "T-173"]
+PLACEHOLDER_CAPACITY = 40
+
+
+def seed_classrooms(apps, schema_editor):
+    Classroom = apps.get_model("myapp", "Classroom")
+    Classroom.objects.bulk_create(
+        [Classroom(code=code, building=code.split("-")[0], capacity=PLACEHOLDER_CAPACITY) for code in SEED_ROOMS],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0036_authlog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Classroom',
+            fields=[
+                ('code', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('building', models.CharField(blank=True, max_length=50)),
+                ('capacity', models.PositiveIntegerField(help_text='Exam seats (not lecture seats)')),
+            ],
+            options={
+                'db_table': 'classrooms',
+                'ordering': ['code'],
+            },
+        ),
+        migrations.RunPython(seed_classrooms, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='deanexam',
+            name='classrooms',
+            field=models.JSONField(default=list, help_text='List of Classroom codes'),
+        ),
+        migrations.AlterField(
+            model_name='exam',
+            name='classrooms',
+            field=models.JSONField(default=list, help_text='List of Classroom codes'),
+        ),
+        migrations.CreateModel(
+            name='SeatingPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seed', models.PositiveIntegerField()),
+                ('signature', models.CharField(max_length=40)),
+                ('rooms', models.JSONField(default=list, help_text='[{"room": code, "capacity": n, "students": [student pks in seat order]}]')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dean_exam', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='seating_plan', to='myapp.deanexam')),
+                ('exam', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='seating_plan', to='myapp.exam')),
+            ],
+            options={
+                'db_table': 'seating_plans',
+            },
+        ),
+    ]
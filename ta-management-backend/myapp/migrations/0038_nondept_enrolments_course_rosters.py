@@ -0,0 +1,79 @@
+# Generated by Django 5.1.7 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+def json_to_enrolments(apps, schema_editor):
+    StudentList = apps.get_model("myapp", "StudentList")
+    NonDeptCourse = apps.get_model("myapp", "NonDeptCourse")
+    Through = StudentList.nondept_courses.through
+
+    links = [
+        (email, code)
+        for email, codes in StudentList.objects.values_list("email", "nondept_courses_json").iterator()
+        for code in dict.fromkeys(codes or ())
+    ]
+    NonDeptCourse.objects.bulk_create(
+        [NonDeptCourse(code=code) for code in {code for _, code in links}], ignore_conflicts=True
+    )
+    Through.objects.bulk_create(
+        [Through(studentlist_id=email, nondeptcourse_id=code) for email, code in links], batch_size=1000
+    )
+
+
+def enrolments_to_json(apps, schema_editor):
+    StudentList = apps.get_model("myapp", "StudentList")
+    Through = StudentList.nondept_courses.through
+
+    codes = {}
+    for email, code in Through.objects.values_list("studentlist_id", "nondeptcourse_id").iterator():
+        codes.setdefault(email, []).append(code)
+    students = list(StudentList.objects.filter(email__in=list(codes)))
+    for student in students:
+        student.nondept_courses_json = codes[student.email]
+    StudentList.objects.bulk_update(students, ["nondept_courses_json"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0037_classroom_seatingplan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NonDeptCourse',
+            fields=[
+                ('code', models.CharField(max_length=20, primary_key=True, serialize=False)),
+            ],
+            options={
+                'db_table': 'nondept_courses',
+            },
+        ),
+        migrations.RenameField(
+            model_name='studentlist',
+            old_name='nondept_courses',
+            new_name='nondept_courses_json',
+        ),
+        migrations.AddField(
+            model_name='studentlist',
+            name='nondept_courses',
+            field=models.ManyToManyField(blank=True, related_name='students', to='myapp.nondeptcourse'),
+        ),
+        migrations.RunPython(json_to_enrolments, enrolments_to_json),
+        migrations.RemoveField(
+            model_name='studentlist',
+            name='nondept_courses_json',
+        ),
+        migrations.CreateModel(
+            name='CourseRoster',
+            fields=[
+                ('code', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('students', models.JSONField(default=list, help_text='[[student pk, student_id, surname, name], ...] in roster order')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'course_rosters',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0038_nondept_enrolments_course_rosters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deanexam',
+            name='is_draft',
+            field=models.BooleanField(default=False, help_text='Proposed by the timetabling solver, not published yet'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='is_draft',
+            field=models.BooleanField(default=False, help_text='Proposed by the timetabling solver, not published yet'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0039_exam_is_draft'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proctoringassignment',
+            name='room',
+            field=models.CharField(blank=True, default='', help_text='Classroom code the TA proctors in', max_length=20),
+        ),
+    ]
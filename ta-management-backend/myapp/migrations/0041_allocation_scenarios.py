@@ -0,0 +1,41 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0040_proctoringassignment_room'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllocationScenario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('department', models.CharField(blank=True, help_text='Course code prefix, blank for all', max_length=100)),
+                ('created_by', models.EmailField(max_length=254)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DraftAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assigned_tas', models.JSONField(default=list, help_text='TA emails')),
+                ('assigned_graders', models.JSONField(default=list, help_text='Grader emails')),
+                ('total_load', models.PositiveIntegerField(default=0)),
+                ('issues', models.JSONField(default=list, help_text="Why the course's requirements could not be met")),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draft_allocations', to='myapp.course')),
+                ('scenario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='myapp.allocationscenario')),
+                ('staff', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draft_allocations', to='myapp.staffuser')),
+            ],
+            options={
+                'unique_together': {('scenario', 'staff', 'course')},
+            },
+        ),
+    ]
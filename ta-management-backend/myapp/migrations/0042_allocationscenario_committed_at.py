@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0041_allocation_scenarios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='allocationscenario',
+            name='committed_at',
+            field=models.DateTimeField(blank=True, help_text='When the drafts were applied to TAAllocation', null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-19 10:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0042_allocationscenario_committed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taallocation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 06:57
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0043_taallocation_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(django.db.models.functions.text.Lower('code'), name='course_code_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffuser',
+            index=models.Index(fields=['name', 'surname', 'email'], name='staff_users_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffuser',
+            index=models.Index(fields=['department'], name='staff_users_department_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tauser',
+            index=models.Index(fields=['name', 'surname', 'email'], name='ta_users_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tauser',
+            index=models.Index(fields=['advisor'], name='ta_users_advisor_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0044_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draftallocation',
+            name='base_graders',
+            field=models.JSONField(blank=True, help_text='Live grader emails when the draft was created', null=True),
+        ),
+        migrations.AddField(
+            model_name='draftallocation',
+            name='base_tas',
+            field=models.JSONField(blank=True, help_text='Live TA emails when the draft was created', null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def drop_rosters(apps, schema_editor):
+    # Stored rosters were sorted on raw code points; they are rebuilt in collation order on first use
+    apps.get_model("myapp", "CourseRoster").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0045_draftallocation_base'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_rosters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-19 07:18
+
+from django.db import migrations, models
+
+# 0037 seeded the former ClassroomEnum rooms with a made-up capacity of 40; unset it so
+# seating refuses those rooms until their real capacity is entered
+SEED_ROOMS = ["B-Z01", "B-107", "EE-03", "EE-04", "EE-214", "EE-412", "G-Z06", "G-154", "H-335", "T-173"]
+PLACEHOLDER_CAPACITY = 40
+
+
+def unset_placeholder_capacities(apps, schema_editor):
+    Classroom = apps.get_model("myapp", "Classroom")
+    Classroom.objects.filter(code__in=SEED_ROOMS, capacity=PLACEHOLDER_CAPACITY).update(capacity=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0046_resort_course_rosters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='classroom',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, help_text="Exam seats (not lecture seats); rooms without one can't be seated", null=True),
+        ),
+        migrations.RunPython(unset_placeholder_capacities, migrations.RunPython.noop),
+    ]
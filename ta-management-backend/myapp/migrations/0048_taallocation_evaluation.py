@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0047_classroom_capacity_unset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taallocation',
+            name='issues',
+            field=models.JSONField(blank=True, help_text="Why the course's requirements are not met", null=True),
+        ),
+        migrations.AddField(
+            model_name='taallocation',
+            name='total_load',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
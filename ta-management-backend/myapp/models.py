@@ -1,5 +1,6 @@
 # myapp/models.py
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.hashers import make_password, check_password
 
 # TA Users
@@ -31,6 +32,10 @@ class TAUser(models.Model):
     
     class Meta:
         db_table = 'ta_users' # use the existing ta_users table in MySQL
+        indexes = [
+            models.Index(fields=["name", "surname", "email"], name="ta_users_name_idx"),  # list/ sort + keyset
+            models.Index(fields=["advisor"], name="ta_users_advisor_idx"),               # ?department=
+        ]
 
     def __str__(self):
         return f'{self.name} {self.surname} ({self.email})'
@@ -57,6 +62,10 @@ class StaffUser(models.Model):
 
     class Meta:
         db_table = 'staff_users'
+        indexes = [
+            models.Index(fields=["name", "surname", "email"], name="staff_users_name_idx"),
+            models.Index(fields=["department"], name="staff_users_department_idx"),
+        ]
     
     def __str__(self):
         return f'{self.name} ({self.email})'
@@ -80,6 +89,9 @@ class Course(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [models.Index(Lower("code"), name="course_code_lower_idx")]  # list/courses/ sort + keyset
+
     def __str__(self):
         return f"{self.code} - {self.name}"
 
@@ -131,6 +143,17 @@ class AuthorizedUser(models.Model):
         return check_password(raw_password, self.password)
     
 
+# Courses of other departments (NonDeptCourseEnum) that our students take exams for.
+class NonDeptCourse(models.Model):
+    code = models.CharField(max_length=20, primary_key=True)
+
+    class Meta:
+        db_table = 'nondept_courses'
+
+    def __str__(self):
+        return self.code
+
+
 # This class represents the necessary modal for printing student distribution for an exam.
 class StudentList(models.Model):
     student_id = models.CharField(max_length=20, unique=True)
@@ -142,10 +165,10 @@ class StudentList(models.Model):
         related_name="students",
         blank=True,
     )
-    nondept_courses = models.JSONField(
-        default=list,
+    nondept_courses = models.ManyToManyField(
+        NonDeptCourse,
+        related_name="students",
         blank=True,
-        help_text="List of non-departmental course codes from NonDeptCourseEnum"
     )
 
     class Meta:
@@ -173,8 +196,11 @@ class GlobalSettings(models.Model):
 
 # Import all models for migrations.
 from myapp.userauth.models import AuthLog
+from myapp.userauth.models import UserIdentity
 from myapp.taassignment.models import TAAssignment
 from myapp.taassignment.models import TAAllocation
+from myapp.taassignment.models import AllocationScenario
+from myapp.taassignment.models import DraftAllocation
 from myapp.taduties.models import TADuty
 from myapp.taleave.models import TALeaveRequests
 from myapp.schedule.models import TAWeeklySlot
@@ -182,4 +208,7 @@ from myapp.proctoring.models import ProctoringAssignment
 from myapp.notificationsystem.models import Notification
 from myapp.exams.models import Exam
 from myapp.exams.models import DeanExam
+from myapp.exams.models import Classroom
+from myapp.exams.models import SeatingPlan
+from myapp.exams.models import CourseRoster
 from myapp.swap.models import SwapRequest
\ No newline at end of file
@@ -104,3 +104,10 @@ def mark_all_as_read(request):
 
 def create_notification(recipient_email, message):
     return Notification.objects.create(recipient_email=recipient_email, message=message)
+
+
+def create_notifications(notifications):
+    """Bulk create_notification: one INSERT for an iterable of (recipient_email, message)."""
+    return Notification.objects.bulk_create([
+        Notification(recipient_email=email, message=message[:255]) for email, message in notifications
+    ])
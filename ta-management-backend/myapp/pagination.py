@@ -0,0 +1,65 @@
+# myapp/pagination.py
+"""
+Keyset ("cursor") pagination for the list/ endpoints.
+
+A page is the first `limit` rows after the cursor in a fixed sort order whose last key
+is unique, so pages never skip or repeat rows while the table changes and each page is
+an index range scan rather than an OFFSET. The cursor is the sort key of the last row
+of the previous page, as base64-encoded JSON.
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _after(keys, values):
+    """Rows sorting after `values`: (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..."""
+    q = Q()
+    for i, key in enumerate(keys):
+        q |= Q(**dict(zip(keys[:i], values[:i])), **{f"{key}__gt": values[i]})
+    return q
+
+
+def keyset_page(queryset, keys, request):
+    """
+    (rows, next_cursor) for ?limit=&cursor= over `queryset` sorted by `keys` (ascending,
+    last one unique). Without either parameter the whole queryset is returned with a
+    None cursor, as the endpoints did before paging. Raises ValueError for a bad limit
+    or cursor.
+    """
+    queryset = queryset.order_by(*keys)
+    raw_limit, cursor = request.GET.get("limit"), request.GET.get("cursor")
+    if raw_limit is None and not cursor:
+        return list(queryset), None
+
+    limit = int(raw_limit) if raw_limit else DEFAULT_LIMIT
+    if limit < 1:
+        raise ValueError("Invalid limit")
+    limit = min(limit, MAX_LIMIT)
+    if cursor:
+        queryset = queryset.filter(_after(keys, decode_cursor(cursor, len(keys))))
+
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], key) for key in keys])
@@ -4,7 +4,7 @@ from types import SimpleNamespace
 from myapp.models import TAUser, GlobalSettings
 
 class DeanProctoringSolver(BaseSolver):
-    def __init__(self, dean_exam):
+    def __init__(self, dean_exam, room_quotas=None):
         first_code = dean_exam.course_codes[0] if dean_exam.course_codes else ""
         fake_exam = SimpleNamespace(
           course = SimpleNamespace(code=first_code),
@@ -13,7 +13,7 @@ class DeanProctoringSolver(BaseSolver):
           end_time = dean_exam.end_time,
           num_proctors = dean_exam.num_proctors,
         )
-        super().__init__(fake_exam)
+        super().__init__(fake_exam, room_quotas=room_quotas)
 
         # Override: For dean exams (enum logic), consider *all* TAs under the same workload cap
         settings = GlobalSettings.objects.filter(pk=1).first()
@@ -8,6 +8,7 @@ class ProctoringAssignment(models.Model):
     exam = models.ForeignKey(Exam, null=True, blank=True, on_delete=models.CASCADE, related_name="proctoring_assignments")
     dean_exam = models.ForeignKey(DeanExam, null=True, blank=True, on_delete=models.CASCADE, related_name="proctoring_assignments")
     ta = models.ForeignKey(TAUser, on_delete=models.CASCADE, related_name='proctored_assignments')
+    room = models.CharField(max_length=20, blank=True, default="", help_text="Classroom code the TA proctors in")
 
     class Meta:
         db_table = "proctoring"
@@ -19,4 +20,5 @@ class ProctoringAssignment(models.Model):
 
     def __str__(self):
         target = self.exam or self.dean_exam
-        return f"{target} — {self.ta.email}"
+        room = f" ({self.room})" if self.room else ""
+        return f"{target} — {self.ta.email}{room}"
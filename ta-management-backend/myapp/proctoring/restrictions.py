@@ -2,12 +2,14 @@
 """
 GOOGLE OR-TOOLS: CONSTRAINT PROGRAMMING
 
-This solver picks TAs for an Exam while enforcing:
+This solver picks TAs for an Exam (and, for multi-room exams, the room each one
+covers) while enforcing:
  1. Department-based advisor matching,
  2. Leave / same-day / adjacent-day exclusions,
  3. Lecture conflicts and enrollment in the same course,
  4. MS/PhD rule for 500+ level courses,
- 5. PLUS a “bonus” for any TA already allocated to this course (via TAAllocation).
+ 5. PLUS a “bonus” for any TA already allocated to this course (via TAAllocation),
+ 6. Each room gets its share of proctors (room_quotas, proportional to seats used).
 
 Override order, if there aren't enough candidates:
  - Drop adjacent-day exclusion
@@ -29,8 +31,9 @@ from myapp.taassignment.models import TAAllocation
 from myapp.models import GlobalSettings
 
 class ProctoringAssignmentSolver:
-    def __init__(self, exam: Exam):
+    def __init__(self, exam: Exam, room_quotas=None):
         self.exam = exam
+        self.room_quotas = room_quotas or {}  # {room: proctors}, see exams/seating.proctor_quotas
 
         # 1) Derive department from course.code (alphabetic prefix)
         code = exam.course.code
@@ -66,6 +69,8 @@ class ProctoringAssignmentSolver:
         # Prepare the CP-SAT model and solver
         self.model = cp_model.CpModel()
         self.assignment_vars = {}
+        self.room_vars = {}  # (email, room) -> BoolVar
+        self.room_of = {}    # email -> room, after solve()
         self.solver = cp_model.CpSolver()
 
     def setup_constraints(self, override_consec=False, override_ms=False):
@@ -86,6 +91,15 @@ class ProctoringAssignmentSolver:
             == exam.num_proctors
         )
 
+        # 2b) Split them over the rooms: each chosen TA covers one room, each room gets its quota
+        if self.room_quotas:
+            for email, chosen in self.assignment_vars.items():
+                for room in self.room_quotas:
+                    self.room_vars[(email, room)] = self.model.NewBoolVar(f"{email}@{room}")
+                self.model.Add(sum(self.room_vars[(email, room)] for room in self.room_quotas) == chosen)
+            for room, quota in self.room_quotas.items():
+                self.model.Add(sum(self.room_vars[(email, room)] for email in self.assignment_vars) == quota)
+
         # 3) Exclude TAs on approved leave for that date
         leave_emails = TALeaveRequests.objects.filter(
             status='approved',
@@ -162,10 +176,15 @@ class ProctoringAssignmentSolver:
         # Reset model and variables
         self.model = cp_model.CpModel()
         self.assignment_vars.clear()
+        self.room_vars.clear()
+        self.room_of = {}
         self.setup_constraints(override_consec, override_ms)
 
         status = self.solver.Solve(self.model)
         if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.room_of = {
+                email: room for (email, room), var in self.room_vars.items() if self.solver.Value(var)
+            }
             return [
                 ta for ta in self.candidate_tas
                 if self.solver.Value(self.assignment_vars[ta.email])
@@ -0,0 +1,342 @@
+# myapp/proctoring/timetabling.py
+"""
+GOOGLE OR-TOOLS: CONSTRAINT PROGRAMMING
+
+This solver builds an exam timetable: for every requested exam it picks a date, a
+slot and a set of rooms while enforcing:
+ 1. Every exam is placed exactly once, in a slot long enough for its duration,
+ 2. The chosen rooms seat all its students (Classroom.capacity),
+ 3. A room holds at most one exam per slot, and rooms already booked by existing
+    Exams / DeanExams at that time are not used,
+and minimizing:
+ a. Students sitting two of the new exams in the same slot,
+ b. Students sitting a new exam and an existing exam at overlapping times,
+ c. (tie-breaker) The number of rooms used.
+
+Shared-student counts come from the same sparse enrolment matrix as the clash
+detector (exams/clashes.py). The result is written as draft Exam / DeanExam rows
+(is_draft=True) that the dean's office can review and publish.
+
+Request format (endpoint body / command file):
+    {
+      "dates": ["2025-06-02", ...],            # or "from" / "to": every weekday in between
+      "slots": [["09:00", "12:00"], ["13:30", "16:30"]],
+      "rooms": ["B-Z01", "EE-214"],            # optional, default every Classroom
+      "exams": [
+        {"course_code": "CS101", "duration": 120, "student_count": 350, "num_proctors": 4},
+        {"course_codes": ["MATH101", "PHYS101"], "duration": 90}
+      ]
+    }
+A single departmental course code becomes an Exam (its first instructor owns it);
+anything else becomes a DeanExam.
+"""
+
+from datetime import date, datetime, timedelta
+
+from ortools.sat.python import cp_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from myapp.models import Course
+from myapp.exams.models import Classroom, Exam, DeanExam
+from myapp.exams.clashes import period_exams, student_exam_matrix
+
+# Objective weights: any avoidable clash outweighs any number of extra rooms.
+CLASH_WEIGHT = 1000
+ROOM_WEIGHT = 1
+
+# Request limits: the model grows with every date, and a solve holds a web worker
+MAX_PERIOD_DAYS = 31    # from the first to the last date
+MAX_TIME_LIMIT = 60     # seconds, for the endpoint
+
+
+def _minutes(at):
+    return at.hour * 60 + at.minute
+
+
+def _parse_time(raw):
+    return datetime.strptime(raw, "%H:%M").time()
+
+
+def parse_timetable_request(data):
+    """Validate a request dict; returns (dates, slots, room codes, exam specs) or raises ValidationError."""
+    try:
+        if data.get("dates"):
+            dates = sorted({date.fromisoformat(d) for d in data["dates"]})
+            first, last = (dates[0], dates[-1]) if dates else (None, None)
+        else:
+            first, last = date.fromisoformat(data["from"]), date.fromisoformat(data["to"])
+            dates = None
+        slots = sorted((_parse_time(start), _parse_time(end)) for start, end in data["slots"])
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError("Give `dates` (or `from`/`to`) as YYYY-MM-DD and `slots` as [[HH:MM, HH:MM], ...].")
+    if first and (last - first).days + 1 > MAX_PERIOD_DAYS:
+        raise ValidationError(f"The exam period can span at most {MAX_PERIOD_DAYS} days.")
+    if dates is None:
+        dates = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+        dates = [d for d in dates if d.weekday() < 5]
+    if not dates or not slots:
+        raise ValidationError("At least one date and one slot are required.")
+    for (start, end), (next_start, _) in zip(slots, slots[1:] + [(None, None)]):
+        if start >= end or (next_start and next_start < end):
+            raise ValidationError("Slots must be non-empty and must not overlap.")
+
+    rooms = data.get("rooms") or list(Classroom.objects.values_list("code", flat=True))
+    invalid = Classroom.invalid_codes(rooms)
+    if invalid:
+        raise ValidationError(f"Invalid classroom: {invalid[0]}")
+
+    specs = []
+    for i, item in enumerate(data.get("exams") or []):
+        codes = item.get("course_codes") or ([item["course_code"]] if item.get("course_code") else [])
+        try:
+            duration = int(item["duration"])
+            student_count = item.get("student_count")
+            student_count = int(student_count) if student_count is not None else None
+            num_proctors = int(item.get("num_proctors", 1))
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(f"Exam #{i}: `duration` (minutes) is required; counts must be integers.")
+        if not codes or duration <= 0:
+            raise ValidationError(f"Exam #{i}: give `course_code` or `course_codes` and a positive `duration`.")
+        specs.append({"codes": list(codes), "duration": duration, "student_count": student_count,
+                      "num_proctors": num_proctors})
+    if not specs:
+        raise ValidationError("`exams` must be a non-empty list.")
+    return dates, slots, rooms, specs
+
+
+class ExamTimetableSolver:
+    def __init__(self, dates, slots, rooms, specs, time_limit=30):
+        self.dates = dates
+        self.slots = slots
+        self.specs = specs
+        self.time_limit = time_limit
+        # rooms without a known capacity can't be seated, so they aren't offered
+        self.capacity = dict(
+            Classroom.objects.filter(code__in=rooms, capacity__isnull=False).values_list("code", "capacity")
+        )
+        self.rooms = [room for room in rooms if room in self.capacity]
+
+        # 1) Placements: every (date, slot) pair
+        self.placements = [(d, s) for d in dates for s in range(len(slots))]
+
+        # 2) Existing bookings in the period, minus drafts this run will replace
+        replaced = {tuple(sorted(spec["codes"])) for spec in specs}
+        self.existing = [
+            ex for ex in period_exams(dates[0], dates[-1])
+            if not (ex["is_draft"] and tuple(sorted(ex["codes"])) in replaced)
+        ]
+        self._load_bookings()
+
+        # 3) Shared students between new exams, and between new and existing exams
+        self._load_overlaps()
+
+        self.model = cp_model.CpModel()
+        self.solver = cp_model.CpSolver()
+        self.place_vars = {}  # (exam index, placement index) -> BoolVar
+        self.room_vars = {}   # (exam index, room, placement index) -> BoolVar
+        self.optimal = False
+
+    def _slot_window(self, d, s, duration):
+        start = _minutes(self.slots[s][0])
+        return d, start, start + duration
+
+    def _load_bookings(self):
+        """
+        booked[(room, placement index)] for rooms used by an existing exam overlapping the
+        slot window, and free_rooms[placement index] for the rooms left.
+        """
+        self.booked = set()
+        for ex in self.existing:
+            start, end = _minutes(ex["start_time"]), _minutes(ex["end_time"])
+            for k, (d, s) in enumerate(self.placements):
+                slot_start, slot_end = _minutes(self.slots[s][0]), _minutes(self.slots[s][1])
+                if ex["date"] == d and start < slot_end and slot_start < end:
+                    for room in ex["rooms"]:
+                        self.booked.add((room, k))
+        self.free_rooms = [
+            [room for room in self.rooms if (room, k) not in self.booked] for k in range(len(self.placements))
+        ]
+
+    def _fits(self, spec, k):
+        """Whether placement k is long enough for the exam and has free rooms seating its students."""
+        start, end = self.slots[self.placements[k][1]]
+        if spec["duration"] > _minutes(end) - _minutes(start):
+            return False
+        free = self.free_rooms[k]
+        return bool(free) and sum(self.capacity[room] for room in free) >= spec["student_count"]
+
+    def _load_overlaps(self):
+        units = self.specs + self.existing
+        S = student_exam_matrix(units)
+        W = (S.T @ S).tocoo()
+        n = len(self.specs)
+
+        for i, spec in enumerate(self.specs):
+            if spec["student_count"] is None:
+                spec["student_count"] = int(S[:, i].sum())
+
+        self.shared = {}          # (i, j), i < j < n -> students sitting both new exams
+        self.existing_shared = {}  # (i, existing index) -> students
+        for i, j, w in zip(W.row, W.col, W.data):
+            if i < j < n:
+                self.shared[(int(i), int(j))] = int(w)
+            elif i < n <= j:
+                self.existing_shared[(int(i), int(j) - n)] = int(w)
+
+    def unplaceable(self):
+        """{exam index: reason} for exams no placement can hold, checked before solving."""
+        reasons = {}
+        longest = max(_minutes(end) - _minutes(start) for start, end in self.slots)
+        total_seats = sum(self.capacity[room] for room in self.rooms)
+        for i, spec in enumerate(self.specs):
+            if spec["duration"] > longest:
+                reasons[i] = f"Duration {spec['duration']} min is longer than every slot."
+            elif spec["student_count"] > total_seats:
+                reasons[i] = f"{spec['student_count']} students exceed the {total_seats} seats of all rooms."
+            elif not any(self._fits(spec, k) for k in range(len(self.placements))):
+                # no placement would leave the exam a usable room, so the model would be infeasible
+                reasons[i] = "No date and slot has enough free rooms left for it."
+        return reasons
+
+    def setup_constraints(self, skip=()):
+        exams = [i for i in range(len(self.specs)) if i not in skip]
+
+        for i in exams:
+            spec = self.specs[i]
+            options = []
+            for k in range(len(self.placements)):
+                if not self._fits(spec, k):
+                    continue
+                x = self.model.NewBoolVar(f"x_{i}_{k}")
+                self.place_vars[(i, k)] = x
+                options.append(x)
+
+                # 1) Rooms: only free ones, enough seats, nothing unless placed here
+                seats = []
+                for room in self.free_rooms[k]:
+                    z = self.model.NewBoolVar(f"z_{i}_{room}_{k}")
+                    self.room_vars[(i, room, k)] = z
+                    self.model.AddImplication(z, x)
+                    seats.append(self.capacity[room] * z)
+                self.model.Add(sum(seats) >= spec["student_count"] * x)
+                self.model.Add(sum(self.room_vars[(i, room, k)] for room in self.rooms
+                                   if (i, room, k) in self.room_vars) >= x)
+
+            # 2) Exactly one placement per exam
+            self.model.AddExactlyOne(options)
+
+        # 3) One exam per room and placement
+        for k in range(len(self.placements)):
+            for room in self.rooms:
+                in_room = [self.room_vars[(i, room, k)] for i in exams if (i, room, k) in self.room_vars]
+                if len(in_room) > 1:
+                    self.model.AddAtMostOne(in_room)
+
+        # 4) Objective
+        terms = []
+        for (i, j), shared in self.shared.items():
+            if i in skip or j in skip:
+                continue
+            clash = self.model.NewBoolVar(f"clash_{i}_{j}")
+            for k in range(len(self.placements)):
+                if (i, k) in self.place_vars and (j, k) in self.place_vars:
+                    self.model.AddBoolOr([self.place_vars[(i, k)].Not(), self.place_vars[(j, k)].Not(), clash])
+            terms.append(CLASH_WEIGHT * shared * clash)
+
+        for (i, e), shared in self.existing_shared.items():
+            if i in skip:
+                continue
+            ex = self.existing[e]
+            ex_start, ex_end = _minutes(ex["start_time"]), _minutes(ex["end_time"])
+            for k, (d, s) in enumerate(self.placements):
+                if (i, k) not in self.place_vars or d != ex["date"]:
+                    continue
+                _, start, end = self._slot_window(d, s, self.specs[i]["duration"])
+                if start < ex_end and ex_start < end:
+                    terms.append(CLASH_WEIGHT * shared * self.place_vars[(i, k)])
+
+        terms.extend(ROOM_WEIGHT * z for z in self.room_vars.values())
+        self.model.Minimize(sum(terms))
+
+    def solve(self):
+        """
+        (timetable, unplaced): one dict per placed exam (date, start/end, rooms, students,
+        clash counts) and {exam index: reason} for those that could not be placed.
+        """
+        unplaced = self.unplaceable()
+        self.setup_constraints(skip=unplaced)
+
+        self.solver.parameters.max_time_in_seconds = self.time_limit
+        status = self.solver.Solve(self.model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            reason = "No timetable fits the rooms and slots." if status == cp_model.INFEASIBLE \
+                else "No timetable found within the time limit."
+            unplaced.update({i: reason for i in range(len(self.specs)) if i not in unplaced})
+            return [], unplaced
+
+        timetable, slot_of = [], {}
+        for (i, k), x in self.place_vars.items():
+            if not self.solver.Value(x):
+                continue
+            d, s = self.placements[k]
+            slot_of[i] = k
+            start = self.slots[s][0]
+            end = (datetime.combine(d, start) + timedelta(minutes=self.specs[i]["duration"])).time()
+            rooms = [room for room in self.rooms if self.solver.Value(self.room_vars.get((i, room, k), 0))]
+            timetable.append({"index": i, **self.specs[i], "date": d, "start_time": start, "end_time": end,
+                              "rooms": rooms})
+
+        for entry in timetable:
+            i = entry["index"]
+            entry["clash_students"] = sum(
+                shared for (a, b), shared in self.shared.items()
+                if i in (a, b) and a in slot_of and b in slot_of and slot_of[a] == slot_of[b]
+            ) + sum(
+                shared for (a, e), shared in self.existing_shared.items()
+                if a == i and self.existing[e]["date"] == entry["date"]
+                and _minutes(self.existing[e]["start_time"]) < _minutes(entry["end_time"])
+                and _minutes(entry["start_time"]) < _minutes(self.existing[e]["end_time"])
+            )
+        timetable.sort(key=lambda entry: (entry["date"], entry["start_time"], entry["index"]))
+        self.optimal = status == cp_model.OPTIMAL
+        return timetable, unplaced
+
+
+@transaction.atomic
+def write_drafts(timetable, creator):
+    """
+    Replace earlier drafts for the same course codes with the timetable's exams as
+    draft rows. A single departmental course becomes an Exam owned by its first
+    instructor; anything else becomes a DeanExam created by `creator` (an AuthorizedUser).
+    Returns {timetable index: "exam"/"dean_exam" id or error message}.
+    """
+    courses = {c.code: c for c in Course.objects.prefetch_related("instructors")
+               .filter(code__in=[e["codes"][0] for e in timetable if len(e["codes"]) == 1])}
+    replaced = {tuple(sorted(entry["codes"])) for entry in timetable}
+    for de in DeanExam.objects.filter(is_draft=True):
+        if tuple(sorted(de.course_codes)) in replaced:
+            de.delete()
+    Exam.objects.filter(is_draft=True, course__code__in=[codes[0] for codes in replaced if len(codes) == 1]).delete()
+
+    written = {}
+    for entry in timetable:
+        fields = {
+            "date": entry["date"], "start_time": entry["start_time"], "end_time": entry["end_time"],
+            "classrooms": entry["rooms"], "student_count": entry["student_count"],
+            "num_proctors": entry["num_proctors"], "is_draft": True,
+        }
+        course = courses.get(entry["codes"][0]) if len(entry["codes"]) == 1 else None
+        if course is not None:
+            instructor = next(iter(course.instructors.all()), None)
+            if instructor is None:
+                written[entry["index"]] = f"{course.code} has no instructor to own the exam."
+                continue
+            written[entry["index"]] = {"exam": Exam.objects.create(instructor=instructor, course=course, **fields).id}
+        elif creator is None:
+            written[entry["index"]] = "Dean exams need a creator (an authorized user)."
+        else:
+            written[entry["index"]] = {
+                "dean_exam": DeanExam.objects.create(creator=creator, course_codes=entry["codes"], **fields).id
+            }
+    return written
@@ -2,8 +2,9 @@
 from django.shortcuts import get_object_or_404
 from myapp.exams.models import Exam, DeanExam
 
+# Draft (unpublished) exams can't be proctored yet
 def get_staff_exam_or_404(exam_id):
-    return get_object_or_404(Exam, pk=exam_id)
+    return get_object_or_404(Exam, pk=exam_id, is_draft=False)
 
 def get_dean_exam_or_404(exam_id):
-    return get_object_or_404(DeanExam, pk=exam_id)
+    return get_object_or_404(DeanExam, pk=exam_id, is_draft=False)
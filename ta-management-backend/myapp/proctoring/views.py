@@ -3,6 +3,7 @@ import json
 from datetime import datetime, timedelta
 from django.db.models import Q, F, Value
 from django.db.models.functions import Lower, Replace
+from django.core.exceptions import ValidationError
 from django.http import JsonResponse
 from django.views.decorators.http import require_GET, require_POST
 from django.db.models.functions import Concat
@@ -14,6 +15,7 @@ from myapp.proctoring.models import ProctoringAssignment
 from myapp.proctoring.utils import get_staff_exam_or_404, get_dean_exam_or_404
 from myapp.proctoring.restrictions import ProctoringAssignmentSolver
 from myapp.proctoring.deansolver import DeanProctoringSolver
+from myapp.exams.seating import proctor_quotas, distribute_rooms
 from myapp.taleave.models import TALeaveRequests
 from myapp.schedule.models import TAWeeklySlot
 from myapp.taassignment.models import TAAllocation
@@ -244,12 +246,17 @@ def automatic_proctor_assignment(request, exam_id):
         return JsonResponse({"success": False}, status=403)
 
     exam = get_staff_exam_or_404(exam_id)
-    solver = ProctoringAssignmentSolver(exam)
+    try:
+        quotas = proctor_quotas(exam)
+    except ValidationError as e:
+        return JsonResponse({"success": False, "message": e.messages[0]}, status=400)
+    solver = ProctoringAssignmentSolver(exam, room_quotas=quotas)
     assigned, info = solver.assign_with_overrides()
 
     return JsonResponse({
         "success": True,
         "assigned_tas": [ta.email for ta in assigned],
+        "rooms": solver.room_of,
         "override_info": {
             "consecutive_overridden": info["consec"],
             "ms_phd_overridden":     info["ms"],
@@ -266,6 +273,10 @@ def automatic_dean_assignment(request, exam_id):
 
     dean_exam = get_dean_exam_or_404(exam_id)
     codes = dean_exam.course_codes
+    try:
+        quotas = proctor_quotas(dean_exam)
+    except ValidationError as e:
+        return JsonResponse({"success": False, "message": e.messages[0]}, status=400)
 
     # Check if the course exists in the Course model
     if len(codes) == 1 and codes[0] in REAL_COURSE_CODES:
@@ -279,19 +290,42 @@ def automatic_dean_assignment(request, exam_id):
             num_proctors=dean_exam.num_proctors
         )
         
-        solver = ProctoringAssignmentSolver(stub)
+        solver = ProctoringAssignmentSolver(stub, room_quotas=quotas)
     else:
         # Pure-enum exam: dean solver (all-TA candidate list)
-        solver = DeanProctoringSolver(dean_exam)
+        solver = DeanProctoringSolver(dean_exam, room_quotas=quotas)
 
     assigned, info = solver.assign_with_overrides()
     return JsonResponse({
         "success": True,
         "assigned_tas": [ta.email for ta in assigned],
+        "rooms": solver.room_of,
         "override_info": info,
     })
 
 
+def _confirmed_rooms(exam, tas, rooms):
+    """
+    ({email: room}, error) for a confirmation: the rooms sent by the client (e.g. the
+    solver's proposal, {email: room} over the confirmed TAs) if they are the exam's
+    rooms, else the seat-proportional split.
+    """
+    if rooms is not None and not isinstance(rooms, dict):
+        return {}, "rooms must be an object mapping TA emails to rooms"
+    if not rooms:
+        try:
+            return distribute_rooms(tas, proctor_quotas(exam)), None
+        except ValidationError as e:
+            return {}, e.messages[0]
+    strangers = [email for email in rooms if email not in tas]
+    if strangers:
+        return {}, f"{strangers[0]} is not one of the confirmed TAs"
+    unknown = [room for room in rooms.values() if not isinstance(room, str) or room not in exam.classrooms]
+    if unknown:
+        return {}, f"{unknown[0]} is not a room of this exam"
+    return rooms, None
+
+
 @require_POST
 def confirm_assignment(request, exam_id):
     user, role = find_user_by_email(request.session.get("user_email"))
@@ -299,9 +333,15 @@ def confirm_assignment(request, exam_id):
         return JsonResponse({"success": False}, status=403)
 
     exam = get_staff_exam_or_404(exam_id)
-    tas = json.loads(request.body).get("assigned_tas", [])
+    data = json.loads(request.body)
+    tas = data.get("assigned_tas", [])
+    if not isinstance(tas, list):
+        return JsonResponse({"success": False, "message": "assigned_tas must be a list"}, status=400)
     if len(tas) != exam.num_proctors:
         return JsonResponse({"success": False, "message": "Wrong number of TAs"}, status=400)
+    rooms, error = _confirmed_rooms(exam, tas, data.get("rooms"))
+    if error:
+        return JsonResponse({"success": False, "message": error}, status=400)
 
     ProctoringAssignment.objects.filter(exam=exam).delete()
     hours = (
@@ -311,7 +351,7 @@ def confirm_assignment(request, exam_id):
 
     for email in tas:
         ta = TAUser.objects.get(email=email)
-        pa = ProctoringAssignment(exam=exam, ta=ta)
+        pa = ProctoringAssignment(exam=exam, ta=ta, room=rooms.get(email, ""))
         pa.full_clean(); pa.save()
         ta.workload += hours; ta.save()
 
@@ -325,9 +365,15 @@ def confirm_dean_assignment(request, exam_id):
         return JsonResponse({"success": False}, status=403)
 
     dean_exam = get_dean_exam_or_404(exam_id)
-    tas = json.loads(request.body).get("assigned_tas", [])
+    data = json.loads(request.body)
+    tas = data.get("assigned_tas", [])
+    if not isinstance(tas, list):
+        return JsonResponse({"success": False, "message": "assigned_tas must be a list"}, status=400)
     if len(tas) != dean_exam.num_proctors:
         return JsonResponse({"success": False, "message": "Wrong number of TAs"}, status=400)
+    rooms, error = _confirmed_rooms(dean_exam, tas, data.get("rooms"))
+    if error:
+        return JsonResponse({"success": False, "message": error}, status=400)
 
     ProctoringAssignment.objects.filter(dean_exam=dean_exam).delete()
     hours = (
@@ -337,7 +383,7 @@ def confirm_dean_assignment(request, exam_id):
 
     for email in tas:
         ta = TAUser.objects.get(email=email)
-        pa = ProctoringAssignment(dean_exam=dean_exam, ta=ta)
+        pa = ProctoringAssignment(dean_exam=dean_exam, ta=ta, room=rooms.get(email, ""))
         pa.full_clean(); pa.save()
         ta.workload += hours; ta.save()
 
@@ -0,0 +1,160 @@
+# myapp/reports/bundle.py
+"""
+Roster bundles: the alphabetical and randomized student lists of many exams in one ZIP.
+
+    1. select_exams picks the Exams / DeanExams (by date range and/or ids),
+    2. rosters_for_codes fetches the stored roster of every course code involved in
+       ONE query, and each exam's roster is merged from them (exams/rosters.py),
+    3. the random roster follows each exam's seating plan (exams/seating.py, read
+       only), with room capacities and proctors read once for the whole selection,
+    4. the PDFs are laid out in the shared render pool (reports/rendering.py), a few
+       at a time; the command can use worker processes instead, which get plain
+       tuples, set Django up themselves and never touch the DB,
+    5. iter_roster_zip yields the ZIP incrementally as the PDFs come back, so the
+       endpoint can stream it and the command can write it to a file.
+"""
+import multiprocessing
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from django.db.models import Q
+
+from myapp.exams.models import Exam, DeanExam
+from myapp.exams.rosters import rosters_for_codes, merge_rosters
+from myapp.exams.seating import plan_seating, room_capacities, room_proctors, seating_sections
+from myapp.proctoring.models import ProctoringAssignment
+from myapp.reports.rendering import render_roster_job, setup_django_worker, submit
+
+
+# -----------------------------
+# Data
+# -----------------------------
+def select_exams(date_from=None, date_to=None, exam_ids=(), dean_exam_ids=()):
+    """
+    Roster specs (plain dicts) for the published Exams/DeanExams in [date_from, date_to]
+    plus any explicitly listed ids, ordered by date and start time.
+    """
+    in_window = Q()
+    if date_from:
+        in_window &= Q(date__gte=date_from)
+    if date_to:
+        in_window &= Q(date__lte=date_to)
+    by_date = date_from is not None or date_to is not None
+
+    def selected(ids):
+        return in_window | Q(pk__in=list(ids)) if by_date else Q(pk__in=list(ids))
+
+    exams = Exam.objects.select_related("course", "seating_plan").filter(selected(exam_ids), is_draft=False)
+    dean_exams = DeanExam.objects.select_related("seating_plan").filter(selected(dean_exam_ids), is_draft=False)
+
+    specs = []
+    for ex in exams:
+        specs.append({
+            "exam": ex, "key": f"exam_{ex.pk}", "codes": [ex.course.code],
+            "title": f"{ex.course.code} - {ex.course.name}", "rooms": ex.classrooms or [],
+            "date": ex.date, "start": ex.start_time.strftime("%H:%M"), "end": ex.end_time.strftime("%H:%M"),
+        })
+    for de in dean_exams:
+        specs.append({
+            "exam": de, "key": f"dean_exam_{de.pk}", "codes": list(de.course_codes),
+            "title": ", ".join(de.course_codes), "rooms": de.classrooms or [],
+            "date": de.date, "start": de.start_time.strftime("%H:%M"), "end": de.end_time.strftime("%H:%M"),
+        })
+    specs.sort(key=lambda s: (s["date"], s["start"], s["key"]))
+    return specs
+
+
+# -----------------------------
+# Rendering
+# -----------------------------
+def roster_jobs(specs):
+    """
+    (filename, renderer, args) for the alpha roster and the per-room seating of every
+    spec. Raises ValidationError when an exam's rooms can't be seated.
+    """
+    rosters = rosters_for_codes(code for spec in specs for code in spec["codes"])
+    capacities = room_capacities({room for spec in specs for room in spec["rooms"]})
+    proctors = room_proctors(ProctoringAssignment.objects.filter(
+        Q(exam__in=[s["exam"] for s in specs if isinstance(s["exam"], Exam)])
+        | Q(dean_exam__in=[s["exam"] for s in specs if isinstance(s["exam"], DeanExam)])
+    ))
+    jobs = []
+    for spec in specs:
+        roster = merge_rosters(rosters, spec["codes"])
+        students = {s[0]: s[1:] for s in roster}
+        plan = plan_seating(spec["exam"], list(students), capacities=capacities)
+        stem = f"{spec['date']:%Y-%m-%d}_{'-'.join(spec['codes'])}_{spec['key']}".replace("/", "-")
+        jobs.append((f"{stem}_alpha.pdf", "alpha",
+                     (spec["title"], spec["rooms"], spec["start"], spec["end"], [s[1:] for s in roster])))
+        jobs.append((f"{stem}_random.pdf", "seating",
+                     (spec["title"], spec["start"], spec["end"], seating_sections(plan, students, proctors.get(spec["key"])))))
+    return jobs
+
+
+class _ZipSink:
+    """Write-only file for ZipFile: buffers what was written until drain() hands it out."""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _render_in_pool(jobs):
+    """Render in the shared thread pool, at most REPORT_RENDER_WORKERS jobs in flight, in order."""
+    window = getattr(settings, "REPORT_RENDER_WORKERS", 2)
+    pending = deque()
+    try:
+        for job in jobs:
+            pending.append(submit(render_roster_job, job))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _render_in_processes(jobs, processes):
+    """Render in spawned worker processes (safe whatever the platform's start method)."""
+    pool = ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+        initializer=setup_django_worker, initargs=(os.environ["DJANGO_SETTINGS_MODULE"],),
+    )
+    try:
+        yield from pool.map(render_roster_job, jobs)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def iter_roster_zip(jobs, processes=None):
+    """
+    Yield the bytes of a ZIP holding every rendered roster, one PDF at a time. Rendering
+    uses the shared render pool, or `processes` worker processes (for the command).
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        if processes and processes > 1 and len(jobs) > 1:
+            rendered = _render_in_processes(jobs, processes)
+        else:
+            rendered = _render_in_pool(jobs)
+        try:
+            for filename, pdf in rendered:
+                bundle.writestr(filename, pdf)
+                yield sink.drain()
+        finally:
+            rendered.close()
+    yield sink.drain()  # central directory
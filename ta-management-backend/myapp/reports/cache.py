@@ -0,0 +1,142 @@
+# myapp/reports/cache.py
+"""
+On-disk cache for rendered report PDFs.
+
+Every report depends on a few data sources ("proctoring", "duties", "tas", "exams").
+Each source has a version stamp file under REPORT_CACHE_DIR/stamps; signals bump it
+(after commit) whenever a row of that source is written. A report's cache key hashes
+its name, today's date (reports print it) and the stamps of its sources, so any write
+makes the next download re-render while repeated downloads are served straight from
+the file. Entries are evicted least-recently-used once the directory exceeds
+REPORT_CACHE_MAX_BYTES.
+"""
+import hashlib
+import os
+import tempfile
+import uuid
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+
+from myapp.reports.rendering import pdf_file_response
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+def _cache_dir():
+    return str(getattr(settings, "REPORT_CACHE_DIR", os.path.join(settings.BASE_DIR, "report_cache")))
+
+
+def _stamp_path(source):
+    return os.path.join(_cache_dir(), "stamps", source)
+
+
+def _pdf_dir():
+    return os.path.join(_cache_dir(), "pdf")
+
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Version stamps
+# -----------------------------
+def read_stamp(source):
+    try:
+        with open(_stamp_path(source)) as fh:
+            return fh.read().strip()
+    except FileNotFoundError:
+        return "0"
+
+
+def bump_report_version(*sources):
+    """Invalidate every cached report built from `sources`, once the current transaction commits."""
+    def bump():
+        for source in sources:
+            _atomic_write(_stamp_path(source), uuid.uuid4().hex)
+    transaction.on_commit(bump)
+
+
+def cache_key(report, sources, *extra):
+    parts = [report, date.today().isoformat(), *map(str, extra)]
+    parts += [f"{source}={read_stamp(source)}" for source in sorted(sources)]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+# -----------------------------
+# PDF entries
+# -----------------------------
+def _open_cached(key):
+    path = os.path.join(_pdf_dir(), f"{key}.pdf")
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    os.utime(path)  # mtime doubles as the LRU clock
+    return fh
+
+
+def _store(key, build):
+    """
+    Render with `build(path)` into a temp file next to the entry, then publish it atomically.
+    Returns a handle opened on the rendered file before publishing, so serving it doesn't
+    depend on the entry surviving a concurrent eviction.
+    """
+    os.makedirs(_pdf_dir(), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=_pdf_dir(), suffix=".tmp")
+    os.close(fd)
+    fh = None
+    try:
+        build(tmp)
+        fh = open(tmp, "rb")
+        path = os.path.join(_pdf_dir(), f"{key}.pdf")
+        os.replace(tmp, path)
+    except BaseException:
+        if fh is not None:
+            fh.close()
+        os.unlink(tmp)
+        raise
+    evict(keep=path)
+    return fh
+
+
+def evict(max_bytes=None, keep=None):
+    """Delete least recently used entries (except `keep`) until the cache fits in `max_bytes`."""
+    if max_bytes is None:
+        max_bytes = getattr(settings, "REPORT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+    entries = []
+    with os.scandir(_pdf_dir()) as it:
+        for entry in it:
+            if entry.name.endswith(".pdf"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.unlink(path)  # a download already streaming this file keeps its open handle
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cached_pdf_response(report, sources, build, filename):
+    """
+    FileResponse for `report`, rendering it with `build(path)` only when no entry
+    exists for the current version of `sources`. `build` runs in the request thread
+    (it may query) and should hand the ReportLab work to the render pool.
+    """
+    key = cache_key(report, sources)
+    fh = _open_cached(key)
+    if fh is None:
+        fh = _store(key, build)
+    return pdf_file_response(fh, filename)
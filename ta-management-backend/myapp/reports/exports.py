@@ -0,0 +1,82 @@
+# myapp/reports/exports.py
+"""
+Tabular (CSV / XLSX) variants of the reports.
+
+Both take a header and an iterable of row tuples, normally a generator over a
+queryset's .iterator(), so rows go out as they come from the DB cursor:
+    * CSV is streamed line by line with StreamingHttpResponse;
+    * XLSX is written with openpyxl's write-only workbook (rows are not kept in
+      memory) into a spooled temp file, then served with FileResponse.
+"""
+import csv
+import os
+import re
+from datetime import date, datetime, time
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from openpyxl import Workbook
+
+EXPORT_FORMATS = ("csv", "xlsx")
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to the csv writer's caller."""
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, time):
+        return value.strftime("%H:%M")
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def csv_response(filename, header, rows):
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield "\ufeff"  # BOM so Excel opens Turkish characters correctly
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow([_csv_value(v) for v in row])
+
+    return StreamingHttpResponse(
+        lines(), content_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+    )
+
+
+def xlsx_response(filename, header, rows, title="Report"):
+    workbook = Workbook(write_only=True)
+    # Excel caps sheet names at 31 chars and rejects a few punctuation marks
+    sheet = workbook.create_sheet(title=re.sub(r"[\\/?*\[\]:]", " ", title)[:31] or "Report")
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append(list(row))
+
+    spool = SpooledTemporaryFile(max_size=getattr(settings, "REPORT_SPOOL_MAX_BYTES", 1024 * 1024))
+    workbook.save(spool)
+    size = spool.seek(0, os.SEEK_END)
+    spool.seek(0)
+    response = FileResponse(spool, as_attachment=True, filename=f"{filename}.xlsx", content_type=XLSX_CONTENT_TYPE)
+    response["Content-Length"] = str(size)
+    return response
+
+
+def export_response(fmt, filename, header, rows, title="Report"):
+    """CSV or XLSX response for `fmt`; a JSON 400 for anything else."""
+    if fmt == "csv":
+        return csv_response(filename, header, rows)
+    if fmt == "xlsx":
+        return xlsx_response(filename, header, rows, title=title)
+    return JsonResponse(
+        {"status": "error", "message": f"Unsupported format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}."},
+        status=400,
+    )
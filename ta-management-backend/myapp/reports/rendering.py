@@ -0,0 +1,82 @@
+# myapp/reports/rendering.py
+"""
+PDF rendering off the request thread.
+
+Views collect their data (plain lists, no lazy querysets) in the request thread and
+hand the ReportLab build to a small shared pool, so at most REPORT_RENDER_WORKERS
+documents are laid out at once per web process no matter how many downloads arrive.
+The output goes to a SpooledTemporaryFile, which stays in memory for small reports
+and rolls over to disk above REPORT_SPOOL_MAX_BYTES, and is served with FileResponse.
+
+This module imports no models, so render_roster_job can also run in a spawned worker
+process once setup_django_worker has configured Django there.
+"""
+import os
+import threading
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.http import FileResponse
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, "REPORT_RENDER_WORKERS", 2),
+                thread_name_prefix="report-render",
+            )
+    return _pool
+
+
+def submit(build, *args):
+    """Schedule `build(*args)` in the render pool; returns its Future."""
+    return _get_pool().submit(build, *args)
+
+
+def render(build, *args):
+    """Run `build(*args)` in the render pool and wait for it (exceptions propagate)."""
+    return submit(build, *args).result()
+
+
+def setup_django_worker(settings_module):
+    """ProcessPoolExecutor initializer: configure Django in a fresh (spawned) worker."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+
+
+def render_roster_job(job):
+    """(filename, PDF bytes) for a roster job from reports/bundle.roster_jobs."""
+    from myapp.reports.views import _render_roster, _render_seating
+    filename, renderer, args = job
+    buf = BytesIO()
+    {"alpha": _render_roster, "seating": _render_seating}[renderer](*args, buf)
+    return filename, buf.getvalue()
+
+
+def render_to_spool(build, *args):
+    """Render `build(*args, out)` into a new spooled temp file, rewound and ready to serve."""
+    spool = SpooledTemporaryFile(max_size=getattr(settings, "REPORT_SPOOL_MAX_BYTES", 1024 * 1024))
+    try:
+        render(build, *args, spool)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def pdf_file_response(fh, filename, as_attachment=True):
+    """FileResponse over an open PDF file object, with Content-Length taken from the file."""
+    size = fh.seek(0, os.SEEK_END)
+    fh.seek(0)
+    response = FileResponse(fh, as_attachment=as_attachment, filename=filename, content_type="application/pdf")
+    response["Content-Length"] = str(size)
+    return response
@@ -8,4 +8,12 @@ urlpatterns = [
     path('download-total-workload-sheet/', download_total_workload_sheet, name='download_workload_sheet'),
     path('studentlist-alphabetic/<int:exam_id>/', exam_students_alpha,  name='exam_students_alpha'),
     path('studentlist-random/<int:exam_id>/', exam_students_random, name='exam_students_random'),
+    path('studentlist-bundle/', exam_students_bundle, name='exam_students_bundle'),
+    path('seating-plan/<int:exam_id>/', save_exam_seating, name='save_exam_seating'),
+
+    # tabular variants: <fmt> is "csv" or "xlsx"
+    path('export-total-proctoring/<str:fmt>/', export_total_proctoring, name='export_total_proctoring'),
+    path('export-total-ta-duty/<str:fmt>/', export_total_ta_duties, name='export_total_ta_duties'),
+    path('export-total-workload/<str:fmt>/', export_total_workload, name='export_total_workload'),
+    path('studentlist-export/<int:exam_id>/<str:fmt>/', export_exam_students, name='export_exam_students'),
 ]
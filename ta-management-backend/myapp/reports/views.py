@@ -1,20 +1,22 @@
 # myapp/reports/views.py
+import json
 import os
-import random
-from io import BytesIO
-from datetime import datetime
+from datetime import datetime, date
 
 from django.conf import settings
-from django.http import HttpResponse
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.views.decorators.http import require_POST
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
 
 # ReportLab imports
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 
 # DejaVuSans for Turkish support
 from reportlab.pdfbase import pdfmetrics
@@ -46,74 +48,109 @@ styles.add(ParagraphStyle(
 
 # Models
 from myapp.proctoring.models import ProctoringAssignment
-from myapp.taduties.models    import TADuty
-from myapp.models              import StudentList, TAUser
+from myapp.taduties.models    import TADuty, DUTY_TYPES
+from myapp.models              import TAUser
 from myapp.exams.models        import DeanExam, Exam
+from myapp.exams.seating       import plan_seating, save_seating_plan, seating_sections, room_proctors
+from myapp.exams.rosters       import exam_roster
+from myapp.userauth.helpers    import find_user_by_email
+
+# Rendered total reports are cached on disk, keyed by the version of their sources;
+# every PDF is laid out in the shared render pool into a (spooled) file
+from myapp.reports.cache import cached_pdf_response
+from myapp.reports.rendering import render, render_to_spool, pdf_file_response
+from myapp.reports.exports import export_response
+from myapp.reports.bundle import select_exams, roster_jobs, iter_roster_zip
+
+# Each report is split into a data function (runs the queries in the request thread
+# and returns plain lists) and a _render_* function (ReportLab only, no DB access)
+# that writes the PDF to `out`, a path or a file object.
+
+TABLE_STYLE = [
+    ("FONTNAME",      (0, 0), (-1, -1), "DejaVuSans"),
+    ("FONTSIZE",      (0, 0), (-1, -1), 9),
+    ("BACKGROUND",    (0, 0), (-1, 0), colors.lightgrey),
+    ("ALIGN",         (0, 0), (-1, 0), "CENTER"),
+    ("GRID",          (0, 0), (-1, -1), 0.5, colors.black),
+    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+]
+
+
+# -----------------------------
+# Total proctoring
+# -----------------------------
+def download_total_proctoring_sheet(request):
+    return cached_pdf_response(
+        "total_proctoring", ("proctoring", "tas", "exams"),
+        lambda path: render(_render_total_proctoring, total_proctoring_data(), path),
+        "Total Proctoring.pdf",
+    )
 
 
-def download_total_proctoring_sheet(request):
-    buf = BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=letter)
-    elems = []
+PROCTORING_HEADER = ("TA Email", "TA Name", "Course", "Date", "Start", "End", "Rooms")
 
-    elems.append(Paragraph("Total Proctoring Report", styles["Title"]))
-    elems.append(Paragraph(f"Date: {datetime.now():%d.%m.%Y}", styles["Normal"]))
-    elems.append(Spacer(1, 0.2 * inch))
 
-    qs = ProctoringAssignment.objects.select_related("exam", "dean_exam", "ta")
-    total = qs.count()
-
-    # collect assignments per TA
-    summary = {}
-    for a in qs:
-        key = a.ta.email
-        summary.setdefault(key, {
-            "name": f"{a.ta.name} {a.ta.surname}",
-            "count": 0,
-            "exams": []
-        })
-        summary[key]["count"] += 1
+def proctoring_rows():
+    """One row per assignment (see PROCTORING_HEADER), grouped by TA, streamed from the cursor."""
+    qs = (
+        ProctoringAssignment.objects
+        .select_related("ta", "exam__course", "dean_exam")
+        .order_by("ta__name", "ta__surname", "ta__email",
+                  Coalesce("exam__date", "dean_exam__date"),
+                  Coalesce("exam__start_time", "dean_exam__start_time"))
+    )
+    for a in qs.iterator(chunk_size=2000):
         if a.exam:
             ex = a.exam
-            code, d, s, e, rooms = (
-                ex.course.code,
-                ex.date, ex.start_time, ex.end_time,
-                ", ".join(ex.classrooms or [])
-            )
+            code, d, s, e, rooms = ex.course.code, ex.date, ex.start_time, ex.end_time, ex.classrooms
         else:
             de = a.dean_exam
-            code, d, s, e, rooms = (
-                ", ".join(de.course_codes),
-                de.date, de.start_time, de.end_time,
-                ", ".join(de.classrooms or [])
-            )
-        summary[key]["exams"].append((code, d, s, e, rooms))
-
-    # sort descending by assignment count
-    ordered = sorted(summary.values(),
-                     key=lambda v: v["count"],
-                     reverse=True)
+            code, d, s, e, rooms = ", ".join(de.course_codes), de.date, de.start_time, de.end_time, de.classrooms
+        yield (a.ta.email, f"{a.ta.name} {a.ta.surname}", code, d, s, e, ", ".join(rooms or []))
+
+
+def total_proctoring_data():
+    # per-TA counts are aggregated in SQL, most assignments first
+    per_ta = (
+        ProctoringAssignment.objects
+        .values("ta__email", "ta__name", "ta__surname")
+        .annotate(count=Count("id"))
+        .order_by("-count", "ta__name", "ta__surname")
+    )
+    summary = {
+        row["ta__email"]: {"name": f"{row['ta__name']} {row['ta__surname']}", "count": row["count"], "exams": []}
+        for row in per_ta
+    }
+    # details come from one ordered, fully joined query
+    for email, name, code, d, s, e, rooms in proctoring_rows():
+        summary[email]["exams"].append((code, d, s, e, rooms))
+
+    ordered = list(summary.values())
+    return {"total": sum(v["count"] for v in ordered), "tas": ordered}
+
+
+def _render_total_proctoring(data, out):
+    doc = SimpleDocTemplate(out, pagesize=letter)
+    elems = []
+
+    elems.append(Paragraph("Total Proctoring Report", styles["Title"]))
+    elems.append(Paragraph(f"Date: {datetime.now():%d.%m.%Y}", styles["Normal"]))
+    elems.append(Spacer(1, 0.2 * inch))
+
+    ordered = data["tas"]
 
     # summary section
     elems.append(Paragraph("Proctoring Summary", styles["Heading1"]))
-    elems.append(Paragraph(f"Total proctoring assignments: {total}", styles["Normal"]))
-    elems.append(Paragraph(f"Number of TAs involved: {len(summary)}", styles["Normal"]))
+    elems.append(Paragraph(f"Total proctoring assignments: {data['total']}", styles["Normal"]))
+    elems.append(Paragraph(f"Number of TAs involved: {len(ordered)}", styles["Normal"]))
     elems.append(Spacer(1, 0.15 * inch))
 
-    data = [["TA Name", "# Assignments"]]
+    table = [["TA Name", "# Assignments"]]
     for v in ordered:
-        data.append([v["name"], v["count"]])
-
-    tbl = Table(data, colWidths=[4 * inch, 1.5 * inch])
-    tbl.setStyle(TableStyle([
-        ("FONTNAME",      (0, 0), (-1, -1), "DejaVuSans"),
-        ("FONTSIZE",      (0, 0), (-1, -1), 9),
-        ("BACKGROUND",    (0, 0), (-1, 0), colors.lightgrey),
-        ("ALIGN",         (0, 0), (-1, 0), "CENTER"),
-        ("ALIGN",         (1, 1), (1, -1), "CENTER"),
-        ("GRID",          (0, 0), (-1, -1), 0.5, colors.black),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-    ]))
+        table.append([v["name"], v["count"]])
+
+    tbl = Table(table, colWidths=[4 * inch, 1.5 * inch])
+    tbl.setStyle(TableStyle(TABLE_STYLE + [("ALIGN", (1, 1), (1, -1), "CENTER")]))
     elems.append(tbl)
     elems.append(Spacer(1, 0.25 * inch))
 
@@ -131,78 +168,98 @@ def download_total_proctoring_sheet(request):
                 rooms or "N/A"
             ])
         dt = Table(det, colWidths=[1.2*inch, 1*inch, 0.8*inch, 0.8*inch, 2.2*inch])
-        dt.setStyle(TableStyle([
-            ("FONTNAME",      (0, 0), (-1, -1), "DejaVuSans"),
-            ("FONTSIZE",      (0, 0), (-1, -1), 9),
-            ("BACKGROUND",    (0, 0), (-1, 0), colors.lightgrey),
-            ("ALIGN",         (0, 0), (-1, 0), "CENTER"),
-            ("GRID",          (0, 0), (-1, -1), 0.5, colors.black),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-        ]))
+        dt.setStyle(TableStyle(TABLE_STYLE))
         elems.append(dt)
         elems.append(Spacer(1, 0.15 * inch))
 
     doc.build(elems)
-    buf.seek(0)
-    return HttpResponse(buf, content_type="application/pdf",
-                        headers={'Content-Disposition': 'attachment; filename="Total Proctoring.pdf"'})
 
 
+# -----------------------------
+# Total TA duties
+# -----------------------------
 def download_total_ta_duty_sheet(request):
-    buf = BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=letter)
+    return cached_pdf_response(
+        "total_ta_duties", ("duties", "tas"),
+        lambda path: render(_render_total_ta_duties, total_ta_duties_data(), path),
+        "Total TA Duties.pdf",
+    )
+
+
+DUTY_HEADER = ("TA Email", "TA Name", "Course", "Duty Type", "Date", "Start", "End")
+DUTY_TYPE_LABELS = dict(DUTY_TYPES)
+
+
+def duty_rows():
+    """One row per approved duty (see DUTY_HEADER), grouped by TA, streamed from the cursor."""
+    qs = (
+        TADuty.objects.filter(status="approved")
+        .order_by("ta_user__name", "ta_user__surname", "ta_user__email", "date", "start_time")
+        .values_list("ta_user__email", "ta_user__name", "ta_user__surname", "course__code",
+                     "duty_type", "date", "start_time", "end_time")
+    )
+    for email, name, surname, course, typ, d, s, e in qs.iterator(chunk_size=2000):
+        yield (email, f"{name} {surname}", course or "N/A", DUTY_TYPE_LABELS.get(typ, typ), d, s, e)
+
+
+def total_ta_duties_data():
+    approved = TADuty.objects.filter(status="approved")
+
+    # per-TA totals, per-(TA, type) and per-type counts are all aggregated in SQL
+    per_ta = (
+        approved.values("ta_user__email", "ta_user__name", "ta_user__surname")
+        .annotate(total=Count("id"))
+        .order_by("-total", "ta_user__name", "ta_user__surname")
+    )
+    summary = {
+        row["ta_user__email"]: {
+            "name": f"{row['ta_user__name']} {row['ta_user__surname']}",
+            "total": row["total"], "counts": {}, "duties": [],
+        }
+        for row in per_ta
+    }
+    per_ta_type = approved.values("ta_user__email", "duty_type").annotate(n=Count("id")).order_by("duty_type")
+    for row in per_ta_type:
+        label = DUTY_TYPE_LABELS.get(row["duty_type"], row["duty_type"])
+        summary[row["ta_user__email"]]["counts"][label] = row["n"]
+    by_type = {
+        DUTY_TYPE_LABELS.get(row["duty_type"], row["duty_type"]): row["n"]
+        for row in approved.values("duty_type").annotate(n=Count("id")).order_by("-n")
+    }
+
+    # details come from one ordered, fully joined query
+    for email, name, course, typ, d, s, e in duty_rows():
+        summary[email]["duties"].append((course, typ, d, s, e))
+
+    ordered = list(summary.values())
+    return {"total": sum(by_type.values()), "by_type": by_type, "tas": ordered}
+
+
+def _render_total_ta_duties(data, out):
+    doc = SimpleDocTemplate(out, pagesize=letter)
     elems = []
 
     elems.append(Paragraph("Total TA Duties Report", styles["Title"]))
     elems.append(Paragraph(f"Date: {datetime.now():%d.%m.%Y}", styles["Normal"]))
     elems.append(Spacer(1, 0.2 * inch))
 
-    duties = TADuty.objects.filter(status="approved").select_related("ta_user", "course")
-    total = duties.count()
-
-    # collect duties per TA
-    summary = {}
-    for d in duties:
-        key = d.ta_user.email
-        summary.setdefault(key, {
-            "name": f"{d.ta_user.name} {d.ta_user.surname}",
-            "counts": {},
-            "duties": []
-        })
-        typ = d.get_duty_type_display()
-        summary[key]["counts"][typ] = summary[key]["counts"].get(typ, 0) + 1
-        summary[key]["duties"].append((
-            d.course.code if d.course else "N/A",
-            typ,
-            d.date,
-            d.start_time,
-            d.end_time
-        ))
-
-    # sort by total duty count descending
-    ordered = sorted(summary.values(),
-                     key=lambda v: sum(v["counts"].values()),
-                     reverse=True)
+    ordered = data["tas"]
 
     elems.append(Paragraph("TA Duty Summary", styles["Heading1"]))
-    elems.append(Paragraph(f"Total approved duties: {total}", styles["Normal"]))
-    elems.append(Paragraph(f"Number of TAs involved: {len(summary)}", styles["Normal"]))
+    elems.append(Paragraph(f"Total approved duties: {data['total']}", styles["Normal"]))
+    if data["by_type"]:
+        by_type = ", ".join(f"{k}: {c}" for k, c in data["by_type"].items())
+        elems.append(Paragraph(f"By duty type: {by_type}", styles["Normal"]))
+    elems.append(Paragraph(f"Number of TAs involved: {len(ordered)}", styles["Normal"]))
     elems.append(Spacer(1, 0.15 * inch))
 
-    data = [["TA Name", "Duty Types (Count)"]]
+    table = [["TA Name", "Duty Types (Count)"]]
     for v in ordered:
         cnts = ", ".join(f"{k}: {c}" for k, c in v["counts"].items())
-        data.append([v["name"], cnts])
-
-    tbl = Table(data, colWidths=[2.5*inch, 3.5*inch])
-    tbl.setStyle(TableStyle([
-        ("FONTNAME",      (0, 0), (-1, -1), "DejaVuSans"),
-        ("FONTSIZE",      (0, 0), (-1, -1), 9),
-        ("BACKGROUND",    (0, 0), (-1, 0), colors.lightgrey),
-        ("ALIGN",         (0, 0), (-1, 0), "CENTER"),
-        ("GRID",          (0, 0), (-1, -1), 0.5, colors.black),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-    ]))
+        table.append([v["name"], cnts])
+
+    tbl = Table(table, colWidths=[2.5*inch, 3.5*inch])
+    tbl.setStyle(TableStyle(TABLE_STYLE))
     elems.append(tbl)
     elems.append(Spacer(1, 0.25 * inch))
 
@@ -219,128 +276,136 @@ def download_total_ta_duty_sheet(request):
                 et.strftime("%H:%M")   if et else "N/A",
             ])
         dtbl = Table(det, colWidths=[1.3*inch, 1.3*inch, 1*inch, 1*inch, 1*inch])
-        dtbl.setStyle(TableStyle([
-            ("FONTNAME",      (0, 0), (-1, -1), "DejaVuSans"),
-            ("FONTSIZE",      (0, 0), (-1, -1), 9),
-            ("BACKGROUND",    (0, 0), (-1, 0), colors.lightgrey),
-            ("ALIGN",         (0, 0), (-1, 0), "CENTER"),
-            ("GRID",          (0, 0), (-1, -1), 0.5, colors.black),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-        ]))
+        dtbl.setStyle(TableStyle(TABLE_STYLE))
         elems.append(dtbl)
         elems.append(Spacer(1, 0.15 * inch))
 
     doc.build(elems)
-    buf.seek(0)
-    return HttpResponse(buf, content_type="application/pdf",
-                        headers={'Content-Disposition': 'attachment; filename="Total TA Duties.pdf"'})
 
 
+# -----------------------------
+# Total workload
+# -----------------------------
 def download_total_workload_sheet(request):
-    buf = BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=letter)
+    return cached_pdf_response(
+        "total_workload", ("tas",),
+        lambda path: render(_render_total_workload, total_workload_data(), path),
+        "TA Workload.pdf",
+    )
+
+
+WORKLOAD_HEADER = ("TA Name", "Email", "Program", "Advisor", "Workload")
+
+
+def workload_rows():
+    """One row per TA (see WORKLOAD_HEADER), by workload descending, streamed from the cursor."""
+    qs = (
+        TAUser.objects.filter(isTA=True).order_by("-workload")
+        .values_list("name", "surname", "email", "program", "advisor", "workload")
+    )
+    for name, surname, email, program, advisor, workload in qs.iterator(chunk_size=2000):
+        yield (f"{name} {surname}", email, program or "N/A", advisor or "N/A", workload)
+
+
+def total_workload_data():
+    totals = TAUser.objects.filter(isTA=True).aggregate(total=Count("email"), sum=Sum("workload"))
+    return {"total": totals["total"], "sum": totals["sum"] or 0, "tas": list(workload_rows())}
+
+
+def _render_total_workload(data, out):
+    doc = SimpleDocTemplate(out, pagesize=letter)
     elems = []
 
     elems.append(Paragraph("TA Total Workload Report", styles["Title"]))
     elems.append(Paragraph(f"Date: {datetime.now():%d.%m.%Y}", styles["Normal"]))
     elems.append(Spacer(1, 0.2 * inch))
 
-    # sort by workload descending
-    tas = TAUser.objects.filter(isTA=True).order_by("-workload")
-    total_tas = tas.count()
-    sumw = sum(t.workload for t in tas)
-
     elems.append(Paragraph("TA Workload Summary", styles["Heading1"]))
-    elems.append(Paragraph(f"Total TAs: {total_tas}", styles["Normal"]))
-    elems.append(Paragraph(f"Sum of Workloads: {sumw}", styles["Normal"]))
+    elems.append(Paragraph(f"Total TAs: {data['total']}", styles["Normal"]))
+    elems.append(Paragraph(f"Sum of Workloads: {data['sum']}", styles["Normal"]))
     elems.append(Spacer(1, 0.15 * inch))
 
-    data = [["TA Name", "Email", "Program", "Advisor", "Workload"]]
-    for t in tas:
-        data.append([
-            f"{t.name} {t.surname}",
-            t.email,
-            t.get_program_display() or "N/A",
-            t.advisor or "N/A",
-            str(t.workload)
-        ])
-    tbl = Table(data, colWidths=[1.5*inch, 2*inch, 1*inch, 1.5*inch, 1*inch])
-    tbl.setStyle(TableStyle([
-        ("FONTNAME",      (0, 0), (-1, -1), "DejaVuSans"),
-        ("FONTSIZE",      (0, 0), (-1, -1), 9),
-        ("BACKGROUND",    (0, 0), (-1, 0), colors.lightgrey),
-        ("ALIGN",         (0, 0), (-1, 0), "CENTER"),
-        ("ALIGN",         (4, 1), (4, -1), "CENTER"),
-        ("GRID",          (0, 0), (-1, -1), 0.5, colors.black),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-    ]))
+    table = [["TA Name", "Email", "Program", "Advisor", "Workload"]]
+    for name, email, program, advisor, workload in data["tas"]:
+        table.append([name, email, program, advisor, str(workload)])
+    tbl = Table(table, colWidths=[1.5*inch, 2*inch, 1*inch, 1.5*inch, 1*inch])
+    tbl.setStyle(TableStyle(TABLE_STYLE + [("ALIGN", (4, 1), (4, -1), "CENTER")]))
     elems.append(tbl)
 
     doc.build(elems)
-    buf.seek(0)
-    return HttpResponse(buf, content_type="application/pdf",
-                        headers={'Content-Disposition': 'attachment; filename="TA Workload.pdf"'})
 
 
 # BELOW LOGIC BELONGS TO EXAM STUDENTS REPORTS:
 def _create_student_section(elems, title, students):
+    """`students` are (student_id, surname, name) tuples."""
     elems.append(Paragraph(title, styles["Heading1"]))
     elems.append(Spacer(1, 0.1 * inch))
 
     data = [["No.", "ID", "Surname", "Name"]]
-    for i, s in enumerate(students, 1):
-        data.append([str(i), s.student_id, s.surname, s.name])
+    for i, (student_id, surname, name) in enumerate(students, 1):
+        data.append([str(i), student_id, surname, name])
     tbl = Table(data, colWidths=[0.5*inch, 1.5*inch, 2*inch, 2*inch])
-    tbl.setStyle(TableStyle([
-        ("FONTNAME",      (0, 0), (-1, -1), "DejaVuSans"),
-        ("FONTSIZE",      (0, 0), (-1, -1), 9),
-        ("BACKGROUND",    (0, 0), (-1, 0), colors.lightgrey),
-        ("ALIGN",         (0, 0), (-1, 0), "CENTER"),
-        ("ALIGN",         (0, 1), (0, -1), "CENTER"),
-        ("GRID",          (0, 0), (-1, -1), 0.5, colors.black),
-        ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-    ]))
+    tbl.setStyle(TableStyle(TABLE_STYLE + [("ALIGN", (0, 1), (0, -1), "CENTER")]))
+    elems.append(tbl)
+
+
+def _create_seating_section(elems, room, capacity, rows, proctors):
+    """`rows` are (seat, student_id, surname, name) tuples for one room."""
+    heading = f"Room {room}: {len(rows)} students, {capacity} seats"
+    if len(rows) > capacity:
+        heading += " (over capacity)"
+    elems.append(Paragraph(heading, styles["Heading1"]))
+    elems.append(Paragraph(f"Proctors: {', '.join(proctors) or '—'}", styles["Normal"]))
+    elems.append(Spacer(1, 0.1 * inch))
+
+    data = [["Seat", "ID", "Surname", "Name"]]
+    for seat, student_id, surname, name in rows:
+        data.append([str(seat), student_id, surname, name])
+    tbl = Table(data, colWidths=[0.5*inch, 1.5*inch, 2*inch, 2*inch])
+    tbl.setStyle(TableStyle(TABLE_STYLE + [("ALIGN", (0, 1), (0, -1), "CENTER")]))
     elems.append(tbl)
 
 
 def _load_exam_or_dean(exam_id):
     try:
-        ex = Exam.objects.select_related("course").get(pk=exam_id)
+        ex = Exam.objects.select_related("course").get(pk=exam_id, is_draft=False)
         title = f"{ex.course.code} - {ex.course.name}"
         rooms = ex.classrooms or []
         start = ex.start_time.strftime("%H:%M")
         end   = ex.end_time.strftime("%H:%M")
         codes = [ex.course.code]
     except Exam.DoesNotExist:
-        de = get_object_or_404(DeanExam, pk=exam_id)
+        de = get_object_or_404(DeanExam, pk=exam_id, is_draft=False)
         title = ", ".join(de.course_codes)
         rooms = de.classrooms or []
         start = de.start_time.strftime("%H:%M")
         end   = de.end_time.strftime("%H:%M")
         codes = de.course_codes
+        ex = de
 
-    # a Q object that OR’s together:
-    #   1) any StudentList whose related Course has matching .code
-    #   2) any StudentList whose nondept_courses JSONField contains the code
-    q = Q()
-    for code in codes:
-        q |= Q(courses__code=code)
-        q |= Q(nondept_courses__contains=[code])
-
-    # filter and order
-    students = (
-        StudentList.objects
-                   .filter(q)
-                   .order_by("surname", "name")
-                   .distinct()   # in case a student is in multiple matching courses
-    )
+    # merged from the stored per-code rosters, in roster order, each student once
+    students = exam_roster(codes)
 
-    return title, rooms, start, end, students
+    return ex, title, rooms, start, end, students
 
-def exam_students_alpha(request, exam_id):
-    title, rooms, start, end, students = _load_exam_or_dean(exam_id)
-    buf = BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=letter)
+def _roster_rows(students):
+    return (student[1:] for student in students)
+
+
+def _seating_rows(exam, students):
+    """
+    Per-room (room, capacity, [(seat, id, surname, name)], proctors) from the exam's seating
+    plan (read only). Raises ValidationError for rooms without a capacity.
+    """
+    by_pk = {student[0]: student[1:] for student in students}
+    plan = plan_seating(exam, list(by_pk))
+    owner = {"exam": exam} if isinstance(exam, Exam) else {"dean_exam": exam}
+    proctors = next(iter(room_proctors(ProctoringAssignment.objects.filter(**owner)).values()), None)
+    return seating_sections(plan, by_pk, proctors)
+
+
+def _render_roster(title, rooms, start, end, students, out):
+    doc = SimpleDocTemplate(out, pagesize=letter)
     elems = []
 
     elems.append(Paragraph(title, styles["Title"]))
@@ -349,24 +414,135 @@ def exam_students_alpha(request, exam_id):
     _create_student_section(elems, f"Rooms: {', '.join(rooms)}", students)
 
     doc.build(elems)
-    buf.seek(0)
-    return HttpResponse(buf, content_type="application/pdf",
-                        headers={'Content-Disposition': f'inline; filename="exam_{exam_id}_alpha.pdf"'})
 
-def exam_students_random(request, exam_id):
-    title, rooms, start, end, students = _load_exam_or_dean(exam_id)
-    students = list(students)
-    random.shuffle(students)
-    buf = BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=letter)
+
+def _render_seating(title, start, end, sections, out):
+    """One page per room, so each room's list can go on its door."""
+    doc = SimpleDocTemplate(out, pagesize=letter)
     elems = []
 
-    elems.append(Paragraph(title, styles["Title"]))
-    elems.append(Paragraph(f"{start}–{end}", styles["CenterSubtitle"]))
-    elems.append(Spacer(1, 0.2 * inch))
-    _create_student_section(elems, f"Rooms: {', '.join(rooms)}", students)
+    for i, (room, capacity, rows, proctors) in enumerate(sections):
+        if i:
+            elems.append(PageBreak())
+        elems.append(Paragraph(title, styles["Title"]))
+        elems.append(Paragraph(f"{start}–{end}", styles["CenterSubtitle"]))
+        elems.append(Spacer(1, 0.2 * inch))
+        _create_seating_section(elems, room, capacity, rows, proctors)
 
     doc.build(elems)
-    buf.seek(0)
-    return HttpResponse(buf, content_type="application/pdf",
-                        headers={'Content-Disposition': f'inline; filename="exam_{exam_id}_random.pdf"'})
+
+
+def exam_students_alpha(request, exam_id):
+    _, title, rooms, start, end, students = _load_exam_or_dean(exam_id)
+    students = list(_roster_rows(students))
+    spool = render_to_spool(_render_roster, title, rooms, start, end, students)
+    return pdf_file_response(spool, f"exam_{exam_id}_alpha.pdf", as_attachment=False)
+
+def exam_students_random(request, exam_id):
+    """Randomized seating: students spread over the exam's rooms by capacity, one section per room."""
+    exam, title, rooms, start, end, students = _load_exam_or_dean(exam_id)
+    try:
+        sections = _seating_rows(exam, students)
+    except ValidationError as e:
+        return JsonResponse({"status": "error", "message": e.messages[0]}, status=400)
+    spool = render_to_spool(_render_seating, title, start, end, sections)
+    return pdf_file_response(spool, f"exam_{exam_id}_random.pdf", as_attachment=False)
+
+
+@require_POST
+def save_exam_seating(request, exam_id):
+    """
+    Store the exam's seating plan so downloads reuse it; body {"reseed": true} reshuffles
+    the students. Only staff and authorized users.
+    """
+    _, user_type = find_user_by_email(request.session.get("user_email"))
+    if user_type not in ("Staff", "Authorized"):
+        return JsonResponse({"status": "error", "message": "Access denied"}, status=403)
+    try:
+        reseed = bool(json.loads(request.body or "{}").get("reseed", False))
+    except (ValueError, AttributeError):
+        return JsonResponse({"status": "error", "message": "Invalid request body"}, status=400)
+
+    exam, _, _, _, _, students = _load_exam_or_dean(exam_id)
+    try:
+        plan = save_seating_plan(exam, [student[0] for student in students], reseed=reseed)
+    except ValidationError as e:
+        return JsonResponse({"status": "error", "message": e.messages[0]}, status=400)
+    return JsonResponse({
+        "status": "success",
+        "rooms": [{"room": room["room"], "capacity": room["capacity"], "students": len(room["students"])}
+                  for room in plan.rooms],
+    })
+
+
+# -----------------------------
+# CSV / XLSX exports
+# -----------------------------
+def export_total_proctoring(request, fmt):
+    return export_response(fmt, "Total Proctoring", PROCTORING_HEADER, proctoring_rows(), title="Proctoring")
+
+
+def export_total_ta_duties(request, fmt):
+    return export_response(fmt, "Total TA Duties", DUTY_HEADER, duty_rows(), title="TA Duties")
+
+
+def export_total_workload(request, fmt):
+    return export_response(fmt, "TA Workload", WORKLOAD_HEADER, workload_rows(), title="Workload")
+
+
+def export_exam_students(request, exam_id, fmt):
+    """Exam roster as CSV/XLSX; alphabetical, or by room and seat with ?order=random."""
+    exam, title, rooms, start, end, students = _load_exam_or_dean(exam_id)
+    if request.GET.get("order") == "random":
+        try:
+            sections = _seating_rows(exam, students)
+        except ValidationError as e:
+            return JsonResponse({"status": "error", "message": e.messages[0]}, status=400)
+        seated = (
+            (room, seat, *student)
+            for room, _, rows, _ in sections
+            for seat, *student in rows
+        )
+        return export_response(fmt, f"exam_{exam_id}_seating", ("Room", "Seat", "ID", "Surname", "Name"), seated,
+                               title=title)
+    numbered = ((i, *row) for i, row in enumerate(_roster_rows(students), 1))
+    return export_response(fmt, f"exam_{exam_id}_students", ("No.", "ID", "Surname", "Name"), numbered,
+                           title=title)
+
+
+# -----------------------------
+# Roster bundle (ZIP)
+# -----------------------------
+def _parse_id_list(raw):
+    return [int(x) for x in (raw or "").split(",") if x.strip()]
+
+
+def exam_students_bundle(request):
+    """
+    ZIP of the alphabetical + random rosters of every exam selected by
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD and/or ?exam_ids=1,2&dean_exam_ids=3, streamed
+    while the PDFs are rendered in the shared render pool.
+    """
+    try:
+        date_from = date.fromisoformat(request.GET["from"]) if request.GET.get("from") else None
+        date_to = date.fromisoformat(request.GET["to"]) if request.GET.get("to") else None
+        exam_ids = _parse_id_list(request.GET.get("exam_ids"))
+        dean_exam_ids = _parse_id_list(request.GET.get("dean_exam_ids"))
+    except ValueError:
+        return JsonResponse({"status": "error", "message": "Invalid date or id list"}, status=400)
+    if not (date_from or date_to or exam_ids or dean_exam_ids):
+        return JsonResponse({"status": "error", "message": "Select exams with from/to or exam_ids/dean_exam_ids"},
+                            status=400)
+
+    specs = select_exams(date_from, date_to, exam_ids, dean_exam_ids)
+    if not specs:
+        return JsonResponse({"status": "error", "message": "No exams match the selection"}, status=404)
+
+    try:
+        jobs = roster_jobs(specs)  # all students in one query, before streaming starts
+    except ValidationError as e:
+        return JsonResponse({"status": "error", "message": e.messages[0]}, status=400)
+    return StreamingHttpResponse(
+        iter_roster_zip(jobs), content_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="exam_rosters.zip"'},
+    )
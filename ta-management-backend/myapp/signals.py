@@ -1,54 +1,125 @@
 """
     * This file is for real-time password generation on runserver for newly added users in MySQL (TAs, Staffs)
+    * It also keeps the `user_identities` lookup table in sync with ta_users, staff_users and authorized_users.
+    * Writes to the tables behind the total reports bump their version stamp so cached PDFs are re-rendered.
+    * Changes to a TA or a TAAssignment drop the cached evaluation of the TAAllocations they affect.
     * management > assign_passwords.py can also be used by the command:
         python manage.py assign_passwords
 """
 # myapps/signals.py
-import random
-import string
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
-from django.core.mail import send_mail
-from django.conf import settings
 
-from myapp.models import TAUser, StaffUser # Users
+from myapp.models import TAUser, StaffUser, AuthorizedUser # Users
+from myapp.proctoring.models import ProctoringAssignment
+from myapp.taduties.models import TADuty
+from myapp.exams.models import Exam, DeanExam
+from myapp.taassignment.models import TAAssignment, TAAllocation, invalidate_evaluations
+from myapp.reports.cache import bump_report_version
+from myapp.userauth.helpers import refresh_identity
+from myapp.userauth.passwords import generate_random_password, queue_password_email
+
+
+def _assign_initial_password(sender, instance):
+    new_password = generate_random_password()
+    instance.set_password(new_password)  # Hash password
+    # Write only the password column (a full save() would fire post_save again)
+    sender.objects.filter(pk=instance.pk).update(password=instance.password)
+
+    # Send the new password via email (batched in the background, request doesn't wait on SMTP),
+    # only once the user is committed: a rolled-back create must not mail a password
+    transaction.on_commit(lambda: queue_password_email(instance, new_password))
 
-def generate_random_password():
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=8))
 
 @receiver(post_save, sender=TAUser)
 def assign_password_on_create_ta(sender, instance, created, **kwargs):
     if created and (instance.password is None or instance.password == ""):
-        new_password = generate_random_password()
-        instance.set_password(new_password)  # Hash password
-        instance.save()
+        _assign_initial_password(sender, instance)
+        print(f"Auto-assigned password to TAUser {instance.email} and queued email.")
 
-        # Send the new password via email
-        subject = "Your TA Management System Password"
-        message = (
-            f"Hello {instance.name},\n\n"
-            f"Your login email is: {instance.email}\n"
-            f"Your password is: {new_password}\n\n"
-        )
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [instance.email], fail_silently=False)
 
-        print(f"Auto-assigned password to TAUser {instance.email} and sent email.")
+@receiver(post_save, sender=StaffUser)
+def assign_password_on_create_staff(sender, instance, created, **kwargs):
+    if created and (instance.password is None or instance.password == ""):
+        _assign_initial_password(sender, instance)
+        print(f"Auto-assigned password to StaffUser {instance.email} and queued email.")
 
 
+# Identity table maintenance (email -> user type)
+@receiver(post_save, sender=TAUser)
 @receiver(post_save, sender=StaffUser)
-def assign_password_on_create_ta(sender, instance, created, **kwargs):
-    if created and (instance.password is None or instance.password == ""):
-        new_password = generate_random_password()
-        instance.set_password(new_password)  # Hash password
-        instance.save()
-
-        # Send the new password via email
-        subject = "Your TA Management System Password"
-        message = (
-            f"Hello {instance.name},\n\n"
-            f"Your login email is: {instance.email}\n"
-            f"Your password is: {new_password}\n\n"
-        )
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [instance.email], fail_silently=False)
-
-        print(f"Auto-assigned password to StaffUser {instance.email} and sent email.")
+@receiver(post_save, sender=AuthorizedUser)
+def sync_identity_on_save(sender, instance, created, **kwargs):
+    # Updates keep the same email PK and table, so only inserts change the identity row.
+    if created:
+        refresh_identity(instance.email)
+
+
+@receiver(post_delete, sender=TAUser)
+@receiver(post_delete, sender=StaffUser)
+@receiver(post_delete, sender=AuthorizedUser)
+def sync_identity_on_delete(sender, instance, **kwargs):
+    refresh_identity(instance.email)
+
+
+# Report cache invalidation (model -> report data source)
+REPORT_SOURCES = {
+    ProctoringAssignment: "proctoring",
+    TADuty: "duties",
+    TAUser: "tas",
+    Exam: "exams",
+    DeanExam: "exams",
+}
+
+
+@receiver(post_save, sender=ProctoringAssignment)
+@receiver(post_save, sender=TADuty)
+@receiver(post_save, sender=TAUser)
+@receiver(post_save, sender=Exam)
+@receiver(post_save, sender=DeanExam)
+@receiver(post_delete, sender=ProctoringAssignment)
+@receiver(post_delete, sender=TADuty)
+@receiver(post_delete, sender=TAUser)
+@receiver(post_delete, sender=Exam)
+@receiver(post_delete, sender=DeanExam)
+def bump_report_cache(sender, **kwargs):
+    bump_report_version(REPORT_SOURCES[sender])
+
+
+# Cached TAAllocation evaluations (taassignment/scenarios.py): a course's total_load and
+# issues depend on its TAs' FT/PT type and on its TAAssignment
+@receiver(post_save, sender=TAUser)
+def invalidate_evaluations_on_ta_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or "ta_type" in update_fields:
+        invalidate_evaluations(TAAllocation.objects.filter(Q(assigned_tas=instance) | Q(assigned_graders=instance)))
+
+
+@receiver(pre_delete, sender=TAUser)
+def invalidate_evaluations_on_ta_delete(sender, instance, **kwargs):
+    # before the cascade removes the TA from the allocations
+    invalidate_evaluations(TAAllocation.objects.filter(Q(assigned_tas=instance) | Q(assigned_graders=instance)))
+
+
+@receiver(post_save, sender=TAAssignment)
+@receiver(post_delete, sender=TAAssignment)
+def invalidate_evaluations_on_assignment(sender, instance, **kwargs):
+    invalidate_evaluations(TAAllocation.objects.filter(staff_id=instance.staff_id, course_id=instance.course_id))
+
+
+@receiver(m2m_changed, sender=TAAssignment.must_have_ta.through)
+@receiver(m2m_changed, sender=TAAssignment.avoided_tas.through)
+def invalidate_evaluations_on_assignment_tas(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ("post_add", "post_remove"):
+        ids = pk_set if reverse else {instance.pk}
+    elif action == "pre_clear":  # pk_set isn't given for a clear
+        ids = sender.objects.filter(tauser_id=instance.pk).values_list("taassignment_id", flat=True) \
+            if reverse else {instance.pk}
+    else:
+        return
+    keys = Q()
+    for staff, course in TAAssignment.objects.filter(pk__in=ids).values_list("staff_id", "course_id"):
+        keys |= Q(staff_id=staff, course_id=course)
+    if keys:
+        invalidate_evaluations(TAAllocation.objects.filter(keys))
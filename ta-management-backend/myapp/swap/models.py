@@ -7,6 +7,7 @@ from django.db.models import F
 from myapp.models import TAUser, AuthorizedUser
 from myapp.proctoring.models import ProctoringAssignment
 from myapp.notificationsystem.views import create_notification
+from myapp.reports.cache import bump_report_version
 
 SWAP_STATUS = [
     ("pending",   "Pending"),
@@ -75,6 +76,7 @@ class SwapRequest(models.Model):
         # 4) Bulk‐update workloads
         TAUser.objects.filter(pk=old_ta.pk).update(workload=F("workload") - hours)
         TAUser.objects.filter(pk=new_ta.pk).update(workload=F("workload") + hours)
+        bump_report_version("tas")  # .update() skips post_save
 
         # 5) Mark swap accepted
         self.status       = "accepted"
@@ -13,6 +13,7 @@ from django.db.models.functions import Replace, Lower
 from myapp.userauth.helpers import find_user_by_email
 from myapp.utils import advisor_department
 from myapp.notificationsystem.views import create_notification
+from myapp.reports.cache import bump_report_version
 
 from myapp.proctoring.models import ProctoringAssignment
 from myapp.swap.models import SwapRequest
@@ -521,6 +522,7 @@ def staff_swap(request, assignment_id):
     old_ta = pa.ta
     TAUser.objects.filter(pk=old_ta.pk).update(workload=F("workload")-hours)
     TAUser.objects.filter(pk=new_ta.pk).update(workload=F("workload")+hours)
+    bump_report_version("tas")  # .update() skips post_save
     
     pa.ta = new_ta
     pa.save(update_fields=["ta"])
@@ -105,10 +105,61 @@ class TAAllocation(models.Model):
         related_name="grader_allocations",
         blank=True
     )
+    # evaluate() of the TAs/graders above, cached for scenario_allocations; None = to be re-evaluated
+    total_load = models.PositiveIntegerField(default=0)
+    issues = models.JSONField(null=True, blank=True, help_text="Why the course's requirements are not met")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("staff", "course")
         
     def __str__(self):
          return f"Allocation for {self.course.code} by {self.staff.email}"
+
+
+def ta_load(ta_type):
+    """Load a TA brings to a course: part-time 1, full-time (or unset) 2."""
+    return 1 if (ta_type or "").strip().upper() == "PT" else 2
+
+
+def invalidate_evaluations(allocations):
+    """Drop the cached evaluation of `allocations` (a TAAllocation queryset) so it is redone on next read."""
+    return allocations.update(issues=None)
+
+
+class AllocationScenario(models.Model):
+    """
+    A draft version of the department's TA allocation (solver output or a secretary's
+    what-if). Its DraftAllocation rows override the live TAAllocation rows of the same
+    staff + course; courses without a draft row keep their live allocation.
+    """
+    name = models.CharField(max_length=100, blank=True)
+    department = models.CharField(max_length=100, blank=True, help_text="Course code prefix, blank for all")
+    created_by = models.EmailField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    committed_at = models.DateTimeField(null=True, blank=True, help_text="When the drafts were applied to TAAllocation")
+
+    def __str__(self):
+        return f"Allocation scenario {self.name or self.pk} ({self.department or 'all'})"
+
+
+class DraftAllocation(models.Model):
+    """One course's TAs/graders inside an AllocationScenario (emails, so scenarios copy cheaply)."""
+    scenario = models.ForeignKey(AllocationScenario, on_delete=models.CASCADE, related_name="allocations")
+    staff = models.ForeignKey(StaffUser, on_delete=models.CASCADE, related_name="draft_allocations")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="draft_allocations")
+    assigned_tas = models.JSONField(default=list, help_text="TA emails")
+    assigned_graders = models.JSONField(default=list, help_text="Grader emails")
+    total_load = models.PositiveIntegerField(default=0)
+    issues = models.JSONField(default=list, help_text="Why the course's requirements could not be met")
+    # The live allocation the draft was made from, so commit can tell if it changed since
+    base_tas = models.JSONField(null=True, blank=True, help_text="Live TA emails when the draft was created")
+    base_graders = models.JSONField(null=True, blank=True, help_text="Live grader emails when the draft was created")
+
+    class Meta:
+        unique_together = ("scenario", "staff", "course")
+
+    def __str__(self):
+        return f"Draft allocation for {self.course.code} in {self.scenario}"
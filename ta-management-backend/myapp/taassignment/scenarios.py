@@ -0,0 +1,286 @@
+# myapp/taassignment/scenarios.py
+"""
+What-if TA allocations. An AllocationScenario is a copy-on-write layer over the live
+TAAllocation rows: a course gets a DraftAllocation only when it is first edited (or
+solved) in the scenario, every other course shows its live allocation. Drafts keep
+emails and their own total_load / issues, so an edit only re-evaluates the course it
+touches, and nothing is notified until the scenario is committed. Live allocations cache
+their evaluation the same way (TAAllocation.total_load / issues, dropped by
+invalidate_evaluations when their TAs or TAAssignment change). Drafts also keep the
+live TAs/graders they started from: committing refuses courses whose live allocation
+changed since, and courses whose requirements aren't met, unless forced.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from myapp.models import TAUser
+from myapp.notificationsystem.views import create_notifications
+from myapp.taassignment.models import TAAssignment, TAAllocation, DraftAllocation, ta_load
+
+
+def _live_roles(course_ids=None):
+    """
+    {(staff email, course id): {"tas": [...], "graders": [...], "total_load", "issues", "id"}}
+    from TAAllocation (three queries); issues is None where the cached evaluation was dropped.
+    """
+    allocations = TAAllocation.objects.all()
+    if course_ids is not None:
+        allocations = allocations.filter(course_id__in=course_ids)
+    by_id, roles = {}, {}
+    for pk, staff, course, total_load, issues in allocations.values_list(
+        "id", "staff_id", "course_id", "total_load", "issues"
+    ):
+        by_id[pk] = (staff, course)
+        roles[(staff, course)] = {"tas": [], "graders": [], "total_load": total_load, "issues": issues, "id": pk}
+    for field, role in (("assigned_tas", "tas"), ("assigned_graders", "graders")):
+        through = getattr(TAAllocation, field).through
+        for allocation_id, email in (
+            through.objects.filter(taallocation_id__in=list(by_id))
+            .order_by("id").values_list("taallocation_id", "tauser_id")
+        ):
+            roles[by_id[allocation_id]][role].append(email)
+    return roles
+
+
+def _assignments(course_ids=None):
+    """{(staff email, course id): TAAssignment} with the TA lists evaluate() reads (three queries)."""
+    assignments = TAAssignment.objects.prefetch_related("must_have_ta", "avoided_tas")
+    if course_ids is not None:
+        assignments = assignments.filter(course_id__in=course_ids)
+    return {(a.staff_id, a.course_id): a for a in assignments}
+
+
+def evaluate(assignment, tas, graders, loads):
+    """(total_load, issues) of one course's TAs/graders against its TAAssignment preferences."""
+    total_load = sum(loads[email] for email in tas)
+    if assignment is None:
+        return total_load, []
+
+    issues = []
+    if total_load > assignment.max_load:
+        issues.append(f"Total load {total_load} exceeds allowed {assignment.max_load}.")
+    elif total_load < assignment.min_load:
+        issues.append(f"Total load {total_load} is below the minimum {assignment.min_load}.")
+    if len(graders) != assignment.num_graders:
+        issues.append(f"{len(graders)} of {assignment.num_graders} graders assigned.")
+    missing = [ta.email for ta in assignment.must_have_ta.all() if ta.email not in tas]
+    if missing:
+        issues.append(f"Missing must-have TAs: {', '.join(missing)}.")
+    avoided = [ta.email for ta in assignment.avoided_tas.all() if ta.email in tas or ta.email in graders]
+    if avoided:
+        issues.append(f"Avoided TAs assigned: {', '.join(avoided)}.")
+    return total_load, issues
+
+
+def _refresh_evaluations(roles):
+    """
+    Evaluate the live entries of `roles` whose cached evaluation was dropped and store it
+    on their TAAllocation rows (nothing to do, and no query, when every cache is current).
+    """
+    stale = {key: entry for key, entry in roles.items() if not entry.get("draft") and entry["issues"] is None}
+    if not stale:
+        return
+    emails = {email for entry in stale.values() for email in (*entry["tas"], *entry["graders"])}
+    loads = {email: ta_load(ta_type) for email, ta_type in
+             TAUser.objects.filter(email__in=emails).values_list("email", "ta_type")}
+    assignments = _assignments({course for _, course in stale})
+    for key, entry in stale.items():
+        entry["total_load"], entry["issues"] = evaluate(assignments.get(key), entry["tas"], entry["graders"], loads)
+    TAAllocation.objects.bulk_update(
+        [TAAllocation(id=entry["id"], total_load=entry["total_load"], issues=entry["issues"]) for entry in stale.values()],
+        ["total_load", "issues"], batch_size=500,
+    )
+
+
+def scenario_allocations(scenario):
+    """
+    The scenario's full allocation state: one dict per staff + course, the draft where one
+    exists and the live allocation otherwise. Drafts and live rows carry their evaluation,
+    so only live rows changed since their last read are evaluated. A fixed number of queries.
+    """
+    roles = _live_roles()
+    for key in roles:
+        roles[key]["draft"] = False
+    drafts = scenario.allocations.values_list(
+        "staff_id", "course_id", "assigned_tas", "assigned_graders", "total_load", "issues"
+    )
+    for staff, course, tas, graders, total_load, issues in drafts:
+        roles[(staff, course)] = {
+            "tas": tas, "graders": graders, "total_load": total_load, "issues": issues, "draft": True,
+        }
+    _refresh_evaluations(roles)
+    return roles
+
+
+def role_conflicts(roles, emails=None):
+    """{email: [(staff, course), ...]} for TAs (of `emails`, or all) holding more than one role across `roles`."""
+    holders = {}
+    for key, entry in roles.items():
+        for email in (*entry["tas"], *entry["graders"]):
+            if emails is None or email in emails:
+                holders.setdefault(email, []).append(key)
+    return {email: keys for email, keys in holders.items() if len(keys) > 1}
+
+
+def ta_conflicts(scenario, emails):
+    """
+    role_conflicts of `emails` in the scenario, reading only the live allocations that
+    hold one of them and the scenario's drafts (three queries, nothing evaluated).
+    """
+    emails = set(emails)
+    roles = {}
+    for field, role in (("assigned_tas", "tas"), ("assigned_graders", "graders")):
+        through = getattr(TAAllocation, field).through
+        for staff, course, email in through.objects.filter(tauser_id__in=emails).values_list(
+            "taallocation__staff_id", "taallocation__course_id", "tauser_id"
+        ):
+            roles.setdefault((staff, course), {"tas": [], "graders": []})[role].append(email)
+    for staff, course, tas, graders in scenario.allocations.values_list(
+        "staff_id", "course_id", "assigned_tas", "assigned_graders"
+    ):
+        roles[(staff, course)] = {"tas": tas, "graders": graders}
+    return role_conflicts(roles, emails)
+
+
+def edit_draft(scenario, staff, course, tas=None, graders=None):
+    """
+    Set a course's TAs and/or graders in the scenario (None leaves that list as it is),
+    copying the live allocation into a draft on the first edit. Raises ValidationError
+    for unknown TAs or a committed scenario. Returns the saved DraftAllocation.
+    """
+    if scenario.committed_at:
+        raise ValidationError("Scenario has already been committed")
+
+    draft = scenario.allocations.filter(staff=staff, course=course).first()
+    if draft is None:
+        live = _live_roles([course.id]).get((staff.email, course.id), {"tas": [], "graders": []})
+        draft = DraftAllocation(
+            scenario=scenario, staff=staff, course=course,
+            assigned_tas=live["tas"], assigned_graders=live["graders"],
+            base_tas=live["tas"], base_graders=live["graders"],
+        )
+    if tas is not None:
+        draft.assigned_tas = list(dict.fromkeys(tas))
+    if graders is not None:
+        draft.assigned_graders = list(dict.fromkeys(graders))
+
+    emails = {*draft.assigned_tas, *draft.assigned_graders}
+    found = dict(TAUser.objects.filter(email__in=emails).values_list("email", "ta_type"))
+    unknown = sorted(emails - set(found))
+    if unknown:
+        raise ValidationError(f"TA not found: {', '.join(unknown)}")
+
+    assignment = TAAssignment.objects.filter(staff=staff, course=course) \
+        .prefetch_related("must_have_ta", "avoided_tas").first()
+    loads = {email: ta_load(ta_type) for email, ta_type in found.items()}
+    draft.total_load, draft.issues = evaluate(assignment, draft.assigned_tas, draft.assigned_graders, loads)
+    draft.save()
+    scenario.save(update_fields=["updated_at"])
+    return draft
+
+
+def write_allocations(entries):
+    """
+    Create or overwrite TAAllocation rows in bulk. `entries` are (staff email, course id,
+    TA emails, grader emails) tuples, a None list leaving that role as it is. Missing
+    allocations are created with one INSERT, then each role's link rows are replaced with
+    one DELETE and one INSERT; every touched allocation gets its updated_at bumped and its
+    cached evaluation dropped.
+    Returns {(staff email, course id): allocation id}.
+    """
+    TAAllocation.objects.bulk_create(
+        [TAAllocation(staff_id=staff, course_id=course) for staff, course, _, _ in entries],
+        ignore_conflicts=True,
+    )
+    allocation_ids = {
+        (staff, course): pk for pk, staff, course in TAAllocation.objects.filter(
+            course_id__in={course for _, course, _, _ in entries}
+        ).values_list("id", "staff_id", "course_id")
+    }
+    TAAllocation.objects.filter(id__in=[allocation_ids[entry[:2]] for entry in entries]).update(
+        updated_at=timezone.now(), issues=None,
+    )
+    for position, field in ((2, "assigned_tas"), (3, "assigned_graders")):
+        links = [(allocation_ids[entry[:2]], entry[position]) for entry in entries if entry[position] is not None]
+        if not links:
+            continue
+        through = getattr(TAAllocation, field).through
+        through.objects.filter(taallocation_id__in=[pk for pk, _ in links]).delete()
+        through.objects.bulk_create([
+            through(taallocation_id=pk, tauser_id=email) for pk, emails in links for email in emails
+        ])
+    return allocation_ids
+
+
+@transaction.atomic
+def commit_scenario(scenario, committed_by_name="", force=False):
+    """
+    Apply every draft of the scenario to TAAllocation in bulk (write_allocations) and send
+    one notification to each newly assigned TA and each instructor of a changed course.
+    Raises ValidationError, unless `force`, when a course's live allocation changed since
+    its draft was made or a changed course doesn't meet its TAAssignment requirements.
+    Returns the number of allocations changed.
+    """
+    scenario = type(scenario).objects.select_for_update().get(pk=scenario.pk)
+    if scenario.committed_at:
+        raise ValidationError("Scenario has already been committed")
+
+    drafts = list(scenario.allocations.select_related("course").prefetch_related("course__instructors"))
+    live = _live_roles([d.course_id for d in drafts])
+    empty = {"tas": [], "graders": []}
+
+    def differs(roles, tas, graders):
+        return set(roles["tas"]) != set(tas) or set(roles["graders"]) != set(graders)
+
+    changed = [
+        d for d in drafts
+        if differs(live.get((d.staff_id, d.course_id), empty), d.assigned_tas, d.assigned_graders)
+    ]
+    emails = {email for d in changed for email in (*d.assigned_tas, *d.assigned_graders)}
+    loads = {email: ta_load(ta_type) for email, ta_type in
+             TAUser.objects.filter(email__in=emails).values_list("email", "ta_type")}
+    unknown = sorted(emails - set(loads))
+    if unknown:
+        raise ValidationError(f"TA not found: {', '.join(unknown)}")
+    if not force:
+        # Drafts made before base_tas existed (None) can't be checked
+        stale = sorted(
+            d.course.code for d in drafts
+            if d.base_tas is not None
+            and differs(live.get((d.staff_id, d.course_id), empty), d.base_tas, d.base_graders)
+        )
+        if stale:
+            raise ValidationError(f"Live allocation changed since the draft was made: {', '.join(stale)}")
+        assignments = _assignments([d.course_id for d in changed])
+        unmet = sorted(
+            d.course.code for d in changed
+            if evaluate(assignments.get((d.staff_id, d.course_id)), d.assigned_tas, d.assigned_graders, loads)[1]
+        )
+        if unmet:
+            raise ValidationError(f"Requirements not met (commit with force to override): {', '.join(unmet)}")
+
+    if changed:
+        write_allocations([(d.staff_id, d.course_id, d.assigned_tas, d.assigned_graders) for d in changed])
+
+    notifications = []
+    for d in changed:
+        before = live.get((d.staff_id, d.course_id), empty)
+        notifications += [
+            (email, f"You've been assigned as a TA to {d.course.code} - {d.course.name}")
+            for email in d.assigned_tas if email not in before["tas"]
+        ]
+        notifications += [
+            (email, f"You've been assigned as a grader to {d.course.code} - {d.course.name}")
+            for email in d.assigned_graders if email not in before["graders"]
+        ]
+        notifications += [
+            (instructor.email, f"The TA/grader allocation of your course {d.course.code} was updated"
+                               f"{' by ' + committed_by_name if committed_by_name else ''}.")
+            for instructor in d.course.instructors.all()
+        ]
+    create_notifications(notifications)
+
+    scenario.committed_at = timezone.now()
+    scenario.save(update_fields=["committed_at", "updated_at"])
+    return len(changed)
@@ -0,0 +1,252 @@
+# myapp/taassignment/solver.py
+"""
+GOOGLE OR-TOOLS: CONSTRAINT PROGRAMMING
+
+Department-wide TA allocation from the instructors' TAAssignment preferences. For
+every TAAssignment (staff + course) it picks TAs and graders at once, enforcing:
+ 1. Must-have TAs are assigned to their course; avoided TAs aren't used there at all,
+ 2. A TA is either TA or grader of a course, not both; with one_role_per_ta (the
+    default) a TA takes one role in one course overall,
+ 3. A course's TA load (FT = 2, PT = 1) stays within its max_load,
+ 4. No more graders than num_graders,
+and optimizing, in this order:
+ a. Missing load below min_load and missing graders (such courses are reported),
+ b. Preferred TAs / graders,
+ c. Load balance: the largest gap between a course's load and its max_load, then the total gap.
+
+Courses whose own preferences contradict each other (a must-have who is also avoided,
+must-haves above max_load, min_load above max_load) are left out of the solve and
+reported; with one_role_per_ta a TA who is a must-have for several courses is kept for
+the first one.
+With one_role_per_ta, TAs already allocated to courses outside the department stay
+where they are; without it they are candidates as well and may end up in several courses.
+"""
+
+from ortools.sat.python import cp_model
+from django.db import transaction
+
+from myapp.models import TAUser
+from myapp.taassignment.models import (
+    TAAssignment, TAAllocation, AllocationScenario, DraftAllocation, ta_load,
+)
+from myapp.taassignment.scenarios import _live_roles
+from myapp.utils import advisor_department
+
+# Objective weights
+SHORTFALL_WEIGHT = 1000  # per missing load unit / grader
+PREFERENCE_WEIGHT = 10   # per preferred TA or grader placed
+BALANCE_WEIGHT = 5       # on the largest max_load gap; each gap unit also costs 1
+
+
+def _dept_prefix(code):
+    return "".join(ch for ch in code if ch.isalpha()).upper()
+
+
+class TAAllocationSolver:
+    def __init__(self, department=None, time_limit=30, one_role_per_ta=True):
+        self.department = (department or "").strip().upper()
+        self.time_limit = time_limit
+        self.one_role_per_ta = one_role_per_ta
+
+        # 1) Every preference row of the department, with its TA lists (5 queries)
+        qs = TAAssignment.objects.select_related("staff", "course").prefetch_related(
+            "must_have_ta", "preferred_tas", "preferred_graders", "avoided_tas"
+        ).order_by("course__code", "staff__email")
+        self.assignments = [
+            a for a in qs if not self.department or _dept_prefix(a.course.code) == self.department
+        ]
+
+        # 2) Candidate pool: TAs of the department (by advisor) plus anyone the preferences name,
+        #    minus TAs already allocated to courses outside the department
+        named = {
+            ta.email
+            for a in self.assignments
+            for ta in (*a.must_have_ta.all(), *a.preferred_tas.all(), *a.preferred_graders.all())
+        }
+        busy = self._allocated_elsewhere()
+        tas = [ta for ta in TAUser.objects.filter(isTA=True).order_by("email") if ta.email not in busy]
+        departments = {}  # advisor name -> department, one lookup per distinct advisor
+        if self.department:
+            for ta in tas:
+                if ta.advisor not in departments:
+                    departments[ta.advisor] = (advisor_department(ta.advisor) or "").upper()
+        self.pool = [
+            ta for ta in tas
+            if not self.department or ta.email in named or departments[ta.advisor] == self.department
+        ]
+
+        self.model = cp_model.CpModel()
+        self.solver = cp_model.CpSolver()
+        self.ta_vars = {}      # (email, assignment index) -> BoolVar
+        self.grader_vars = {}  # (email, assignment index) -> BoolVar
+        self.issues = {}       # assignment index -> [reason, ...]
+        self.optimal = False
+
+    def _allocated_elsewhere(self):
+        if not self.department or not self.one_role_per_ta:
+            return set()
+        busy = set()
+        for through in (TAAllocation.assigned_tas.through, TAAllocation.assigned_graders.through):
+            for code, email in through.objects.values_list("taallocation__course__code", "tauser_id"):
+                if _dept_prefix(code) != self.department:
+                    busy.add(email)
+        return busy
+
+    def _check_preferences(self):
+        """Record contradictions; returns the indexes of assignments to leave out of the solve."""
+        skip = set()
+        must_owner = {}    # email -> first assignment index, for one_role_per_ta
+        self.must_haves = []  # (email, assignment index)
+        pool = {ta.email for ta in self.pool}
+        for i, a in enumerate(self.assignments):
+            issues = self.issues.setdefault(i, [])
+            must = list(a.must_have_ta.all())
+            avoided = {ta.email for ta in a.avoided_tas.all()}
+
+            if a.min_load > a.max_load:
+                issues.append(f"min_load {a.min_load} is above max_load {a.max_load}.")
+            clash = [ta.email for ta in must if ta.email in avoided]
+            if clash:
+                issues.append(f"Must-have TA(s) also avoided: {', '.join(clash)}.")
+            must_load = sum(ta_load(ta.ta_type) for ta in must)
+            if must_load > a.max_load:
+                issues.append(f"Must-have TAs bring {must_load} loads, above max_load {a.max_load}.")
+            if issues:
+                skip.add(i)
+                continue
+
+            for ta in must:
+                if ta.email not in pool:
+                    issues.append(f"Must-have TA {ta.email} is not available (allocated elsewhere or not a TA).")
+                elif self.one_role_per_ta and ta.email in must_owner:
+                    other = self.assignments[must_owner[ta.email]].course.code
+                    issues.append(f"Must-have TA {ta.email} is already a must-have for {other}.")
+                else:
+                    must_owner.setdefault(ta.email, i)
+                    self.must_haves.append((ta.email, i))
+        return skip
+
+    def setup_constraints(self, skip):
+        load = {ta.email: ta_load(ta.ta_type) for ta in self.pool}
+        active = [i for i in range(len(self.assignments)) if i not in skip]
+
+        # 1) Variables, minus avoided TAs
+        for i in active:
+            avoided = {ta.email for ta in self.assignments[i].avoided_tas.all()}
+            for email in load:
+                if email in avoided:
+                    continue
+                self.ta_vars[(email, i)] = self.model.NewBoolVar(f"ta_{email}_{i}")
+                self.grader_vars[(email, i)] = self.model.NewBoolVar(f"gr_{email}_{i}")
+
+        # 2) Must-haves
+        for email, i in self.must_haves:
+            if (email, i) in self.ta_vars:
+                self.model.Add(self.ta_vars[(email, i)] == 1)
+
+        # 3) TA or grader of a course, not both; with one_role_per_ta one role overall
+        if self.one_role_per_ta:
+            roles = {}
+            for (email, i), var in (*self.ta_vars.items(), *self.grader_vars.items()):
+                roles.setdefault(email, []).append(var)
+            for variables in roles.values():
+                self.model.AddAtMostOne(variables)
+        else:
+            for key, var in self.ta_vars.items():
+                self.model.AddAtMostOne([var, self.grader_vars[key]])
+
+        # 4) Per-course load, graders, shortfalls and gaps
+        shortfalls, gaps, bonus = [], [], []
+        max_gap = self.model.NewIntVar(0, max([self.assignments[i].max_load for i in active] + [0]), "max_gap")
+        for i in active:
+            a = self.assignments[i]
+            course_load = sum(load[email] * self.ta_vars[(email, i)] for email in load if (email, i) in self.ta_vars)
+            graders = sum(self.grader_vars[(email, i)] for email in load if (email, i) in self.grader_vars)
+            self.model.Add(course_load <= a.max_load)
+            self.model.Add(graders <= a.num_graders)
+
+            short = self.model.NewIntVar(0, max(a.min_load, 0), f"short_{i}")
+            self.model.Add(short >= a.min_load - course_load)
+            shortfalls.append(short)
+            shortfalls.append(a.num_graders - graders)
+
+            gap = self.model.NewIntVar(0, max(a.max_load, 0), f"gap_{i}")
+            self.model.Add(gap == a.max_load - course_load)
+            self.model.Add(max_gap >= gap)
+            gaps.append(gap)
+
+            preferred = {ta.email for ta in a.preferred_tas.all()}
+            preferred_graders = {ta.email for ta in a.preferred_graders.all()}
+            bonus += [self.ta_vars[(e, i)] for e in preferred if (e, i) in self.ta_vars]
+            bonus += [self.grader_vars[(e, i)] for e in preferred_graders if (e, i) in self.grader_vars]
+
+        self.model.Minimize(
+            SHORTFALL_WEIGHT * sum(shortfalls)
+            - PREFERENCE_WEIGHT * sum(bonus)
+            + BALANCE_WEIGHT * max_gap
+            + sum(gaps)
+        )
+
+    def solve(self):
+        """
+        One dict per TAAssignment: staff, course, assigned_tas / assigned_graders (emails),
+        total_load and issues (why its requirements couldn't be met; empty when they were).
+        """
+        skip = self._check_preferences()
+        self.setup_constraints(skip)
+
+        self.solver.parameters.max_time_in_seconds = self.time_limit
+        status = self.solver.Solve(self.model)
+        solved = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        self.optimal = status == cp_model.OPTIMAL
+        load = {ta.email: ta_load(ta.ta_type) for ta in self.pool}
+
+        results = []
+        for i, a in enumerate(self.assignments):
+            issues = self.issues.get(i, [])
+            tas, graders = [], []
+            if i not in skip and solved:
+                tas = [e for e in load if (e, i) in self.ta_vars and self.solver.Value(self.ta_vars[(e, i)])]
+                graders = [e for e in load if (e, i) in self.grader_vars and self.solver.Value(self.grader_vars[(e, i)])]
+            elif i not in skip:
+                issues.append("No allocation found within the time limit.")
+            total_load = sum(load[e] for e in tas)
+
+            if i not in skip and solved:
+                if total_load < a.min_load:
+                    issues.append(f"Only {total_load} of the minimum {a.min_load} loads could be filled "
+                                  f"within max_load {a.max_load} from the available TAs.")
+                if len(graders) < a.num_graders:
+                    issues.append(f"Only {len(graders)} of {a.num_graders} graders could be found.")
+            results.append({
+                "staff": a.staff, "course": a.course,
+                "assigned_tas": tas, "assigned_graders": graders,
+                "total_load": total_load, "issues": issues,
+            })
+        return results
+
+
+@transaction.atomic
+def save_scenario(results, created_by, department="", name="", scenario=None):
+    """
+    Store solver results as one DraftAllocation per course, in a new AllocationScenario
+    or replacing the drafts of the same courses in `scenario`.
+    """
+    if scenario is None:
+        scenario = AllocationScenario.objects.create(name=name, department=department or "", created_by=created_by)
+    else:
+        scenario.allocations.filter(course__in=[r["course"] for r in results]).delete()
+        scenario.save(update_fields=["updated_at"])
+    live = _live_roles([r["course"].id for r in results])
+    empty = {"tas": [], "graders": []}
+    DraftAllocation.objects.bulk_create([
+        DraftAllocation(
+            scenario=scenario, staff=r["staff"], course=r["course"],
+            assigned_tas=r["assigned_tas"], assigned_graders=r["assigned_graders"],
+            total_load=r["total_load"], issues=r["issues"],
+            base_tas=live.get((r["staff"].email, r["course"].id), empty)["tas"],
+            base_graders=live.get((r["staff"].email, r["course"].id), empty)["graders"],
+        )
+        for r in results
+    ])
+    return scenario
@@ -7,6 +7,12 @@ urlpatterns = [
     path('list-preferences/', list_assignment_preferences, name='list_preferences'),
     path('assign-tas/', assign_tas, name='assign_tas'),
     path('assign-graders/', assign_graders, name='assign_graders'),
+    path('assign-allocations/', assign_allocations, name='assign_allocations'),
     path('list-allocations/', list_allocations, name='list_allocations'),
     path('list-department-tas/', list_department_tas, name='list_department_tas'),
+    path('auto-allocate/', auto_allocate, name='auto_allocate'),
+    path('scenarios/create/', create_scenario, name='create_scenario'),
+    path('scenarios/<int:scenario_id>/', scenario_detail, name='scenario_detail'),
+    path('scenarios/<int:scenario_id>/edit/', edit_scenario, name='edit_scenario'),
+    path('scenarios/<int:scenario_id>/commit/', commit_scenario_view, name='commit_scenario'),
 ]
@@ -1,12 +1,21 @@
 # myapp/taassignment/views.py
 from django.http import JsonResponse
-from django.views.decorators.http import require_GET, require_POST
+from django.views.decorators.http import require_GET, require_POST, condition
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from myapp.userauth.helpers import find_user_by_email
-from myapp.notificationsystem.views import create_notification
+from myapp.notificationsystem.views import create_notifications
 from myapp.utils import advisor_department
 from myapp.models import AuthorizedUser, StaffUser, TAUser, Course
-from myapp.taassignment.models import TAAssignment, TAAllocation
+from myapp.taassignment.models import TAAssignment, TAAllocation, AllocationScenario, ta_load
+from myapp.taassignment.solver import TAAllocationSolver, save_scenario
+from myapp.taassignment.scenarios import (
+    scenario_allocations, role_conflicts, ta_conflicts, edit_draft, commit_scenario, write_allocations,
+)
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q, Count, Max, Sum, Case, When, OuterRef, Subquery, Prefetch
+from django.db.models.functions import Coalesce
+from myapp.reports.cache import read_stamp
 import json, re
 
 def check_staff_or_authorized(email):
@@ -14,8 +23,48 @@ def check_staff_or_authorized(email):
     is_allowed = user_type in ("Staff", "Authorized")
     return user_obj, user_type, is_allowed
 
+# ----------------------------------------------------------------------
+# Listings: ?department=CS / ?course=CS201 filters, a fixed number of queries,
+# and an ETag over the listed rows so dashboards can re-poll with If-None-Match
+# ----------------------------------------------------------------------
+def _course_filter(request, prefix=""):
+    """Q for the ?department= / ?course= filters (on `prefix`course), or None if they are invalid."""
+    department = request.GET.get("department", "").strip().upper()
+    code = request.GET.get("course", "").strip()
+    if department and not department.isalpha():
+        return None
+    q = Q()
+    if department:
+        q &= Q(**{f"{prefix}course__code__iregex": rf"^{department}[^A-Za-z]"})
+    if code:
+        q &= Q(**{f"{prefix}course__code__iexact": code})
+    return q
+
+
+def _listing_etag(queryset, request):
+    """
+    Row count + newest updated_at of the filtered rows, plus the TA table's version (names, FT/PT).
+    None (no ETag, no 304) unless a staff or authorized user is logged in, so condition()
+    can't answer before the view has checked access.
+    """
+    email = request.session.get("user_email")
+    if not email or not check_staff_or_authorized(email)[2]:
+        return None
+    q = _course_filter(request)
+    if q is None:
+        return None
+    stats = queryset.filter(q).aggregate(n=Count("id"), last=Max("updated_at"))
+    last = stats["last"].isoformat() if stats["last"] else ""
+    return f'{queryset.model.__name__}-{stats["n"]}-{last}-{read_stamp("tas")}'
+
+
+def _ta_fields():
+    return TAUser.objects.only("email", "name", "surname", "ta_type").order_by("surname", "name")
+
+
 @require_GET
 @ensure_csrf_cookie
+@condition(etag_func=lambda request: _listing_etag(TAAssignment.objects.all(), request))
 def list_assignment_preferences(request):
     email = request.session.get("user_email")
     if not email:
@@ -25,8 +74,13 @@ def list_assignment_preferences(request):
     if not is_allowed:
         return JsonResponse({"status": "error", "message": "Access denied"}, status=403)
 
-    assignments = TAAssignment.objects.all().select_related("staff", "course") \
-        .prefetch_related("must_have_ta", "preferred_tas", "preferred_graders", "avoided_tas") \
+    q = _course_filter(request)
+    if q is None:
+        return JsonResponse({"status": "error", "message": "Invalid department"}, status=400)
+
+    assignments = TAAssignment.objects.filter(q).select_related("staff", "course") \
+        .prefetch_related(*(Prefetch(field, queryset=_ta_fields()) for field in
+                            ("must_have_ta", "preferred_tas", "preferred_graders", "avoided_tas"))) \
         .order_by("course__code", "staff__surname", "staff__name")
     
     data = []
@@ -69,192 +123,240 @@ def list_assignment_preferences(request):
     return JsonResponse({"status": "success", "assignments": data})
 
 
-@csrf_exempt
-@require_POST
-def assign_tas(request):
+# ----------------------------------------------------------------------
+# Manual allocation: every email of a request is resolved up front (one query
+# per table), validated in memory, written with write_allocations and
+# notified with one bulk INSERT
+# ----------------------------------------------------------------------
+def _allocation_lookups(items):
+    """(courses by code, TAAssignments by (staff email, course code), TAs by email) for a batch of requests."""
+    codes = {item.get("course_code") for item in items if isinstance(item.get("course_code"), str)}
+    staff = {item.get("instructor_email") for item in items if isinstance(item.get("instructor_email"), str)}
+    emails = {
+        email for item in items for key in ("assigned_tas", "assigned_graders")
+        for email in (item.get(key) or []) if isinstance(email, str)
+    }
+    assignments = {
+        (a.staff_id, a.course.code): a
+        for a in TAAssignment.objects.filter(staff_id__in=staff, course__code__in=codes)
+        .select_related("course").prefetch_related("must_have_ta")
+    }
+    return Course.objects.in_bulk(codes, field_name="code"), assignments, TAUser.objects.in_bulk(emails)
+
+
+def _validate_allocation(item, lookups):
     """
-    Endpoint for a common user (staff or authorized) to manually assign to *a specific instructor's* course.
+    Check one {"course_code", "instructor_email", "assigned_tas"?, "assigned_graders"?} request
+    in memory. Returns (plan, None) or (None, (message, status)).
     """
+    courses, assignments, tas_by_email = lookups
+    code, instructor = item.get("course_code"), item.get("instructor_email")
+    ta_emails, grader_emails = item.get("assigned_tas"), item.get("assigned_graders")
+    if not code or not instructor or not (ta_emails or grader_emails):
+        return None, ("Missing parameter", 400)
+    if not isinstance(code, str) or not isinstance(instructor, str):
+        return None, ("course_code and instructor_email must be strings", 400)
+    if not all(isinstance(v, list) for v in (ta_emails, grader_emails) if v is not None):
+        return None, ("assigned_tas / assigned_graders must be lists", 400)
+    if not all(isinstance(email, str) for email in (*(ta_emails or []), *(grader_emails or []))):
+        return None, ("assigned_tas / assigned_graders must list email strings", 400)
+
+    course = courses.get(code)
+    if course is None:
+        return None, ("Course not found", 404)
+    assignment = assignments.get((instructor, code))
+    if assignment is None:
+        return None, ("No TA-preferences found for that instructor + course", 404)
+    unknown = [email for email in (*(ta_emails or []), *(grader_emails or [])) if email not in tas_by_email]
+    if unknown:
+        return None, (f"TA not found: {unknown[0]}", 404)
+
+    plan = {"assignment": assignment, "course": course, "tas": None, "graders": None, "total_load": None,
+            "missing_must_have": []}
+    if ta_emails:
+        plan["tas"] = [tas_by_email[email] for email in dict.fromkeys(ta_emails)]
+        plan["total_load"] = sum(ta_load(ta.ta_type) for ta in plan["tas"])
+        if plan["total_load"] > assignment.max_load:
+            return None, (f"Total load {plan['total_load']} exceeds allowed {assignment.max_load}", 400)
+        plan["missing_must_have"] = [
+            ta.email for ta in assignment.must_have_ta.all() if ta.email not in set(ta_emails)
+        ]
+    if grader_emails:
+        plan["graders"] = [tas_by_email[email] for email in dict.fromkeys(grader_emails)]
+        if len(plan["graders"]) != assignment.num_graders:
+            return None, (f"You must assign exactly {assignment.num_graders} graders", 400)
+    return plan, None
+
+
+def _apply_allocations(plans, user_obj):
+    """Write the validated plans in bulk and send every notification in one INSERT."""
+    write_allocations([
+        (
+            p["assignment"].staff_id, p["course"].id,
+            None if p["tas"] is None else [ta.email for ta in p["tas"]],
+            None if p["graders"] is None else [g.email for g in p["graders"]],
+        )
+        for p in plans
+    ])
+
+    by = f"{user_obj.name} {user_obj.surname}"
+    instructors = {}
+    for course_id, email in Course.instructors.through.objects \
+            .filter(course_id__in=[p["course"].id for p in plans]).values_list("course_id", "staffuser_id"):
+        instructors.setdefault(course_id, []).append(email)
+
+    notifications = []
+    for p in plans:
+        course = p["course"]
+        for people, role, plural in ((p["tas"], "a TA", "TAs"), (p["graders"], "a grader", "graders")):
+            if not people:
+                continue
+            notifications += [
+                (person.email, f"You've been assigned as {role} to {course.code} - {course.name} by {by}.")
+                for person in people
+            ]
+            names = ", ".join(f"{person.name} {person.surname}" for person in people)
+            notifications += [
+                (email, f"{names} were assigned as {plural} to your course {course.code} by {by}.")
+                for email in instructors.get(course.id, [])
+            ]
+    create_notifications(notifications)
+
+
+def _allocation_request(request):
+    """(user_obj, data, error response) shared by the manual allocation endpoints."""
     session_email = request.session.get("user_email")
     if not session_email:
-        return JsonResponse({"status": "error", "message": "Not authenticated"}, status=401)
+        return None, None, JsonResponse({"status": "error", "message": "Not authenticated"}, status=401)
 
     user_obj, user_type, is_allowed = check_staff_or_authorized(session_email)
     if not is_allowed:
-        return JsonResponse({"status": "error", "message": "Access denied"}, status=403)
+        return None, None, JsonResponse({"status": "error", "message": "Access denied"}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError
+    except ValueError:
+        return None, None, JsonResponse({"status": "error", "message": "Invalid request body"}, status=400)
+    return user_obj, data, None
 
-    data = json.loads(request.body)
-    course_code        = data.get("course_code")
-    instructor_email   = data.get("instructor_email")
-    assigned_tas_emails = data.get("assigned_tas")
 
-    if not all([course_code, instructor_email, assigned_tas_emails]):
-        return JsonResponse({"status": "error", "message": "Missing parameter"}, status=400)
+@csrf_exempt
+@require_POST
+def assign_tas(request):
+    """
+    Endpoint for a common user (staff or authorized) to manually assign to *a specific instructor's* course.
+    """
+    user_obj, data, error = _allocation_request(request)
+    if error:
+        return error
 
-    # 1) Fetch course
-    try:
-        course = Course.objects.get(code=course_code)
-    except Course.DoesNotExist:
-        return JsonResponse({"status": "error", "message": "Course not found"}, status=404)
+    item = {key: data.get(key) for key in ("course_code", "instructor_email", "assigned_tas")}
+    if not item["assigned_tas"]:
+        return JsonResponse({"status": "error", "message": "Missing parameter"}, status=400)
+    plan, problem = _validate_allocation(item, _allocation_lookups([item]))
+    if problem:
+        return JsonResponse({"status": "error", "message": problem[0]}, status=problem[1])
 
-    # 2) Fetch *that* instructor’s TAAssignment row
-    try:
-        owner      = StaffUser.objects.get(email=instructor_email)
-        assignment = TAAssignment.objects.get(staff=owner, course=course)
-    except (StaffUser.DoesNotExist, TAAssignment.DoesNotExist):
-        return JsonResponse({
-            "status": "error",
-            "message": "No TA-preferences found for that instructor + course"
-        }, status=404)
-
-    # 3) Build TA list + total_load
-    total_load = 0
-    tas        = []
-    for ta_email in assigned_tas_emails:
-        try:
-            ta = TAUser.objects.get(email=ta_email)
-            tas.append(ta)
-            total_load += 2 if (not ta.ta_type or ta.ta_type == "FT") else 1
-        except TAUser.DoesNotExist:
-            return JsonResponse({
-                "status": "error",
-                "message": f"TA not found: {ta_email}"
-            }, status=404)
-
-    # 4) Enforce max_load
-    if total_load > assignment.max_load:
-        return JsonResponse({
-            "status": "error",
-            "message": f"Total load {total_load} exceeds allowed {assignment.max_load}"
-        }, status=400)
-
-    # 5) Must-have check
-    must_emails = [t.email for t in assignment.must_have_ta.all()]
-    missing     = [e for e in must_emails if e not in assigned_tas_emails]
-    if missing and not data.get("force"):
+    if plan["missing_must_have"] and not data.get("force"):
         return JsonResponse({
             "status": "warning",
-            "message": f"Missing must-have TAs: {', '.join(missing)}",
-            "missing_must_have": missing,
+            "message": f"Missing must-have TAs: {', '.join(plan['missing_must_have'])}",
+            "missing_must_have": plan["missing_must_have"],
             "require_confirmation": True
         }, status=202)
 
-    # 7) Create/update the TAAllocation
-    allocation, _ = TAAllocation.objects.get_or_create(
-        staff=owner,
-        course=course
-    )
-    allocation.assigned_tas.set(tas)
-    allocation.save()
-
-    # 8) Notifications…
-    ta_message = (
-        f"You've been assigned as a TA to {course.code} - {course.name} by "
-        f"{user_obj.name} {user_obj.surname}."
-    )
-    for t in tas:
-        create_notification(recipient_email=t.email, message=ta_message)
-
-    instrs = course.instructors.all()
-    if instrs:
-        names = ", ".join(f"{t.name} {t.surname}" for t in tas)
-        instr_msg = (
-            f"{names} were assigned as TAs to your course {course.code} "
-            f"by {user_obj.name} {user_obj.surname}."
-        )
-        for instr in instrs:
-            create_notification(recipient_email=instr.email, message=instr_msg)
+    with transaction.atomic():
+        _apply_allocations([plan], user_obj)
 
     return JsonResponse({
         "status": "success",
         "message": "TAs assigned successfully",
-        "total_load": total_load
+        "total_load": plan["total_load"]
     })
 
 
-
 @csrf_exempt
 @require_POST
 def assign_graders(request):
     """
     Endpoint for a common user (staff or authorized) to manually assign grader(s) to *a specific instructor's* course.
     """
-    session_email = request.session.get("user_email")
-    if not session_email:
-        return JsonResponse({"status": "error", "message": "Not authenticated"}, status=401)
+    user_obj, data, error = _allocation_request(request)
+    if error:
+        return error
 
-    user_obj, user_type, is_allowed = check_staff_or_authorized(session_email)
-    if not is_allowed:
-        return JsonResponse({"status": "error", "message": "Access denied"}, status=403)
+    item = {key: data.get(key) for key in ("course_code", "instructor_email", "assigned_graders")}
+    if not item["assigned_graders"]:
+        return JsonResponse({"status": "error", "message": "Missing parameter"}, status=400)
+    plan, problem = _validate_allocation(item, _allocation_lookups([item]))
+    if problem:
+        return JsonResponse({"status": "error", "message": problem[0]}, status=problem[1])
 
-    data = json.loads(request.body)
-    course_code       = data.get("course_code")
-    instructor_email  = data.get("instructor_email")
-    grader_emails     = data.get("assigned_graders")
+    with transaction.atomic():
+        _apply_allocations([plan], user_obj)
 
-    if not all([course_code, instructor_email, grader_emails]):
-        return JsonResponse({"status": "error", "message": "Missing parameter"}, status=400)
+    return JsonResponse({"status": "success", "message": "Graders assigned successfully"})
 
-    # 1) Fetch course & assignment
-    try:
-        course     = Course.objects.get(code=course_code)
-        owner      = StaffUser.objects.get(email=instructor_email)
-        assignment = TAAssignment.objects.get(staff=owner, course=course)
-    except (Course.DoesNotExist, StaffUser.DoesNotExist, TAAssignment.DoesNotExist):
-        return JsonResponse({
-            "status": "error",
-            "message": "Assignment preference not found for that instructor + course"
-        }, status=404)
 
-    # 2) Enforce exact number of graders
-    if len(grader_emails) != assignment.num_graders:
+@csrf_exempt
+@require_POST
+def assign_allocations(request):
+    """
+    Submit several courses' allocations at once; all or nothing.
+    Body: {"allocations": [{"course_code", "instructor_email", "assigned_tas"?, "assigned_graders"?}, ...],
+           "force": false}
+    Missing must-have TAs need "force" like in assign_tas.
+    """
+    user_obj, data, error = _allocation_request(request)
+    if error:
+        return error
+
+    items = data.get("allocations")
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return JsonResponse({"status": "error", "message": "Missing parameter: allocations"}, status=400)
+
+    lookups = _allocation_lookups(items)
+    plans, errors, warnings = [], [], []
+    for index, item in enumerate(items):
+        plan, problem = _validate_allocation(item, lookups)
+        if problem:
+            errors.append({"index": index, "course_code": item.get("course_code"), "message": problem[0]})
+            continue
+        if plan["missing_must_have"]:
+            warnings.append({"index": index, "course_code": item.get("course_code"),
+                             "missing_must_have": plan["missing_must_have"]})
+        plans.append(plan)
+
+    keys = [(p["assignment"].staff_id, p["course"].id) for p in plans]
+    if len(set(keys)) != len(keys):
+        errors.append({"index": None, "course_code": None, "message": "Duplicate instructor + course in request"})
+    if errors:
+        return JsonResponse({"status": "error", "message": "No allocation was saved", "errors": errors}, status=400)
+    if warnings and not data.get("force"):
         return JsonResponse({
-            "status": "error",
-            "message": f"You must assign exactly {assignment.num_graders} graders"
-        }, status=400)
-
-    # 3) Build grader list
-    graders = []
-    for email in grader_emails:
-        try:
-            graders.append(TAUser.objects.get(email=email))
-        except TAUser.DoesNotExist:
-            return JsonResponse({
-                "status": "error",
-                "message": f"TA not found: {email}"
-            }, status=404)
-
-    # 5) Create/update the TAAllocation
-    allocation, _ = TAAllocation.objects.get_or_create(
-        staff=owner,
-        course=course
-    )
-    allocation.assigned_graders.set(graders)
-    allocation.save()
-
-    # 6) Notifications…
-    msg = (
-        f"You've been assigned as a grader to {course.code} - {course.name} by "
-        f"{user_obj.name} {user_obj.surname}."
-    )
-    for g in graders:
-        create_notification(recipient_email=g.email, message=msg)
-
-    instrs = course.instructors.all()
-    if instrs:
-        names = ", ".join(f"{g.name} {g.surname}" for g in graders)
-        instr_msg = (
-            f"{names} were assigned as graders to your course {course.code} "
-            f"by {user_obj.name} {user_obj.surname}."
-        )
-        for instr in instrs:
-            create_notification(recipient_email=instr.email, message=instr_msg)
+            "status": "warning",
+            "message": "Missing must-have TAs",
+            "warnings": warnings,
+            "require_confirmation": True
+        }, status=202)
 
-    return JsonResponse({"status": "success", "message": "Graders assigned successfully"})
+    with transaction.atomic():
+        _apply_allocations(plans, user_obj)
 
+    return JsonResponse({
+        "status": "success",
+        "message": f"{len(plans)} allocations saved",
+        "allocations": [
+            {"course_code": p["course"].code, "instructor_email": p["assignment"].staff_id, "total_load": p["total_load"]}
+            for p in plans
+        ],
+    })
 
 
 @require_GET
+@condition(etag_func=lambda request: _listing_etag(TAAllocation.objects.all(), request))
 def list_allocations(request):
     email = request.session.get("user_email")
     if not email:
@@ -264,44 +366,45 @@ def list_allocations(request):
     if user_type not in ("Staff", "Authorized"):
         return JsonResponse({"status":"error","message":"Access denied"}, status=403)
 
+    q = _course_filter(request)
+    if q is None:
+        return JsonResponse({"status":"error","message":"Invalid department"}, status=400)
+
+    # Load per allocation (PT = 1, otherwise 2) summed in SQL
+    loads = TAAllocation.assigned_tas.through.objects \
+        .filter(taallocation_id=OuterRef("pk")).values("taallocation_id") \
+        .annotate(total=Sum(Case(When(tauser__ta_type__iexact="PT", then=1), default=2))).values("total")
+
     # Both Staff and Authorized Users can see all allocations
-    assignments = TAAllocation.objects.all() \
-        .select_related("course") \
-        .prefetch_related("assigned_tas", "assigned_graders") \
+    assignments = TAAllocation.objects.filter(q) \
+        .select_related("staff", "course") \
+        .annotate(total_load=Coalesce(Subquery(loads), 0)) \
+        .prefetch_related(Prefetch("assigned_tas", queryset=_ta_fields()),
+                          Prefetch("assigned_graders", queryset=_ta_fields())) \
         .order_by("course__code")
 
     allocations_data = []
     for allocation in assignments:
-        instructor_email = allocation.staff.email
-        tas = allocation.assigned_tas.all()
-        graders = allocation.assigned_graders.all()
-
-        ta_list = []
-        for ta in tas:
-            is_pt = getattr(ta, "ta_type", None) == "PT"
-            ta_list.append({
-                "name": ta.name,
-                "surname": ta.surname,
-                "email": ta.email,
-                "is_full_time": not is_pt,
-            })
-
-        grader_list = [
-            {"name": grader.name, "surname": grader.surname, "email": grader.email}
-            for grader in graders
-        ]
-
-        total_load = sum(2 if getattr(ta, "ta_type", None) != "PT" else 1 for ta in tas)
-
         allocations_data.append({
-            "instructor_email": instructor_email,
+            "instructor_email": allocation.staff.email,
             "course": {
                 "code": allocation.course.code,
                 "name": allocation.course.name,
             },
-            "assigned_tas": ta_list,
-            "assigned_graders": grader_list,
-            "total_load": total_load,
+            "assigned_tas": [
+                {
+                    "name": ta.name,
+                    "surname": ta.surname,
+                    "email": ta.email,
+                    "is_full_time": (ta.ta_type or "").strip().upper() != "PT",
+                }
+                for ta in allocation.assigned_tas.all()
+            ],
+            "assigned_graders": [
+                {"name": grader.name, "surname": grader.surname, "email": grader.email}
+                for grader in allocation.assigned_graders.all()
+            ],
+            "total_load": allocation.total_load,
         })
 
     return JsonResponse({"status":"success","allocations": allocations_data})
@@ -343,4 +446,213 @@ def list_department_tas(request):
                 "is_full_time": (ta.ta_type or "").strip().upper() != "PT",
             })
 
-    return JsonResponse({"status": "success", "tas": result})
\ No newline at end of file
+    return JsonResponse({"status": "success", "tas": result})
+
+
+@csrf_exempt
+@require_POST
+def auto_allocate(request):
+    """
+    Solve the TA allocation of a department from the instructors' preferences and
+    store it as a draft AllocationScenario (live allocations are left untouched).
+    Body: {"department": "CS", "name": "...", "time_limit": 30}; with "scenario_id" the
+    solved courses replace their drafts in that (uncommitted) scenario instead, and
+    "allow_multiple_roles": true lets a TA hold roles in several courses.
+    """
+    user_email = request.session.get("user_email")
+    if not user_email:
+        return JsonResponse({"status": "error", "message": "Not authenticated"}, status=401)
+
+    _, user_type = find_user_by_email(user_email)
+    if user_type != "Authorized":
+        return JsonResponse({"status": "error", "message": "Access denied"}, status=403)
+
+    try:
+        data = json.loads(request.body or "{}")
+        department = (data.get("department") or "").strip().upper()
+        name = (data.get("name") or "").strip()[:100]
+        time_limit = max(1, min(int(data.get("time_limit", 30)), 300))
+        scenario_id = data.get("scenario_id")
+        one_role_per_ta = not data.get("allow_multiple_roles", False)
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({"status": "error", "message": "Invalid request body"}, status=400)
+
+    scenario = None
+    if scenario_id is not None:
+        scenario = AllocationScenario.objects.filter(id=scenario_id, committed_at__isnull=True).first()
+        if scenario is None:
+            return JsonResponse({"status": "error", "message": "Scenario not found or already committed"}, status=404)
+
+    solver = TAAllocationSolver(department, time_limit=time_limit, one_role_per_ta=one_role_per_ta)
+    results = solver.solve()
+    scenario = save_scenario(results, created_by=user_email, department=department, name=name, scenario=scenario)
+
+    return JsonResponse({
+        "status": "success",
+        "scenario_id": scenario.id,
+        "optimal": solver.optimal,
+        "allocations": [{
+            "instructor_email": r["staff"].email,
+            "course_code": r["course"].code,
+            "assigned_tas": r["assigned_tas"],
+            "assigned_graders": r["assigned_graders"],
+            "total_load": r["total_load"],
+            "issues": r["issues"],
+        } for r in results],
+    })
+
+
+# ----------------------------------------------------------------------
+# What-if scenarios: edits go to DraftAllocation rows, nothing is notified
+# until the scenario is committed (see taassignment/scenarios.py)
+# ----------------------------------------------------------------------
+def _scenario_user(request):
+    """(email, error response): only authorized users work on scenarios."""
+    user_email = request.session.get("user_email")
+    if not user_email:
+        return None, JsonResponse({"status": "error", "message": "Not authenticated"}, status=401)
+    _, user_type = find_user_by_email(user_email)
+    if user_type != "Authorized":
+        return None, JsonResponse({"status": "error", "message": "Access denied"}, status=403)
+    return user_email, None
+
+
+@csrf_exempt
+@require_POST
+def create_scenario(request):
+    """Start an empty scenario (every course shows its live allocation until edited)."""
+    user_email, error = _scenario_user(request)
+    if error:
+        return error
+    try:
+        data = json.loads(request.body or "{}")
+        name = (data.get("name") or "").strip()[:100]
+        department = (data.get("department") or "").strip().upper()
+    except (ValueError, AttributeError):
+        return JsonResponse({"status": "error", "message": "Invalid request body"}, status=400)
+
+    scenario = AllocationScenario.objects.create(name=name, department=department, created_by=user_email)
+    return JsonResponse({"status": "success", "scenario_id": scenario.id})
+
+
+@require_GET
+def scenario_detail(request, scenario_id):
+    """Every course's allocation in the scenario, with total_load, issues and TAs holding several roles."""
+    _, error = _scenario_user(request)
+    if error:
+        return error
+    scenario = AllocationScenario.objects.filter(id=scenario_id).first()
+    if scenario is None:
+        return JsonResponse({"status": "error", "message": "Scenario not found"}, status=404)
+
+    roles = scenario_allocations(scenario)
+    courses = Course.objects.in_bulk({course for _, course in roles})
+    prefix = scenario.department
+    allocations = sorted(
+        (
+            {
+                "instructor_email": staff,
+                "course": {"code": courses[course].code, "name": courses[course].name},
+                "assigned_tas": entry["tas"],
+                "assigned_graders": entry["graders"],
+                "total_load": entry["total_load"],
+                "issues": entry["issues"],
+                "is_draft": entry["draft"],
+            }
+            for (staff, course), entry in roles.items()
+            if not prefix or "".join(ch for ch in courses[course].code if ch.isalpha()).upper() == prefix
+        ),
+        key=lambda a: (a["course"]["code"], a["instructor_email"]),
+    )
+    conflicts = {
+        email: sorted(courses[course].code for _, course in keys)
+        for email, keys in role_conflicts(roles).items()
+    }
+
+    return JsonResponse({
+        "status": "success",
+        "scenario": {
+            "id": scenario.id, "name": scenario.name, "department": scenario.department,
+            "created_by": scenario.created_by,
+            "updated_at": scenario.updated_at.isoformat(),
+            "committed_at": scenario.committed_at.isoformat() if scenario.committed_at else None,
+        },
+        "allocations": allocations,
+        "conflicts": conflicts,
+    })
+
+
+@csrf_exempt
+@require_POST
+def edit_scenario(request, scenario_id):
+    """
+    Change one course inside a scenario.
+    Body: {"course_code", "instructor_email", "assigned_tas"?: [...], "assigned_graders"?: [...]}
+    """
+    _, error = _scenario_user(request)
+    if error:
+        return error
+    scenario = AllocationScenario.objects.filter(id=scenario_id).first()
+    if scenario is None:
+        return JsonResponse({"status": "error", "message": "Scenario not found"}, status=404)
+
+    try:
+        data = json.loads(request.body)
+        tas, graders = data.get("assigned_tas"), data.get("assigned_graders")
+        if not all(isinstance(v, list) for v in (tas, graders) if v is not None):
+            raise ValueError
+        owner = StaffUser.objects.get(email=data.get("instructor_email"))
+        course = Course.objects.get(code=data.get("course_code"))
+    except (ValueError, AttributeError):
+        return JsonResponse({"status": "error", "message": "Invalid request body"}, status=400)
+    except (StaffUser.DoesNotExist, Course.DoesNotExist):
+        return JsonResponse({"status": "error", "message": "Instructor or course not found"}, status=404)
+
+    try:
+        draft = edit_draft(scenario, owner, course, tas=tas, graders=graders)
+    except ValidationError as e:
+        return JsonResponse({"status": "error", "message": e.messages[0]}, status=400)
+
+    conflicts = ta_conflicts(scenario, {*draft.assigned_tas, *draft.assigned_graders})
+    codes = dict(Course.objects.filter(id__in={c for keys in conflicts.values() for _, c in keys})
+                 .values_list("id", "code"))
+    conflicts = {email: sorted(codes[c] for _, c in keys) for email, keys in conflicts.items()}
+    return JsonResponse({
+        "status": "success",
+        "allocation": {
+            "instructor_email": owner.email,
+            "course_code": course.code,
+            "assigned_tas": draft.assigned_tas,
+            "assigned_graders": draft.assigned_graders,
+            "total_load": draft.total_load,
+            "issues": draft.issues,
+        },
+        "conflicts": conflicts,
+    })
+
+
+@csrf_exempt
+@require_POST
+def commit_scenario_view(request, scenario_id):
+    """
+    Apply the scenario's drafts to the live allocations in one transaction. 409 when a
+    course's live allocation changed since its draft was made or a changed course misses
+    its requirements; body {"force": true} commits anyway.
+    """
+    user_email, error = _scenario_user(request)
+    if error:
+        return error
+    scenario = AllocationScenario.objects.filter(id=scenario_id).first()
+    if scenario is None:
+        return JsonResponse({"status": "error", "message": "Scenario not found"}, status=404)
+    try:
+        force = bool(json.loads(request.body or "{}").get("force", False))
+    except (ValueError, AttributeError):
+        return JsonResponse({"status": "error", "message": "Invalid request body"}, status=400)
+
+    user_obj, _ = find_user_by_email(user_email)
+    try:
+        changed = commit_scenario(scenario, committed_by_name=f"{user_obj.name} {user_obj.surname}", force=force)
+    except ValidationError as e:
+        return JsonResponse({"status": "error", "message": e.messages[0]}, status=409)
+    return JsonResponse({"status": "success", "message": "Scenario committed", "changed_allocations": changed})
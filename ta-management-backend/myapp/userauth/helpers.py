@@ -1,20 +1,67 @@
 # myapp/userauth/helpers.py
 from myapp.models import TAUser, StaffUser, AuthorizedUser
+from myapp.userauth.models import UserIdentity
 
-def find_user_by_email(email):   
-    # 1-) Check TA Users
-    ta_user = TAUser.objects.filter(email=email).first()
-    if ta_user:
-        return ta_user, "TA"
-    
-    # 2-) Check Staff Users
-    staff_user = StaffUser.objects.filter(email=email).first()
-    if staff_user:
-        return staff_user, "Staff"
-    
-    # 3-) Check Authorized Users
-    authorized_user = AuthorizedUser.objects.filter(email=email).first()
-    if authorized_user:
-        return authorized_user, "Authorized"
-    
+# Lookup order matters: an email found in several tables resolves to the first match.
+USER_MODELS = (
+    ("TA", TAUser),
+    ("Staff", StaffUser),
+    ("Authorized", AuthorizedUser),
+)
+MODEL_BY_TYPE = dict(USER_MODELS)
+
+
+def _scan_user_tables(email):
+    """Check every user table in order (one query per table); used to repair identity rows."""
+    for user_type, model in USER_MODELS:
+        user = model.objects.filter(email=email).first()
+        if user:
+            return user, user_type
     return None, None
+
+
+def refresh_identity(email):
+    """Re-resolve an email across the user tables and store the result in `user_identities`."""
+    user, user_type = _scan_user_tables(email)
+    if user:
+        UserIdentity.objects.update_or_create(email=email, defaults={"user_type": user_type})
+    else:
+        UserIdentity.objects.filter(email=email).delete()
+    return user, user_type
+
+
+def sync_identities(emails):
+    """
+    Bulk version of refresh_identity for imports that bypass signals (bulk_create):
+    one IN query per user table, then a bulk rewrite of the identity rows.
+    """
+    emails = set(emails)
+    if not emails:
+        return
+    resolved = {}
+    for user_type, model in USER_MODELS:
+        for email in model.objects.filter(email__in=emails).values_list("email", flat=True):
+            resolved.setdefault(email, user_type)
+
+    UserIdentity.objects.filter(email__in=emails).delete()
+    UserIdentity.objects.bulk_create(
+        [UserIdentity(email=email, user_type=user_type) for email, user_type in resolved.items()],
+        batch_size=1000,
+    )
+
+
+def find_user_by_email(email):
+    """
+    Resolve an email through the identity table: one indexed read, then one read on the
+    owning table. The table is kept current by the user signals and the imports
+    (refresh_identity / sync_identities), so a miss means no such user; nothing is
+    scanned or repaired here.
+    """
+    if not email:
+        return None, None
+
+    user_type = UserIdentity.objects.filter(email=email).values_list("user_type", flat=True).first()
+    if not user_type:
+        return None, None
+    user = MODEL_BY_TYPE[user_type].objects.filter(email=email).first()
+    return (user, user_type) if user else (None, None)
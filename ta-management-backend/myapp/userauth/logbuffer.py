@@ -0,0 +1,105 @@
+# myapp/userauth/logbuffer.py
+"""
+Write-behind buffer for AuthLog rows.
+
+login/logout only append to an in-process queue; a background thread writes the
+queued rows with a single bulk_create when either
+    - AUTHLOG_FLUSH_INTERVAL seconds have passed, or
+    - AUTHLOG_BATCH_SIZE rows are waiting,
+and once more when the process exits.
+
+Set AUTHLOG_BUFFERED = False in settings to go back to one synchronous INSERT per event.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from myapp.userauth.models import AuthLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuthLogBuffer:
+    def __init__(self, batch_size=50, flush_interval=5.0, max_pending=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending  # hard cap so a DB outage can't eat all memory
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, entry):
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                logger.error("AuthLog buffer full; dropping entry for %s", entry.user_email)
+                return
+            self._pending.append(entry)
+            full = len(self._pending) >= self.batch_size
+        self._ensure_worker()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+
+        close_old_connections()  # the flusher thread may hold a connection past wait_timeout
+        try:
+            AuthLog.objects.bulk_create(batch, batch_size=self.batch_size)
+        except Exception:
+            logger.exception("Could not write %d AuthLog entries; keeping them for the next flush", len(batch))
+            with self._lock:
+                self._pending = (batch + self._pending)[-self.max_pending:]
+            return 0
+        return len(batch)
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="authlog-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+_buffer = AuthLogBuffer(
+    batch_size=getattr(settings, "AUTHLOG_BATCH_SIZE", 50),
+    flush_interval=getattr(settings, "AUTHLOG_FLUSH_INTERVAL", 5.0),
+)
+atexit.register(_buffer.flush)  # don't lose the tail of the buffer on shutdown
+
+
+def record_auth_event(request, user_email, user_type, action):
+    entry = AuthLog(
+        user_email = user_email,
+        user_type = user_type,
+        action = action,
+        timestamp = timezone.now(),  # event time, not flush time
+        ip_address = request.META.get("REMOTE_ADDR"),
+        user_agent = request.META.get("HTTP_USER_AGENT","")[:255],
+    )
+
+    if getattr(settings, "AUTHLOG_BUFFERED", True):
+        _buffer.add(entry)
+    else:
+        entry.save()
+    return entry
+
+
+def flush_auth_logs():
+    """Write everything still queued (used on shutdown and by callers that need the rows now)."""
+    return _buffer.flush()
@@ -1,5 +1,6 @@
 # myapp/userauth/models.py
 from django.db import models
+from django.utils import timezone
 
 class AuthLog(models.Model):
     LOGIN  = 'login'
@@ -20,13 +21,35 @@ class AuthLog(models.Model):
         help_text="Type of user (TA, Staff, Authorized)"
     )
     action = models.CharField(max_length=10, choices=ACTION_CHOICES)
-    timestamp  = models.DateTimeField(auto_now_add=True)
+    timestamp  = models.DateTimeField(default=timezone.now)  # set at event time (rows may be written later in bulk)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.CharField(max_length=255, blank=True)
 
     class Meta:
         db_table = "system_logs"
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["timestamp", "id"], name="system_logs_ts_idx"),
+            models.Index(fields=["user_email", "timestamp"], name="system_logs_email_ts_idx"),
+            models.Index(fields=["ip_address", "timestamp"], name="system_logs_ip_ts_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user_email} {self.action} @ {self.timestamp}"
+
+
+class UserIdentity(models.Model):
+    """
+    Single lookup table mapping every login email to the table that owns it
+    (ta_users, staff_users or authorized_users). Kept in sync by signals.
+    """
+    USER_TYPES = [('TA','TA'),('Staff','Staff'),('Authorized','Authorized')]
+
+    email = models.EmailField(primary_key=True)  # Email PK (indexed)
+    user_type = models.CharField(max_length=20, choices=USER_TYPES)
+
+    class Meta:
+        db_table = "user_identities"
+
+    def __str__(self):
+        return f"{self.email} ({self.user_type})"
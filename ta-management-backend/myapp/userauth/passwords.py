@@ -0,0 +1,191 @@
+# myapp/userauth/passwords.py
+"""
+Password provisioning helpers shared by the `assign_passwords` command and the
+post_save signals:
+    - generate_random_password: 8-char random password
+    - hash_passwords: PBKDF2-hash many passwords in a process pool
+    - send_password_emails: send the login mails over one SMTP connection, in batches
+    - clear_unsent_passwords: empty the passwords whose mail failed, so a re-run retries them
+    - provision_passwords: all of the above for a list of users, with bulk_update
+    - queue_password_email: hand a single mail to a background sender (used by signals)
+"""
+import atexit
+import logging
+import os
+import random
+import string
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django import db
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_EMAIL_SUBJECT = "Your TA Management System Password"
+
+
+def generate_random_password(length=8):
+    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+def _hash_password(raw_password):
+    # Top-level function so it can be pickled into pool workers.
+    return make_password(raw_password)
+
+
+def hash_passwords(raw_passwords, workers=None):
+    """Hash passwords in parallel; PBKDF2 is CPU-bound so this scales with cores."""
+    raw_passwords = list(raw_passwords)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(raw_passwords) < 2:
+        return [_hash_password(p) for p in raw_passwords]
+
+    chunksize = max(1, len(raw_passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_hash_password, raw_passwords, chunksize=chunksize))
+
+
+def password_email(user, raw_password):
+    message = (
+        f"Hello {user.name},\n\n"
+        f"Your login email is: {user.email}\n"
+        f"Your password is: {raw_password}\n\n"
+    )
+    return EmailMessage(PASSWORD_EMAIL_SUBJECT, message, settings.DEFAULT_FROM_EMAIL, [user.email])
+
+
+def send_password_emails(user_passwords, batch_size=50):
+    """
+    Send one password mail per (user, raw_password) pair.
+    All batches reuse a single SMTP connection instead of one login per mail; a batch
+    that fails is logged and the connection reopened for the next one. Returns the
+    users whose mail may not have gone out (a failed batch counts as unsent as a whole).
+    """
+    pairs = list(user_passwords)
+    failed = []
+    if not pairs:
+        return failed
+
+    connection = get_connection()
+    try:
+        for i in range(0, len(pairs), batch_size):
+            batch = pairs[i:i + batch_size]
+            try:
+                connection.send_messages([password_email(user, raw) for user, raw in batch])
+            except Exception:
+                logger.exception("Could not send %d password emails", len(batch))
+                failed += [user for user, _ in batch]
+                connection.close()
+    finally:
+        connection.close()
+    return failed
+
+
+def clear_unsent_passwords(users):
+    """
+    Reset the password of users whose mail failed back to empty, so `assign_passwords`
+    picks them up again (it only provisions users without a password). Rows whose
+    password changed since are left alone.
+    """
+    by_model = {}
+    for user in users:
+        by_model.setdefault(type(user), []).append(user)
+    for model, objs in by_model.items():
+        model.objects.filter(
+            pk__in=[u.pk for u in objs], password__in=[u.password for u in objs]
+        ).update(password="")
+        for user in objs:
+            user.password = ""
+
+
+def provision_passwords(users, workers=None, batch_size=500):
+    """
+    Give every user in `users` (TAUser / StaffUser instances) a new random password:
+    hash in parallel, write back with one bulk_update per model, mail in batches after
+    the surrounding transaction commits. Users whose mail fails get their password
+    cleared again. Returns timing stats (the mail fields are filled in on commit).
+    """
+    users = list(users)
+    stats = {"users": len(users), "sent": 0, "failed": 0, "hash_secs": 0.0, "save_secs": 0.0, "mail_secs": 0.0}
+    if not users:
+        return stats
+
+    raw_passwords = [generate_random_password() for _ in users]
+    started = time.perf_counter()
+    hashes = hash_passwords(raw_passwords, workers=workers)
+    stats["hash_secs"] = time.perf_counter() - started
+
+    by_model = {}
+    for user, hashed in zip(users, hashes):
+        user.password = hashed
+        by_model.setdefault(type(user), []).append(user)
+
+    started = time.perf_counter()
+    for model, objs in by_model.items():
+        model.objects.bulk_update(objs, ["password"], batch_size=batch_size)
+    stats["save_secs"] = time.perf_counter() - started
+
+    def mail():
+        started = time.perf_counter()
+        failed = send_password_emails(zip(users, raw_passwords), batch_size=batch_size)
+        clear_unsent_passwords(failed)
+        stats["sent"], stats["failed"] = len(users) - len(failed), len(failed)
+        stats["mail_secs"] = time.perf_counter() - started
+
+    # Mail only once the hashes are committed: a rollback must not leave users holding
+    # passwords that were never stored (runs right away outside a transaction)
+    transaction.on_commit(mail)
+    return stats
+
+
+class PasswordMailQueue:
+    """Background sender so creating a user doesn't wait on SMTP."""
+
+    def __init__(self, batch_size=50, flush_interval=2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, user, raw_password):
+        with self._lock:
+            self._pending.append((user, raw_password))
+            full = len(self._pending) >= self.batch_size
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="password-mailer", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        failed = send_password_emails(batch, batch_size=len(batch))
+        if failed:
+            # Runs on the sender thread: use (then close) this thread's own DB connection
+            clear_unsent_passwords(failed)
+            db.connections.close_all()
+        return len(batch) - len(failed)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+_mail_queue = PasswordMailQueue()
+atexit.register(_mail_queue.flush)
+
+
+def queue_password_email(user, raw_password):
+    _mail_queue.add(user, raw_password)
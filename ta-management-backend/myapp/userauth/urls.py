@@ -15,4 +15,5 @@ urlpatterns = [
 
     path("logout/", logout, name="logout"), # auth/logout/
     path("logs/", get_auth_logs, name="logs"), # auth/logs/
+    path("logs/export/", export_auth_logs, name="export_logs"), # auth/logs/export/
 ]
@@ -1,26 +1,29 @@
 # myapp/userauth/views.py
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.auth import login as auth_login
 from django.contrib.auth.hashers import check_password
 from django.conf import settings
 from django.views.decorators.http import require_POST, require_GET
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.db import transaction
 from django.core.mail import send_mail
 from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_ipv46_address
 from django.utils import timezone
-import json
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db.models import Q
+import json, csv, base64, binascii
 import secrets, datetime
 
 from myapp.userauth.models import AuthLog
+from myapp.userauth.logbuffer import record_auth_event, flush_auth_logs
 from .helpers import find_user_by_email
 
 # -----------------------------
 # LOGIN
 # -----------------------------
 @require_POST
-@transaction.atomic
 def login(request):
     data = json.loads(request.body)
     email = data.get("email")
@@ -30,14 +33,8 @@ def login(request):
     if not user or not user.check_password(password):
         return JsonResponse({"status":"error","message":"Invalid credentials."}, status=401)
 
-    # Record the successful login
-    AuthLog.objects.create(
-        user_email = user.email,
-        user_type = user_type,
-        action = AuthLog.LOGIN,
-        ip_address = request.META.get("REMOTE_ADDR"),
-        user_agent = request.META.get("HTTP_USER_AGENT","")[:255],
-    )
+    # Record the successful login (queued, written in batches)
+    record_auth_event(request, user.email, user_type, AuthLog.LOGIN)
 
     request.session["user_email"] = user.email
     return JsonResponse({
@@ -287,13 +284,7 @@ def logout(request):
         user, user_type = find_user_by_email(email)
 
     if user:
-        AuthLog.objects.create(
-            user_email = email,
-            user_type = user_type,
-            action = AuthLog.LOGOUT,
-            ip_address = request.META.get("REMOTE_ADDR"),
-            user_agent = request.META.get("HTTP_USER_AGENT","")[:255],
-        )
+        record_auth_event(request, email, user_type, AuthLog.LOGOUT)
 
     request.session.flush()
     return JsonResponse({"status":"success","message":"Logged out."})
@@ -302,22 +293,150 @@ def logout(request):
 # -----------------------------
 # FETCH AUTH LOGS
 # -----------------------------
+AUTH_LOG_PAGE_SIZE = 50
+AUTH_LOG_MAX_PAGE_SIZE = 500
+AUTH_LOG_EXPORT_BATCH = 2000
+
+def _parse_log_bound(value, end_of_day=False):
+    """Accept either a full ISO datetime or a plain YYYY-MM-DD date."""
+    dt = parse_datetime(value)
+    if dt is None:
+        d = parse_date(value)
+        if d is None:
+            raise ValueError(f"Invalid date/time: {value}")
+        dt = datetime.datetime.combine(d, datetime.time.max if end_of_day else datetime.time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def _filter_auth_logs(params):
+    """
+    Apply the query-string filters shared by the log list and the CSV export.
+    Exact email / IP matches hit the (user_email, timestamp) and (ip_address, timestamp) indexes.
+    """
+    qs = AuthLog.objects.all()
+    if params.get("email"):
+        qs = qs.filter(user_email=params["email"].strip())
+    if params.get("ip"):
+        ip = params["ip"].strip()
+        try:
+            validate_ipv46_address(ip)
+        except ValidationError:
+            raise ValueError(f"Invalid ip: {ip}")
+        qs = qs.filter(ip_address=ip)
+    if params.get("action"):
+        if params["action"] not in (AuthLog.LOGIN, AuthLog.LOGOUT):
+            raise ValueError(f"Invalid action: {params['action']}")
+        qs = qs.filter(action=params["action"])
+    if params.get("user_type"):
+        qs = qs.filter(user_type=params["user_type"])
+    if params.get("from"):
+        qs = qs.filter(timestamp__gte=_parse_log_bound(params["from"]))
+    if params.get("to"):
+        qs = qs.filter(timestamp__lte=_parse_log_bound(params["to"], end_of_day=True))
+    return qs.order_by("-timestamp", "-id")
+
+
+def _encode_log_cursor(log):
+    raw = f"{log.timestamp.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_log_cursor(cursor):
+    try:
+        ts, pk = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        when = parse_datetime(ts)
+        if when is None:
+            raise ValueError
+        return when, int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError("Invalid cursor.")
+
+
+def _serialize_log(l):
+    return {
+        "user_email": l.user_email,
+        "user_type": l.user_type,
+        "action": l.action,
+        "when": l.timestamp.isoformat(),
+        "ip": l.ip_address or "",
+        "agent": l.user_agent,
+    }
+
+
 @require_GET
 def get_auth_logs(request):
+    """
+    Newest-first auth logs with keyset pagination.
+    Query params: email, ip, action, user_type, from, to, limit, cursor (from `next_cursor`).
+    """
     email = request.session.get("user_email")
     user, user_type = find_user_by_email(email)
     if user_type != "Authorized":
         return JsonResponse({"status":"error","message":"Forbidden"}, status=403)
 
-    # Fetch the last 50 logs
-    logs = AuthLog.objects.all()[:50]
-    data = [{
-        "user_email": l.user_email,
-        "user_type": l.user_type,
-        "action": l.action,
-        "when": l.timestamp.isoformat(),
-        "ip": l.ip_address or "",
-        "agent": l.user_agent,
-    } for l in logs]
+    # Write out queued entries first so the list is up to date
+    flush_auth_logs()
+
+    try:
+        qs = _filter_auth_logs(request.GET)
+        limit = min(int(request.GET.get("limit", AUTH_LOG_PAGE_SIZE)), AUTH_LOG_MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError("limit must be positive.")
+        cursor = request.GET.get("cursor")
+        if cursor:
+            when, pk = _decode_log_cursor(cursor)
+            qs = qs.filter(Q(timestamp__lt=when) | Q(timestamp=when, id__lt=pk))
+    except ValueError as e:
+        return JsonResponse({"status":"error","message":str(e)}, status=400)
+
+    # Fetch one extra row to know whether another page exists
+    logs = list(qs[:limit + 1])
+    next_cursor = _encode_log_cursor(logs[limit - 1]) if len(logs) > limit else None
+    data = [_serialize_log(l) for l in logs[:limit]]
+
+    return JsonResponse({"status":"success","logs": data, "next_cursor": next_cursor})
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to the csv writer's caller."""
+    def write(self, value):
+        return value
+
+
+@require_GET
+def export_auth_logs(request):
+    """Stream every log matching the same filters as get_auth_logs as CSV (no page limit)."""
+    email = request.session.get("user_email")
+    user, user_type = find_user_by_email(email)
+    if user_type != "Authorized":
+        return JsonResponse({"status":"error","message":"Forbidden"}, status=403)
 
-    return JsonResponse({"status":"success","logs": data})
+    flush_auth_logs()
+
+    try:
+        qs = _filter_auth_logs(request.GET)
+    except ValueError as e:
+        return JsonResponse({"status":"error","message":str(e)}, status=400)
+
+    writer = csv.writer(_Echo())
+    fields = ("user_email", "user_type", "action", "timestamp", "ip_address", "user_agent")
+
+    def rows():
+        yield writer.writerow(fields)
+        # Fixed batches, each continuing after the previous batch's last (timestamp, id) like
+        # get_auth_logs' cursor: one batch in memory at a time, even though PyMySQL buffers
+        # whole result sets (so .iterator() alone would not stream)
+        page = qs
+        while True:
+            batch = list(page.values_list("id", *fields)[:AUTH_LOG_EXPORT_BATCH])
+            for _, user_email, u_type, action, ts, ip, agent in batch:
+                yield writer.writerow([user_email, u_type, action, ts.isoformat(), ip or "", agent])
+            if len(batch) < AUTH_LOG_EXPORT_BATCH:
+                break
+            last_id, when = batch[-1][0], batch[-1][4]
+            page = qs.filter(Q(timestamp__lt=when) | Q(timestamp=when, id__lt=last_id))
+
+    return StreamingHttpResponse(rows(), content_type="text/csv",
+                                 headers={"Content-Disposition": 'attachment; filename="auth_logs.csv"'})
@@ -1,4 +1,6 @@
-# myapp/utils.py (TA-advisor department lookup)
+# myapp/utils.py (TA-advisor department lookup, name folding and collation)
+import unicodedata
+
 from django.db.models import Value
 from django.db.models.functions import Concat
 from myapp.models import StaffUser
@@ -18,4 +20,29 @@ def advisor_department(advisor_name: str) -> str | None:
         .first()
     )
 
-    return staff.department if staff else None
\ No newline at end of file
+    return staff.department if staff else None
+
+
+# Turkish dotted/dotless i pairs fold to one letter, so "IŞIK", "Işık" and "isik" meet
+_TURKISH_FOLD = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+
+
+def fold_name(name):
+    """Unicode-normalized, Turkish-aware case-folded full name with collapsed whitespace."""
+    name = unicodedata.normalize("NFKC", str(name)).translate(_TURKISH_FOLD).casefold()
+    return " ".join(name.split())
+
+
+def strip_marks(key):
+    """'güdükbay' -> 'gudukbay', for names typed without diacritics."""
+    decomposed = unicodedata.normalize("NFKD", key)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def name_sort_key(name):
+    """
+    Sort key that orders names like the database's case- and accent-insensitive
+    collation ("Çelik" next to "Celik", not after "Zorlu"); ties broken on the marks.
+    """
+    folded = fold_name(name)
+    return strip_marks(folded), folded
@@ -5,10 +5,65 @@ from django.views.decorators.http import require_POST, require_GET, require_http
 from django.core.mail import EmailMessage
 from myapp.userauth.helpers import find_user_by_email
 from django.db import IntegrityError, transaction
-from django.db.models.functions import Lower
+from django.db.models import Q, Value, Prefetch
+from django.db.models.functions import Lower, Concat
 import json
 
 from myapp.models import Course, TAUser, StaffUser, AuthorizedUser, GlobalSettings, Section
+from myapp.pagination import keyset_page
+
+# Sort keys of the list/ endpoints (last one unique, see myapp/pagination.py)
+PERSON_ORDER = ("name", "surname", "email")
+COURSE_ORDER = ("code_key", "id")
+
+
+def _name_prefix(request):
+    """?q=: prefix of the name or surname, or "name surname" prefixes when it has a space."""
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return Q()
+    if " " in query:
+        first, rest = query.split(None, 1)
+        return Q(name__istartswith=first, surname__istartswith=rest) | Q(name__istartswith=query)
+    return Q(name__istartswith=query) | Q(surname__istartswith=query)
+
+
+def _ta_filters(request):
+    """?q=, ?program=MS|PhD, ?department= (advisor's department), ?course= (allocated as TA or grader)."""
+    q = _name_prefix(request)
+    program = request.GET.get("program", "").strip()
+    department = request.GET.get("department", "").strip()
+    course = request.GET.get("course", "").strip()
+    if program:
+        q &= Q(program__iexact=program)
+    if department:
+        advisors = StaffUser.objects.filter(department__iexact=department) \
+            .annotate(full_name=Concat("name", Value(" "), "surname")).values("full_name")
+        q &= Q(advisor__in=advisors)
+    if course:
+        q &= Q(ta_allocations__course__code__iexact=course) | Q(grader_allocations__course__code__iexact=course)
+    return q
+
+
+def _staff_filters(request):
+    """?q=, ?department=, ?course= (teaches it)."""
+    q = _name_prefix(request)
+    department = request.GET.get("department", "").strip()
+    course = request.GET.get("course", "").strip()
+    if department:
+        q &= Q(department__iexact=department)
+    if course:
+        q &= Q(courses_taught__code__iexact=course)
+    return q
+
+
+def _paginated(queryset, keys, request):
+    """(rows, next cursor, None) from keyset_page, or (None, None, error response) for a bad ?limit / ?cursor."""
+    try:
+        rows, next_cursor = keyset_page(queryset, keys, request)
+    except ValueError:
+        return None, None, JsonResponse({"status": "error", "message": "Invalid limit or cursor."}, status=400)
+    return rows, next_cursor, None
 
 # -----------------------------
 # LIST EITHER TAs or STAFF
@@ -21,18 +76,18 @@ def list_users_by_role(request):
 
     role = request.GET.get("role")
     if role == "TA":
-        # Sort TAs by name, then surname
-        ta_users = TAUser.objects.all().order_by("name", "surname")
-        data = [{"email": u.email, "label": f"{u.name} {u.surname}"} for u in ta_users]
-        return JsonResponse({"status": "success", "users": data})
+        users = TAUser.objects.filter(_ta_filters(request)).distinct()
     elif role == "Staff":
-        # Sort Staff by name, then surname
-        staff_users = StaffUser.objects.all().order_by("name", "surname")
-        data = [{"email": s.email, "label": f"{s.name} {s.surname}"} for s in staff_users]
-        return JsonResponse({"status": "success", "users": data})
+        users = StaffUser.objects.filter(_staff_filters(request)).distinct()
     else:
         return JsonResponse({"status": "error", "message": "Invalid role parameter."}, status=400)
 
+    users, next_cursor, error = _paginated(users.only(*PERSON_ORDER), PERSON_ORDER, request)
+    if error:
+        return error
+    data = [{"email": u.email, "label": f"{u.name} {u.surname}"} for u in users]
+    return JsonResponse({"status": "success", "users": data, "next_cursor": next_cursor})
+
 
 # -----------------------------
 # SEND MAIL TO USER
@@ -73,7 +128,9 @@ def list_all_tas(request):
     if not session_email:
         return JsonResponse({"status": "error", "message": "Not authenticated"}, status=401)
 
-    tas = TAUser.objects.all().order_by("name", "surname")
+    tas, next_cursor, error = _paginated(TAUser.objects.filter(_ta_filters(request)).distinct(), PERSON_ORDER, request)
+    if error:
+        return error
     data = []
     for ta in tas:
         data.append({
@@ -85,7 +142,7 @@ def list_all_tas(request):
             "student_id": ta.student_id,
             "is_full_time": (ta.ta_type or "").strip().upper() != "PT",
         })
-    return JsonResponse({"status": "success", "tas": data})
+    return JsonResponse({"status": "success", "tas": data, "next_cursor": next_cursor})
 
 
 # -----------------------------
@@ -97,17 +154,29 @@ def list_all_staff(request):
     if not session_email:
         return JsonResponse({"status": "error", "message": "Not authenticated"}, status=401)
 
-    staff_users = StaffUser.objects.all().order_by("name", "surname").prefetch_related("courses_taught")
+    staff_users, next_cursor, error = _paginated(
+        StaffUser.objects.filter(_staff_filters(request)).distinct().prefetch_related(
+            "courses_taught",
+            Prefetch("sections", queryset=Section.objects.only("course_id", "instructor_id", "number").order_by("number")),
+        ),
+        PERSON_ORDER, request,
+    )
+    if error:
+        return error
     data = []
     for s in staff_users:
         courses_list = []
         for c in s.courses_taught.all():
             courses_list.append(c.code)
-        
+
+        # the staff member's section numbers per course, grouped from the prefetch
+        sections = {}
+        for sec in s.sections.all():
+            sections.setdefault(sec.course_id, []).append(sec.number)
+
         courses_detailed = []
         for course in s.courses_taught.all():
-            secs = list(Section.objects.filter(course=course, instructor=s).values_list("number", flat=True))
-            courses_detailed.append({"code": course.code,"sections": secs,})
+            courses_detailed.append({"code": course.code, "sections": sections.get(course.id, [])})
             
         data.append({
             "email": s.email,
@@ -117,7 +186,7 @@ def list_all_staff(request):
             "courses": courses_list,  # e.g. ["CS101", "CS105"]
             "courses_detailed": courses_detailed,  # e.g. [{"code": "CS101", "sections": [1, 2]}]
         })
-    return JsonResponse({"status": "success", "staff": data})
+    return JsonResponse({"status": "success", "staff": data, "next_cursor": next_cursor})
 
 
 # -----------------------------
@@ -129,7 +198,26 @@ def list_all_courses(request):
     if not session_email:
         return JsonResponse({"status": "error", "message": "Not authenticated"}, status=401)
 
-    courses = Course.objects.all().prefetch_related("instructors").order_by(Lower("code"))
+    # ?q= code or name prefix, ?department= code prefix (CS -> CS101, not CSE101), ?instructor= email
+    q = Q()
+    query = request.GET.get("q", "").strip()
+    department = request.GET.get("department", "").strip()
+    instructor = request.GET.get("instructor", "").strip()
+    if query:
+        q &= Q(code__istartswith=query) | Q(name__istartswith=query)
+    if department:
+        if not department.isalpha():
+            return JsonResponse({"status": "error", "message": "Invalid department."}, status=400)
+        q &= Q(code__iregex=rf"^{department}[^A-Za-z]")
+    if instructor:
+        q &= Q(instructors__email__iexact=instructor)
+
+    courses, next_cursor, error = _paginated(
+        Course.objects.filter(q).distinct().annotate(code_key=Lower("code")).prefetch_related("instructors"),
+        COURSE_ORDER, request,
+    )
+    if error:
+        return error
     data = []
     for course in courses:
         instructor_list = []
@@ -142,7 +230,7 @@ def list_all_courses(request):
             "name": course.name,
             "instructors": instructor_list,  # e.g. ["Alice Smith", "Bob Jones"]
         })
-    return JsonResponse({"status": "success", "courses": data})
+    return JsonResponse({"status": "success", "courses": data, "next_cursor": next_cursor})
 
 
 # -----------------------------